@@ -0,0 +1,218 @@
+"""Admission control and load shedding per route class.
+
+When the LLM providers slow down, parses and component edits hold their
+request threads for much longer and can take every thread of the server, so
+``/health`` and ``/preview`` stop answering too. ``AdmissionController`` admits
+each request before its view runs:
+
+- ``cheap`` routes (health, preview, download, editor.js, search) are always
+  admitted and only counted;
+- expensive classes (``parse``: ``POST /``; ``edit``: ``/modify-component``;
+  ``render``: site generation and restyling) share ``ADMISSION_THREADS``
+  minus ``ADMISSION_RESERVED`` threads, so the reserved ones stay free for
+  cheap routes;
+- each expensive class also has an adaptive concurrency limit. A request over
+  the limit may wait up to ``ADMISSION_QUEUE_TIMEOUT`` seconds in a short
+  queue (at most ``ADMISSION_QUEUE`` waiting); past that it is shed with
+  ``Overloaded``, answered as 503 with ``Retry-After``.
+
+The limits adapt AIMD-style to each class's latency: when the short-term
+latency average rises above ``ADMISSION_LATENCY_TOLERANCE`` times the
+long-term one, or a request reports congestion, the limit is cut by
+``ADMISSION_BACKOFF`` (at most once per ``ADMISSION_ADJUST_INTERVAL``);
+successful requests near the limit raise it by about one per limit's worth of
+completions, up to the class maximum. Nothing is adjusted before a class has
+``ADMISSION_WARMUP`` latency samples.
+
+In the LLM-bound classes (``parse``, ``edit``) only requests that called
+``mark_measured`` (made an LLM call) feed the latency signal, so cache and
+near-duplicate hits that answer in milliseconds do not look like a sudden
+slowdown next to real parses. Congestion is what the app reports on release:
+an LLM queue timeout, or a deadline 504 on the route's default deadline (a
+client's own short deadline says nothing about the server). Other errors do
+not count.
+"""
+import math
+import os
+import threading
+import time
+
+ADMISSION_THREADS = int(os.getenv("ADMISSION_THREADS", "16"))
+ADMISSION_RESERVED = int(os.getenv("ADMISSION_RESERVED", "4"))
+ADMISSION_QUEUE = int(os.getenv("ADMISSION_QUEUE", "4"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+ADMISSION_LATENCY_TOLERANCE = float(os.getenv("ADMISSION_LATENCY_TOLERANCE", "1.5"))
+ADMISSION_BACKOFF = float(os.getenv("ADMISSION_BACKOFF", "0.8"))
+ADMISSION_ADJUST_INTERVAL = float(os.getenv("ADMISSION_ADJUST_INTERVAL", "1"))
+ADMISSION_WARMUP = int(os.getenv("ADMISSION_WARMUP", "20"))
+
+CHEAP = "cheap"
+PARSE = "parse"
+EDIT = "edit"
+RENDER = "render"
+
+# Maximum concurrency of each expensive class; the adaptive limit starts there
+CLASS_LIMITS = {
+    PARSE: int(os.getenv("ADMISSION_LIMIT_PARSE", "8")),
+    EDIT: int(os.getenv("ADMISSION_LIMIT_EDIT", "4")),
+    RENDER: int(os.getenv("ADMISSION_LIMIT_RENDER", "6")),
+}
+
+# Classes whose latency is only meaningful for requests that reached the LLM
+LLM_CLASSES = {PARSE, EDIT}
+
+# Flask endpoint -> route class; unlisted endpoints are cheap
+ROUTE_CLASSES = {
+    "upload_pdf": PARSE,
+    "modify_component": EDIT,
+    "generate_website": RENDER,
+    "restyle_website": RENDER,
+}
+
+# Weights of the short- and long-term latency averages
+SHORT_ALPHA = 0.3
+LONG_ALPHA = 0.02
+
+RETRY_AFTER_MAX = 60
+
+# Whether the request running on this thread made an LLM call
+_request = threading.local()
+
+
+def mark_measured():
+    """Record that the current request reached the LLM, so its latency feeds its class limit"""
+    _request.measured = True
+
+
+class Overloaded(Exception):
+    def __init__(self, route_class, retry_after):
+        super().__init__(f"Server is busy with {route_class} requests; retry in {retry_after}s")
+        self.route_class = route_class
+        self.retry_after = retry_after
+
+
+class _RouteClass:
+    def __init__(self, name, maximum):
+        self.name = name
+        self.maximum = maximum
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.shed = 0
+        self.samples = 0
+        self.short_latency = None
+        self.long_latency = None
+        self.last_decrease = 0.0
+
+    def effective_limit(self):
+        return max(1, int(self.limit))
+
+    def observe(self, latency, congested, now):
+        """Feed one finished request (latency None when it is not a sample) to the limit"""
+        if latency is not None:
+            self.samples += 1
+            # Plain running means while warming up, so the baseline is not just the first request
+            self.short_latency = latency if self.short_latency is None else \
+                self.short_latency + max(SHORT_ALPHA, 1 / self.samples) * (latency - self.short_latency)
+            self.long_latency = latency if self.long_latency is None else \
+                self.long_latency + max(LONG_ALPHA, 1 / self.samples) * (latency - self.long_latency)
+        if self.samples < ADMISSION_WARMUP:
+            return
+        if not congested and latency is None:
+            return
+        congested = congested or self.short_latency > self.long_latency * ADMISSION_LATENCY_TOLERANCE
+        if congested:
+            if now - self.last_decrease >= ADMISSION_ADJUST_INTERVAL:
+                self.limit = max(1.0, self.limit * ADMISSION_BACKOFF)
+                self.last_decrease = now
+        elif self.in_flight + 1 >= self.effective_limit():
+            # Only grow while the limit is actually what holds requests back
+            self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+
+    def retry_after(self):
+        """Seconds until a slot is likely free: queue ahead of the client times the typical latency"""
+        latency = self.short_latency or 1.0
+        waves = (self.queued + 1) / self.effective_limit()
+        return min(RETRY_AFTER_MAX, max(1, math.ceil(latency * waves)))
+
+    def stats(self):
+        return {
+            "limit": self.effective_limit() if self.maximum else None,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "samples": self.samples,
+            "latency_ms": round(self.short_latency * 1000, 1) if self.short_latency is not None else None,
+            "baseline_ms": round(self.long_latency * 1000, 1) if self.long_latency is not None else None,
+        }
+
+
+class AdmissionController:
+    def __init__(self, threads=ADMISSION_THREADS, reserved=ADMISSION_RESERVED, limits=CLASS_LIMITS,
+                 queue=ADMISSION_QUEUE, queue_timeout=ADMISSION_QUEUE_TIMEOUT):
+        self.capacity = max(1, threads - reserved)
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.cond = threading.Condition()
+        self.classes = {name: _RouteClass(name, maximum) for name, maximum in limits.items()}
+        self.classes[CHEAP] = _RouteClass(CHEAP, 0)
+
+    @staticmethod
+    def route_class(endpoint):
+        return ROUTE_CLASSES.get(endpoint, CHEAP)
+
+    def _expensive_threads(self):
+        """Threads held by expensive requests, running or waiting in the admission queue"""
+        return sum(c.in_flight + c.queued for name, c in self.classes.items() if name != CHEAP)
+
+    def _has_room(self, cls, waiting):
+        # A waiting request already holds its thread, so it is counted in _expensive_threads
+        return (cls.in_flight < cls.effective_limit()
+                and self._expensive_threads() - waiting < self.capacity)
+
+    def admit(self, route_class):
+        """Take a slot for a request of ``route_class``; raises Overloaded when it should be shed"""
+        cls = self.classes[route_class]
+        _request.measured = False
+        with self.cond:
+            if route_class != CHEAP and not self._has_room(cls, 0):
+                if cls.queued >= self.queue or self._expensive_threads() >= self.capacity:
+                    cls.shed += 1
+                    raise Overloaded(route_class, cls.retry_after())
+                cls.queued += 1
+                expires = time.monotonic() + self.queue_timeout
+                try:
+                    while not self._has_room(cls, 1):
+                        remaining = expires - time.monotonic()
+                        if remaining <= 0:
+                            cls.shed += 1
+                            raise Overloaded(route_class, cls.retry_after())
+                        self.cond.wait(remaining)
+                finally:
+                    cls.queued -= 1
+            cls.in_flight += 1
+            cls.admitted += 1
+        return route_class, time.monotonic()
+
+    def release(self, ticket, congested=False):
+        """Give back the slot of an admitted request and feed its latency to the class limit"""
+        route_class, started = ticket
+        now = time.monotonic()
+        measured = route_class not in LLM_CLASSES or getattr(_request, "measured", False)
+        _request.measured = False
+        with self.cond:
+            cls = self.classes[route_class]
+            cls.in_flight -= 1
+            if route_class != CHEAP:
+                cls.observe(now - started if measured else None, congested, now)
+            self.cond.notify_all()
+
+    def stats(self):
+        with self.cond:
+            return {
+                "capacity": self.capacity,
+                "expensive_threads": self._expensive_threads(),
+                "classes": {name: cls.stats() for name, cls in self.classes.items()},
+            }
@@ -1,18 +1,38 @@
-import pdfplumber
 import os
 from dotenv import load_dotenv
-from groq import Groq
-import google.generativeai as genai
-from typing import List
 import json
-from pydantic import BaseModel
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, g
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import uuid
 import traceback
+import io
 import zipfile
-import tempfile
+import re
+import mimetypes
+import time
 from datetime import datetime
+from functools import lru_cache
+from werkzeug.utils import safe_join
+from llm_transport import create_transport, estimate_tokens, LLM_MODE
+from llm_scheduler import LLMScheduler, LLMQueueTimeout, BULK, INTERACTIVE
+from pdf_preflight import check_pdf, PreflightError, MAX_UPLOAD_BYTES
+from extract_pool import ExtractionPool, ExtractionError
+from upload_cache import UploadStore, fingerprint
+from resume_model import Candidate, dumps, load_candidate
+from resume_repair import repair_candidate, repair_section, section_schema
+from model_router import ModelRouter, resume_features, FAST, LARGE, TIERS, GROQ_LARGE_MODEL
+from near_duplicates import NearDuplicateIndex
+from request_deadline import (Deadline, RequestCancelled, DEADLINE, REQUEST_DEADLINE_UPLOAD,
+                              REQUEST_DEADLINE_MODIFY, REQUEST_DEADLINE_HEADER, counters as work_counters)
+from candidate_index import CandidateIndex, QueryError
+from site_renderer import precompile, render_fragment, render_page
+from font_builder import apply_fonts, replace_fonts, require_fonts
+from site_prebuild import Prebuilder, ENCODINGS, compress
+from site_storage import GENERATED_FOLDER, site_folder, new_site_folder, site_files
+from admission import AdmissionController, Overloaded, CHEAP, mark_measured
+from component_patch import (COMPONENT_EDIT_MODE, PATCH, FULL, PATCH_INSTRUCTIONS, PatchError, EditStats,
+                             annotate, apply_patch, parse_patch)
 
 load_dotenv()
 
@@ -20,199 +40,182 @@ load_dotenv()
 groq_api_key = os.getenv("GROQ_API_KEY")
 gemini_api_key = os.getenv("GEMINI_API_KEY")
 
-if not groq_api_key:
-    print("ERROR: GROQ_API_KEY not found!")
-if not gemini_api_key:
-    print("ERROR: GEMINI_API_KEY not found!")
-
-groq_client = Groq(api_key=groq_api_key)
-genai.configure(api_key=gemini_api_key)
-gemini_model = genai.GenerativeModel('gemini-pro')
-
-class Project(BaseModel):
-    project_name: str
-    about_project: str
-    skills_used: list[str]
-
-class Achivements(BaseModel):
-    Achivement_name: str
-    institute_name: str
-    about: str
-
-class Experience(BaseModel):
-    Position_name: str
-    Company_name: str
-    skills_used: list[str]
-
-class Education(BaseModel):
-    Institute_name: str
-    Degree_name: str
-    marks: str
-
-class Position_of_Responsibility(BaseModel):
-    Position_name: str
-    Society_name: str
-    Description: str
-
-class Candidate(BaseModel):
-    name: str
-    Education: List[Education]
-    Projects: List[Project]
-    Experience: List[Experience]
-    Achivements: List[Achivements]
-    Skills: List[str]
-    Position_of_Responsibility: List[Position_of_Responsibility]
-    Contact_Info: dict
-
-def get_all_info(info: str) -> Candidate:
-    try:
-        chat_completion = groq_client.chat.completions.create(
+if LLM_MODE != "replay":
+    if not groq_api_key:
+        print("ERROR: GROQ_API_KEY not found!")
+    if not gemini_api_key:
+        print("ERROR: GEMINI_API_KEY not found!")
+
+# Live, recording or replaying transport for every Groq/Gemini call
+llm = create_transport(groq_api_key=groq_api_key, gemini_api_key=gemini_api_key)
+
+# Every LLM call waits here: per-tenant fair queuing, interactive lane before bulk
+llm_scheduler = LLMScheduler()
+
+# Component edits ask for a compact patch first and fall back to regenerating the HTML
+edit_stats = EditStats()
+
+# Resume parsing starts on a fast model and escalates to the large one when its output fails checks
+model_router = ModelRouter()
+
+RESUME_PROMPT = (
+    "You are a resume parser that extracts information from resume.\n"
+    f" The JSON object must use the schema: {json.dumps(Candidate.model_json_schema(), indent=2)}"
+)
+
+def ask_groq(system_prompt, info, tenant, model=GROQ_LARGE_MODEL, deadline=None):
+    """One JSON-mode Groq call, admitted by the scheduler and abandoned if the request is cancelled"""
+    mark_measured()
+    with llm_scheduler.slot(tenant, BULK, cost=estimate_tokens(info), request_deadline=deadline):
+        chat = dict(
             messages=[
                 {
                     "role": "system",
-                    "content": "You are a resume parser that extracts information from resume.\n"
-                    f" The JSON object must use the schema: {json.dumps(Candidate.model_json_schema(), indent=2)}",
+                    "content": system_prompt,
                 },
                 {
                     "role": "user",
                     "content": f"use this {info}",
                 },
             ],
-            model="llama-3.3-70b-versatile",
+            model=model,
             temperature=0,
             stream=False,
             response_format={"type": "json_object"},
         )
-        return Candidate.model_validate_json(chat_completion.choices[0].message.content)
+        if deadline is None:
+            return llm.groq_chat(**chat)
+        return deadline.run("llm", llm.groq_chat, **chat)
+
+def reask_section(section, text, tenant, model=GROQ_LARGE_MODEL, deadline=None):
+    """Extract a single Candidate section from ``text``; returns (items, repairs, ok)"""
+    try:
+        section_content = ask_groq(
+            f"You are a resume parser. Extract only the {section} section of the resume.\n"
+            f" The JSON object must use the schema: {json.dumps(section_schema(section), indent=2)}",
+            text,
+            tenant,
+            model,
+            deadline,
+        )
+        return repair_section(section, section_content)
+    except (ValueError, TypeError) as e:
+        return [], [f"{section}: re-ask failed ({str(e)})"], False
+
+def reparse_changed(match, tenant, deadline=None):
+    """Update a near-duplicate's Candidate by re-extracting only the sections whose text changed"""
+    candidate, repairs, updates = match['candidate'], [], {}
+    for section in match['changed']:
+        text = match['sections'].get(section)
+        if text is None:
+            # The section was removed from the resume
+            updates[section] = []
+            continue
+        items, section_repairs, ok = reask_section(section, text, tenant, TIERS[FAST], deadline)
+        if not ok:
+            items, section_repairs, ok = reask_section(section, text, tenant, TIERS[LARGE], deadline)
+        repairs.extend(section_repairs)
+        if ok:
+            updates[section] = items
+        else:
+            repairs.append(f"{section}: re-extraction failed, kept previous")
+    return candidate.model_copy(update=updates), repairs
+
+def get_all_info(info: str, tenant: str = "anonymous", deadline=None) -> tuple[Candidate, list, dict]:
+    """Parse resume text into a Candidate; returns it with the repairs applied to the LLM output and the routing record"""
+    try:
+        started = time.perf_counter()
+        features = resume_features(info)
+        tier, reason = model_router.pick(features)
+        escalated, fast_latency = False, 0.0
+        
+        if tier == FAST:
+            try:
+                candidate, repairs, unrecoverable = repair_candidate(ask_groq(RESUME_PROMPT, info, tenant, TIERS[FAST], deadline))
+                failed = model_router.check(features, candidate, repairs, unrecoverable)
+            except (ValueError, TypeError) as e:
+                failed = f"invalid: {str(e)}"
+            if failed:
+                print(f"Escalating resume parse to {TIERS[LARGE]}: {failed}")
+                tier, reason, escalated = LARGE, failed, True
+                fast_latency = time.perf_counter() - started
+        
+        if tier == LARGE:
+            candidate, repairs, unrecoverable = repair_candidate(ask_groq(RESUME_PROMPT, info, tenant, TIERS[LARGE], deadline))
+        
+        # Re-ask only for the sections that could not be repaired, on the large model whichever tier parsed
+        for section in unrecoverable:
+            items, section_repairs, ok = reask_section(section, info, tenant, TIERS[LARGE], deadline)
+            repairs.extend(section_repairs)
+            repairs.append(f"{section}: re-asked, {'recovered' if ok else 'still unrecoverable, left empty'}")
+            if ok:
+                candidate = candidate.model_copy(update={section: items})
+        
+        if repairs:
+            print(f"Repaired resume JSON: {len(repairs)} fixes, re-asked {unrecoverable or 'nothing'}")
+        routing = model_router.record(tier, escalated, reason, time.perf_counter() - started, fast_latency)
+        return candidate, repairs, routing
     except Exception as e:
         print(f"Error in resume parsing: {str(e)}")
         raise e
 
-def generate_website_code(data, style="professional"):
-    """Generate complete website code based on parsed resume data and selected style"""
-    
-    templates = {
-        "professional": {
-            "colors": {
-                "primary": "#2563eb",
-                "secondary": "#64748b",
-                "accent": "#0f172a",
-                "background": "#ffffff",
-                "text": "#1e293b"
-            },
-            "fonts": "font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;",
-            "style_class": "professional"
+# Generated sites self-host their fonts; refuse to start without them rather than link a third party
+require_fonts()
+
+# PDF extraction runs in recycled worker processes so its memory never lands in the web worker
+extraction_pool = ExtractionPool()
+
+def extract_pdf_text(filepath, deadline=None):
+    """Extract the text layer of a PDF with the configured backend; returns (text, task stats)"""
+    return extraction_pool.extract(filepath, request_deadline=deadline)
+
+THEMES = {
+    "professional": {
+        "colors": {
+            "primary": "#2563eb",
+            "secondary": "#64748b",
+            "accent": "#0f172a",
+            "background": "#ffffff",
+            "text": "#1e293b"
         },
-        "futuristic": {
-            "colors": {
-                "primary": "#00d4ff",
-                "secondary": "#7c3aed",
-                "accent": "#ec4899",
-                "background": "#0f0f23",
-                "text": "#ffffff"
-            },
-            "fonts": "font-family: 'Orbitron', 'Courier New', monospace;",
-            "style_class": "futuristic"
+        "fonts": "font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;",
+        "style_class": "professional"
+    },
+    "futuristic": {
+        "colors": {
+            "primary": "#00d4ff",
+            "secondary": "#7c3aed",
+            "accent": "#ec4899",
+            "background": "#0f0f23",
+            "text": "#ffffff"
         },
-        "playful": {
-            "colors": {
-                "primary": "#f59e0b",
-                "secondary": "#ec4899",
-                "accent": "#10b981",
-                "background": "#fef3c7",
-                "text": "#374151"
-            },
-            "fonts": "font-family: 'Poppins', 'Comic Sans MS', cursive;",
-            "style_class": "playful"
-        }
+        "fonts": "font-family: 'Orbitron', 'Courier New', monospace;",
+        "style_class": "futuristic"
+    },
+    "playful": {
+        "colors": {
+            "primary": "#f59e0b",
+            "secondary": "#ec4899",
+            "accent": "#10b981",
+            "background": "#fef3c7",
+            "text": "#374151"
+        },
+        "fonts": "font-family: 'Poppins', 'Comic Sans MS', cursive;",
+        "style_class": "playful"
     }
+}
+
+def generate_website_code(candidate: Candidate, style="professional"):
+    """Generate complete website code based on parsed resume data and selected style"""
+    if style not in THEMES:
+        style = "professional"
+    theme = THEMES[style]
     
-    theme = templates.get(style, templates["professional"])
+    # Generate HTML from the theme's compiled templates
+    html_content = render_page(candidate, theme, style)
     
-    # Generate HTML
-    html_content = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{data['name']} - Portfolio</title>
-    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=Orbitron:wght@400;700;900&family=Poppins:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-    <link rel="stylesheet" href="styles.css">
-</head>
-<body class="{theme['style_class']}">
-    <div class="container">
-        <!-- Header Section -->
-        <header class="header" id="header">
-            <div class="profile-section">
-                <div class="profile-image">
-                    <div class="avatar">{data['name'][:2].upper()}</div>
-                </div>
-                <div class="profile-info">
-                    <h1 class="name">{data['name']}</h1>
-                    <p class="title">Software Developer</p>
-                </div>
-            </div>
-            <nav class="navigation">
-                <a href="#about" class="nav-link">About</a>
-                <a href="#experience" class="nav-link">Experience</a>
-                <a href="#projects" class="nav-link">Projects</a>
-                <a href="#skills" class="nav-link">Skills</a>
-                <a href="#contact" class="nav-link">Contact</a>
-            </nav>
-        </header>
-
-        <!-- About Section -->
-        <section class="section" id="about">
-            <h2 class="section-title">About Me</h2>
-            <div class="about-content">
-                <p class="about-text">Passionate developer with expertise in modern technologies and a strong foundation in software development.</p>
-            </div>
-        </section>
-
-        <!-- Experience Section -->
-        <section class="section" id="experience">
-            <h2 class="section-title">Experience</h2>
-            <div class="experience-grid">
-                {generate_experience_html(data.get('Experience', []))}
-            </div>
-        </section>
-
-        <!-- Projects Section -->
-        <section class="section" id="projects">
-            <h2 class="section-title">Projects</h2>
-            <div class="projects-grid">
-                {generate_projects_html(data.get('projects', []))}
-            </div>
-        </section>
-
-        <!-- Skills Section -->
-        <section class="section" id="skills">
-            <h2 class="section-title">Skills</h2>
-            <div class="skills-grid">
-                {generate_skills_html(data.get('skills', []))}
-            </div>
-        </section>
-
-        <!-- Education Section -->
-        <section class="section" id="education">
-            <h2 class="section-title">Education</h2>
-            <div class="education-grid">
-                {generate_education_html(data.get('education', []))}
-            </div>
-        </section>
-
-        <!-- Contact Section -->
-        <section class="section" id="contact">
-            <h2 class="section-title">Contact</h2>
-            <div class="contact-grid">
-                {generate_contact_html(data.get('Contact_Info', {}))}
-            </div>
-        </section>
-    </div>
-
-    <script src="script.js"></script>
-</body>
-</html>"""
+    # Self-host only the theme's fonts, subset to the glyphs on the page
+    html_content, font_files = apply_fonts(html_content, style)
 
     # Generate CSS
     css_content = generate_css_content(theme, style)
@@ -223,79 +226,24 @@ def generate_website_code(data, style="professional"):
     return {
         "html": html_content,
         "css": css_content,
-        "js": js_content
+        "js": js_content,
+        "fonts": font_files
     }
 
 def generate_experience_html(experiences):
-    if not experiences:
-        return "<p>No experience data available</p>"
-    
-    html = ""
-    for exp in experiences:
-        html += f"""
-        <div class="experience-card" data-component="experience-card">
-            <h3 class="company-name">{exp.get('Company', 'Unknown Company')}</h3>
-            <p class="position">{exp.get('Position', 'Unknown Position')}</p>
-            <div class="skills-used">
-                {', '.join(exp.get('Skills', []))}
-            </div>
-        </div>
-        """
-    return html
+    return render_fragment("experience", experiences)
 
 def generate_projects_html(projects):
-    if not projects:
-        return "<p>No projects data available</p>"
-    
-    html = ""
-    for project in projects:
-        html += f"""
-        <div class="project-card" data-component="project-card">
-            <h3 class="project-title">{project.get('title', 'Untitled Project')}</h3>
-            <p class="project-description">{project.get('desc', 'No description available')}</p>
-            <div class="tech-stack">
-                {', '.join(project.get('tech', []))}
-            </div>
-        </div>
-        """
-    return html
+    return render_fragment("projects", projects)
 
 def generate_skills_html(skills):
-    if not skills:
-        return "<p>No skills data available</p>"
-    
-    html = ""
-    for skill in skills:
-        html += f'<div class="skill-tag" data-component="skill-tag">{skill}</div>'
-    return html
+    return render_fragment("skills", skills)
 
 def generate_education_html(education):
-    if not education:
-        return "<p>No education data available</p>"
-    
-    html = ""
-    for edu in education:
-        html += f"""
-        <div class="education-card" data-component="education-card">
-            <h3 class="institute-name">{edu.get('Institute_name', 'Unknown Institute')}</h3>
-            <p class="degree">{edu.get('Degree_name', 'Unknown Degree')}</p>
-            <p class="marks">Marks: {edu.get('Marks', 'N/A')}</p>
-        </div>
-        """
-    return html
+    return render_fragment("education", education)
 
 def generate_contact_html(contact_info):
-    if not contact_info:
-        return "<p>No contact information available</p>"
-    
-    html = ""
-    for key, value in contact_info.items():
-        html += f"""
-        <div class="contact-item" data-component="contact-item">
-            <strong>{key}:</strong> {value}
-        </div>
-        """
-    return html
+    return render_fragment("contact", contact_info)
 
 def generate_css_content(theme, style):
     base_css = f"""
@@ -526,58 +474,63 @@ body {{
     return base_css
 
 def generate_js_content(style):
+    """Public runtime shipped with every site: one delegated listener, loaded with defer"""
     base_js = """
 // Smooth scrolling for navigation links
-document.querySelectorAll('.nav-link').forEach(link => {
-    link.addEventListener('click', function(e) {
+document.addEventListener('click', function(e) {
+    const link = e.target.closest('.nav-link');
+    if (!link) return;
+    const targetSection = document.querySelector(link.getAttribute('href'));
+    if (targetSection) {
         e.preventDefault();
-        const targetId = this.getAttribute('href');
-        const targetSection = document.querySelector(targetId);
-        if (targetSection) {
-            targetSection.scrollIntoView({
-                behavior: 'smooth',
-                block: 'start'
-            });
-        }
-    });
+        targetSection.scrollIntoView({
+            behavior: 'smooth',
+            block: 'start'
+        });
+    }
 });
+"""
 
+    return base_js
+
+def generate_editor_js():
+    """In-place Gemini editor, injected only into /preview pages and never published"""
+    editor_js = """
 // Component selection for Gemini editing
 let selectedComponent = null;
 
-document.querySelectorAll('[data-component]').forEach(component => {
-    component.addEventListener('click', function(e) {
-        e.stopPropagation();
-        
-        // Remove previous selection
-        if (selectedComponent) {
-            selectedComponent.classList.remove('selected-component');
-        }
-        
-        // Add selection to current component
-        this.classList.add('selected-component');
-        selectedComponent = this;
-        
-        // Show edit options
-        showEditOptions(this);
-    });
-});
-
-// Remove selection when clicking outside
-document.addEventListener('click', function() {
+document.addEventListener('click', function(e) {
+    const panel = e.target.closest('.edit-panel');
+    if (panel) {
+        const action = e.target.closest('[data-action]');
+        if (action && action.dataset.action === 'apply') applyGeminiEdit();
+        if (action && action.dataset.action === 'cancel') hideEditOptions();
+        return;
+    }
+    
+    // Remove previous selection
     if (selectedComponent) {
         selectedComponent.classList.remove('selected-component');
         selectedComponent = null;
+    }
+    
+    const component = e.target.closest('[data-component]');
+    if (!component) {
         hideEditOptions();
+        return;
     }
+    
+    // Add selection to current component
+    component.classList.add('selected-component');
+    selectedComponent = component;
+    
+    // Show edit options
+    showEditOptions(component);
 });
 
 function showEditOptions(component) {
     // Remove existing edit panel
-    const existingPanel = document.querySelector('.edit-panel');
-    if (existingPanel) {
-        existingPanel.remove();
-    }
+    hideEditOptions();
     
     // Create edit panel
     const editPanel = document.createElement('div');
@@ -587,8 +540,8 @@ function showEditOptions(component) {
             <h3>Edit Component</h3>
             <textarea id="edit-instructions" placeholder="Describe how you want to modify this component..."></textarea>
             <div class="edit-buttons">
-                <button onclick="applyGeminiEdit()">Apply Changes</button>
-                <button onclick="hideEditOptions()">Cancel</button>
+                <button data-action="apply">Apply Changes</button>
+                <button data-action="cancel">Cancel</button>
             </div>
         </div>
     `;
@@ -616,13 +569,15 @@ async function applyGeminiEdit() {
             body: JSON.stringify({
                 component_html: selectedComponent.outerHTML,
                 instructions: instructions,
-                component_type: selectedComponent.dataset.component
+                component_type: selectedComponent.dataset.component,
+                website_id: location.pathname.split('/')[2]
             })
         });
         
         const result = await response.json();
         if (result.success) {
             selectedComponent.outerHTML = result.modified_html;
+            selectedComponent = null;
             hideEditOptions();
             
             // Show success message
@@ -731,28 +686,298 @@ styleSheet.textContent = editStyles;
 document.head.appendChild(styleSheet);
 """
 
-    return base_js
+    return editor_js
+
+def write_site(website_folder, website_code):
+    """Write the generated files of a website into its folder"""
+    with open(os.path.join(website_folder, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(website_code['html'])
+    
+    with open(os.path.join(website_folder, 'styles.css'), 'w', encoding='utf-8') as f:
+        f.write(website_code['css'])
+    
+    with open(os.path.join(website_folder, 'script.js'), 'w', encoding='utf-8') as f:
+        f.write(website_code['js'])
+    
+    for relative_path, payload in website_code.get('fonts', {}).items():
+        font_path = os.path.join(website_folder, relative_path)
+        os.makedirs(os.path.dirname(font_path), exist_ok=True)
+        with open(font_path, 'wb') as f:
+            f.write(payload)
+
+def build_zip(website_folder, zip_path):
+    """Package the files of a generated website into a zip archive"""
+    with zipfile.ZipFile(zip_path, 'w') as zipf:
+        for file_name in site_files(website_folder):
+            zipf.write(os.path.join(website_folder, file_name), file_name)
+    return zip_path
 
 app = Flask(__name__)
 CORS(app)
 
+# Compile every theme's templates once at startup (bytecode is cached on disk)
+precompile(THEMES)
+
+# Served to previews only; published sites get the public runtime alone
+EDITOR_JS = generate_editor_js()
+EDITOR_SCRIPT_TAG = '<script src="/editor.js" defer></script>'
+
 # Create directories
 UPLOAD_FOLDER = 'uploads'
-GENERATED_FOLDER = 'generated_websites'
 for folder in [UPLOAD_FOLDER, GENERATED_FOLDER]:
     if not os.path.exists(folder):
         os.makedirs(folder)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['GENERATED_FOLDER'] = GENERATED_FOLDER
+# Werkzeug rejects larger request bodies with 413 before they are read
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 ALLOWED_EXTENSIONS = {'pdf'}
 
+# Hand stored files to the fronting proxy (nginx X-Accel-Redirect to an internal location
+# aliasing GENERATED_FOLDER, or X-Sendfile) instead of serving them from this process
+SITE_ACCEL_PREFIX = os.getenv('SITE_ACCEL_PREFIX')
+SITE_ACCEL_HEADER = os.getenv('SITE_ACCEL_HEADER', 'X-Accel-Redirect')
+PREVIEW_FILE = 'preview.html'
+
+# Parsed results of recent uploads, keyed by the SHA-256 of the PDF bytes
+upload_store = UploadStore()
+
+# Compressed assets, zips and other-theme renders built right after generation
+prebuilder = Prebuilder()
+
+# Every parsed resume, searchable by skill, company, institute and position
+candidate_index = CandidateIndex()
+
+# Slight variants of a recently parsed resume reuse its Candidate and re-extract only what changed
+near_duplicates = NearDuplicateIndex()
+
+# Sheds expensive requests early under overload so health, preview and download keep threads
+admission = AdmissionController()
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def json_response(payload, status=200):
+    """JSON response serialized with the fast encoder used for the resume model"""
+    return Response(dumps(payload), status=status, mimetype='application/json')
+
+def cache_opted_out():
+    """Whether the client asked to bypass the upload dedup store"""
+    if request.form.get('no_cache', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'no-cache' in request.headers.get('Cache-Control', '').lower()
+
+def tenant_id():
+    """Tenant used for fair LLM scheduling: client id, else hashed API key, else client address"""
+    client_id = request.headers.get('X-Client-Id')
+    if client_id:
+        return client_id
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        return 'key:' + fingerprint(api_key.encode('utf-8'))[:12]
+    return 'ip:' + (request.remote_addr or 'unknown')
+
+RESTYLE_MANIFEST = 'restyle.json'
+BODY_CLASS = re.compile(r'<body class="[^"]*"')
+
+def restyle_manifest(folder):
+    """Base site and style of a restyled version, or None for a site rendered from a resume"""
+    manifest_path = os.path.join(folder, RESTYLE_MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def site_source(website_id):
+    """Folder with the stored files of a site, or None when there is no such site.
+
+    Restyled versions created before their files were stored get them written here, once.
+    """
+    folder = site_folder(website_id, app.config['GENERATED_FOLDER'])
+    if folder is None:
+        return None
+    if not os.path.exists(os.path.join(folder, 'index.html')):
+        manifest = restyle_manifest(folder)
+        if manifest:
+            store_restyled_files(folder, site_folder(manifest['base_website_id'], app.config['GENERATED_FOLDER']),
+                                 manifest['style'])
+    return folder
+
+@lru_cache(maxsize=None)
+def theme_stylesheet(style):
+    """A theme's styles.css does not depend on the resume, so it is built once per process"""
+    return generate_css_content(THEMES[style], style).encode('utf-8')
+
+def restyled_files(base_folder, style):
+    """Files of a restyled version: the base site's HTML with another body class, fonts and stylesheet"""
+    with open(os.path.join(base_folder, 'index.html'), 'r', encoding='utf-8') as f:
+        html = f.read()
+    with open(os.path.join(base_folder, 'script.js'), 'rb') as f:
+        script = f.read()
+    html = BODY_CLASS.sub(f'<body class="{THEMES[style]["style_class"]}"', html, count=1)
+    html, fonts = replace_fonts(html, style)
+    files = {'styles.css': theme_stylesheet(style), 'script.js': script}
+    files.update(fonts)
+    files['index.html'] = html.encode('utf-8')
+    return files
+
+def store_restyled_files(folder, base_folder, style):
+    """Write a restyled version's files into its folder, index.html last, so it is served like any site"""
+    for file_name, payload in restyled_files(base_folder, style).items():
+        path = os.path.join(folder, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(payload)
+        os.replace(temporary, path)
+
+def list_site_files(website_id):
+    return site_files(site_source(website_id))
+
+def read_site_file(website_id, file_name):
+    """Bytes of one file of a site, or None if there is no such file"""
+    folder = site_source(website_id)
+    if folder is None:
+        return None
+    path = safe_join(folder, file_name)
+    if path is None or not os.path.isfile(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+def read_preview_html(website_id):
+    """index.html with the editor bundle injected; the stored site stays editor-free"""
+    html = read_site_file(website_id, 'index.html').decode('utf-8')
+    return html.replace('</body>', f'    {EDITOR_SCRIPT_TAG}\n</body>', 1)
+
+def stored_preview(website_id):
+    """Folder holding the site's preview.html, written on first use; None when there is no such site"""
+    folder = site_source(website_id)
+    if folder is None:
+        return None
+    if not os.path.exists(os.path.join(folder, PREVIEW_FILE)):
+        temporary = os.path.join(folder, f'.{PREVIEW_FILE}.{uuid.uuid4().hex}')
+        with open(temporary, 'w', encoding='utf-8') as f:
+            f.write(read_preview_html(website_id))
+        os.replace(temporary, os.path.join(folder, PREVIEW_FILE))
+    return folder
+
+def site_file_response(folder, file_name):
+    """Serve a stored file without reading it here: proxy hand-off when configured, else sendfile"""
+    path = safe_join(folder, file_name)
+    if path is None or not os.path.isfile(path):
+        return "Not found", 404
+    # Flask resolves relative paths against the app's root_path, not the working directory the
+    # rest of the storage code uses
+    path = os.path.abspath(path)
+    mimetype = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+    if SITE_ACCEL_PREFIX:
+        response = Response(mimetype=mimetype)
+        if SITE_ACCEL_HEADER.lower() == 'x-sendfile':
+            response.headers[SITE_ACCEL_HEADER] = path
+        else:
+            relative = os.path.relpath(path, os.path.abspath(app.config['GENERATED_FOLDER'])).replace(os.sep, '/')
+            response.headers[SITE_ACCEL_HEADER] = f"{SITE_ACCEL_PREFIX.rstrip('/')}/{relative}"
+        return response
+    # Uses the server's wsgi.file_wrapper, which gunicorn and most servers back with sendfile(2)
+    return send_file(path, mimetype=mimetype, conditional=True, max_age=0)
+
+def zip_bytes(website_id):
+    return build_zip(site_source(website_id), io.BytesIO()).getvalue()
+
+def compress_asset(website_id, file_name, encoding):
+    if file_name == 'index.html':
+        payload = read_preview_html(website_id).encode('utf-8')
+    else:
+        payload = read_site_file(website_id, file_name)
+    return compress(payload, encoding)
+
+def candidate_key(candidate):
+    return fingerprint(dumps(candidate))
+
+def prebuild_site(website_id, candidate=None, style=None):
+    """Queue the artifacts a new site will likely need: compressed assets, the zip, other themes"""
+    jobs = []
+    for file_name in list_site_files(website_id):
+        if file_name.endswith(('.html', '.css', '.js')):
+            for encoding in ENCODINGS:
+                jobs.append(((website_id, f'{encoding}:{file_name}'),
+                             lambda f=file_name, e=encoding: compress_asset(website_id, f, e)))
+    jobs.append(((website_id, 'zip'), lambda: zip_bytes(website_id)))
+    if candidate is not None:
+        key = candidate_key(candidate)
+        for other in THEMES:
+            if other != style:
+                jobs.append(((key, f'theme:{other}'), lambda o=other: generate_website_code(candidate, o)))
+    prebuilder.schedule(website_id, jobs)
+
+def precompressed_response(website_id, file_name, body=None):
+    """Serve a prebuilt gzip/brotli variant the client accepts, else ``body`` (or None)"""
+    mimetype = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+    for encoding in ENCODINGS:
+        if encoding in request.accept_encodings:
+            payload = prebuilder.get((website_id, f'{encoding}:{file_name}'))
+            if payload is not None:
+                response = Response(payload, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                response.headers['Vary'] = 'Accept-Encoding'
+                return response
+    return None if body is None else Response(body, mimetype=mimetype)
+
+def cancelled_response(e):
+    """504 when the deadline passed; 499 (nobody is listening) when the client went away"""
+    print(f"Request cancelled: {str(e)}")
+    # Only a timeout on the server's own deadline says the server is slow
+    g.admission_congested = e.reason == DEADLINE and REQUEST_DEADLINE_HEADER not in request.headers
+    return jsonify({'error': str(e)}), 504 if e.reason == DEADLINE else 499
+
+def overloaded_response(e):
+    response = jsonify({'error': str(e), 'route_class': e.route_class})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
+
+@app.before_request
+def admit_request():
+    route_class = CHEAP if request.method == 'OPTIONS' else admission.route_class(request.endpoint)
+    try:
+        g.admission_ticket = admission.admit(route_class)
+    except Overloaded as e:
+        print(f"Shedding request: {str(e)}")
+        return overloaded_response(e)
+
+@app.teardown_request
+def release_admission(error=None):
+    ticket = g.pop('admission_ticket', None)
+    if ticket is not None:
+        admission.release(ticket, congested=g.pop('admission_congested', False))
+
+def queue_timeout_response(e):
+    g.admission_congested = True
+    response = jsonify({'error': str(e)})
+    response.headers['Retry-After'] = '5'
+    return response, 503
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({'error': f'Upload too large: the limit is {MAX_UPLOAD_BYTES} bytes'}), 413
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'message': 'Resume parser is running'})
+    return jsonify({
+        'status': 'healthy',
+        'message': 'Resume parser is running',
+        'upload_cache': upload_store.stats(),
+        'near_duplicates': near_duplicates.stats(),
+        'extraction_pool': extraction_pool.stats(),
+        'cancellations': work_counters.stats(),
+        'llm_scheduler': llm_scheduler.stats(),
+        'model_router': model_router.stats(),
+        'admission': admission.stats(),
+        'component_edits': edit_stats.stats(),
+        'prebuild': prebuilder.stats(),
+        'search': candidate_index.stats()
+    })
 
 @app.route('/', methods=['POST'])
 def upload_pdf():
@@ -764,38 +989,77 @@ def upload_pdf():
         if file.filename == '' or not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file'}), 400
 
+        deadline = Deadline.from_request(request, REQUEST_DEADLINE_UPLOAD)
+
+        # Short-circuit repeat uploads of the exact same file
+        payload = file.read()
+        upload_id = fingerprint(payload)
+        use_cache = not cache_opted_out()
+        cached = upload_store.get(upload_id) if use_cache else None
+        if cached:
+            return json_response({
+                'success': True,
+                'data': cached['candidate'],
+                'upload_id': upload_id,
+                'website_ids': cached['website_ids'],
+                'cached': True,
+                'message': 'Resume parsed successfully'
+            })
+
         # Save and process file
         unique_filename = f"{uuid.uuid4()}_{file.filename}"
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
         
         try:
-            file.save(filepath)
+            with open(filepath, 'wb') as f:
+                f.write(payload)
+            
+            # Reject oversized, malformed, encrypted or image-only PDFs before parsing
+            try:
+                check_pdf(filepath)
+            except PreflightError as e:
+                return jsonify({'error': str(e)}), e.status
             
             # Extract text from PDF
-            with pdfplumber.open(filepath) as pdf:
-                content = pdf.pages[0].extract_text()
+            try:
+                content, extraction = extract_pdf_text(filepath, deadline)
+            except ExtractionError as e:
+                return jsonify({'error': str(e)}), e.status
             
             if not content:
                 return jsonify({'error': 'Could not extract text from PDF'}), 400
             
-            # Parse with GROQ
-            info = get_all_info(content)
+            # Reuse the parse of a near-duplicate resume, else parse with GROQ
+            match = near_duplicates.find(content) if use_cache else None
+            if match:
+                info, repairs = reparse_changed(match, tenant_id(), deadline)
+                routing = None
+                near_duplicate = {
+                    'upload_id': match['key'],
+                    'similarity': match['similarity'],
+                    'reextracted': match['changed'],
+                    'header_updated': match['header'],
+                }
+            else:
+                info, repairs, routing = get_all_info(content, tenant_id(), deadline)
+                near_duplicate = None
+            if use_cache:
+                upload_store.put(upload_id, content, info)
+                near_duplicates.add(upload_id, content, info)
+            try:
+                candidate_index.add(info, upload_id)
+            except Exception as e:
+                print(f"Error indexing candidate: {str(e)}")
             
-            # Convert to dict for website generation
-            data = {
-                "name": info.name,
-                "education": [{"Institute_name": edu.Institute_name, "Degree_name": edu.Degree_name, "Marks": edu.marks} for edu in info.Education],
-                "Contact_Info": info.Contact_Info,
-                "skills": info.Skills,
-                "projects": [{"title": p.project_name, "desc": p.about_project, "tech": p.skills_used} for p in info.Projects],
-                "Experience": [{"Company": exp.Company_name, "Position": exp.Position_name, "Skills": exp.skills_used} for exp in info.Experience],
-                "Achievements": [{"achievement_name": a.Achivement_name, "institute_name": a.institute_name, "description": a.about} for a in info.Achivements],
-                "Position_of_responsibility": [{"position_name": p.Position_name, "soc_name": p.Society_name, "description": p.Description} for p in info.Position_of_Responsibility]
-            }
-            
-            return jsonify({
+            return json_response({
                 'success': True,
-                'data': data,
+                'data': info,
+                'upload_id': upload_id,
+                'cached': False,
+                'repairs': repairs,
+                'routing': routing,
+                'near_duplicate': near_duplicate,
+                'extraction': extraction,
                 'message': 'Resume parsed successfully'
             })
             
@@ -803,10 +1067,42 @@ def upload_pdf():
             if os.path.exists(filepath):
                 os.remove(filepath)
                 
+    except RequestEntityTooLarge:
+        raise
+    except LLMQueueTimeout as e:
+        return queue_timeout_response(e)
+    except RequestCancelled as e:
+        return cancelled_response(e)
     except Exception as e:
         print(f"Error: {str(e)}")
         return jsonify({'error': f'Failed to process resume: {str(e)}'}), 500
 
+@app.route('/search', methods=['GET'])
+def search_candidates():
+    """Boolean or ranked search over every parsed resume"""
+    query = request.args.get('q', '')
+    mode = request.args.get('mode', 'boolean')
+    try:
+        limit = min(int(request.args.get('limit', 20)), 100)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    
+    started = datetime.now()
+    try:
+        found = candidate_index.search(query, mode=mode, limit=limit, offset=offset)
+    except QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return json_response({
+        'success': True,
+        'query': query,
+        'mode': mode,
+        'total': found['total'],
+        'results': found['results'],
+        'took_ms': round((datetime.now() - started).total_seconds() * 1000, 2)
+    })
+
 @app.route('/generate-website', methods=['POST'])
 def generate_website():
     try:
@@ -817,28 +1113,29 @@ def generate_website():
         if not resume_data:
             return jsonify({'error': 'No resume data provided'}), 400
         
-        # Generate website code
-        website_code = generate_website_code(resume_data, style)
+        # Validate once, then render straight from the model
+        candidate = load_candidate(resume_data)
+        website_code = prebuilder.get((candidate_key(candidate), f'theme:{style}'))
+        if website_code is None:
+            website_code = generate_website_code(candidate, style)
         
         # Create unique folder for this website
         website_id = str(uuid.uuid4())
-        website_folder = os.path.join(app.config['GENERATED_FOLDER'], website_id)
-        os.makedirs(website_folder)
+        website_folder = new_site_folder(website_id, app.config['GENERATED_FOLDER'])
         
         # Save files
-        with open(os.path.join(website_folder, 'index.html'), 'w', encoding='utf-8') as f:
-            f.write(website_code['html'])
+        write_site(website_folder, website_code)
+        prebuild_site(website_id, candidate, style)
         
-        with open(os.path.join(website_folder, 'styles.css'), 'w', encoding='utf-8') as f:
-            f.write(website_code['css'])
-        
-        with open(os.path.join(website_folder, 'script.js'), 'w', encoding='utf-8') as f:
-            f.write(website_code['js'])
+        # Link the site to its upload so repeat uploads can offer it
+        upload_id = request_data.get('upload_id')
+        if upload_id:
+            upload_store.add_website(upload_id, website_id)
         
         return jsonify({
             'success': True,
             'website_id': website_id,
-            'preview_url': f'/preview/{website_id}',
+            'preview_url': f'/preview/{website_id}/',
             'download_url': f'/download/{website_id}'
         })
         
@@ -846,9 +1143,97 @@ def generate_website():
         print(f"Error generating website: {str(e)}")
         return jsonify({'error': f'Failed to generate website: {str(e)}'}), 500
 
+@app.route('/restyle-website', methods=['POST'])
+def restyle_website():
+    """New version of an existing site in another theme, reusing its stored HTML"""
+    try:
+        request_data = request.get_json()
+        website_id = request_data.get('website_id', '')
+        style = request_data.get('style')
+        
+        if style not in THEMES:
+            return jsonify({'error': f'Unknown style: {style}'}), 400
+        try:
+            uuid.UUID(website_id)
+        except ValueError:
+            return jsonify({'error': 'Invalid website id'}), 400
+        if site_folder(website_id, app.config['GENERATED_FOLDER']) is None:
+            return jsonify({'error': 'Website not found'}), 404
+        
+        # Nothing is re-rendered: the version is the base site's HTML with the new theme's body
+        # class, fonts and stylesheet, written once and then served like any site
+        manifest = restyle_manifest(site_source(website_id))
+        base_website_id = manifest['base_website_id'] if manifest else website_id
+        base_folder = site_folder(base_website_id, app.config['GENERATED_FOLDER'])
+        new_website_id = str(uuid.uuid4())
+        version_folder = new_site_folder(new_website_id, app.config['GENERATED_FOLDER'])
+        with open(os.path.join(version_folder, RESTYLE_MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump({'base_website_id': base_website_id, 'style': style,
+                       'created': datetime.now().isoformat()}, f)
+        store_restyled_files(version_folder, base_folder, style)
+        
+        prebuild_site(new_website_id)
+        
+        return jsonify({
+            'success': True,
+            'website_id': new_website_id,
+            'base_website_id': base_website_id,
+            'style': style,
+            'preview_url': f'/preview/{new_website_id}/',
+            'download_url': f'/download/{new_website_id}'
+        })
+        
+    except Exception as e:
+        print(f"Error restyling website: {str(e)}")
+        return jsonify({'error': f'Failed to restyle website: {str(e)}'}), 500
+
+def strip_code_fence(text, language):
+    """Model output without a surrounding markdown code fence"""
+    text = text.strip()
+    if text.startswith('```'):
+        text = text[3:]
+        if text.startswith(language):
+            text = text[len(language):]
+    if text.endswith('```'):
+        text = text[:-3]
+    return text.strip()
+
+def patch_component(component_html, instructions, component_type, deadline):
+    """Ask Gemini for a patch and apply it; returns (html, reply, op count, fallback reason)"""
+    try:
+        numbered = annotate(component_html)
+    except PatchError:
+        return None, '', 0, 'unparseable_component'
+    prompt = f"""
+        You are a web developer editing an HTML component based on user instructions.
+        
+        Current HTML component:
+        {numbered}
+        
+        Component type: {component_type}
+        
+        User instructions: {instructions}
+        
+        {PATCH_INSTRUCTIONS}
+        """
+    mark_measured()
+    with llm_scheduler.slot(tenant_id(), INTERACTIVE, cost=estimate_tokens(prompt), request_deadline=deadline):
+        reply = deadline.run("llm", llm.gemini_generate, prompt)
+    try:
+        patch = parse_patch(reply)
+        if patch.get('rewrite'):
+            return None, reply, 0, 'rewrite_requested'
+        if not patch['ops']:
+            return None, reply, 0, 'empty_patch'
+        return apply_patch(component_html, patch), reply, len(patch['ops']), None
+    except PatchError as e:
+        print(f"Component patch rejected, regenerating full HTML: {e}")
+        return None, reply, 0, 'invalid_patch'
+
 @app.route('/modify-component', methods=['POST'])
 def modify_component():
     try:
+        deadline = Deadline.from_request(request, REQUEST_DEADLINE_MODIFY)
         request_data = request.get_json()
         component_html = request_data.get('component_html')
         instructions = request_data.get('instructions')
@@ -857,6 +1242,27 @@ def modify_component():
         if not all([component_html, instructions, component_type]):
             return jsonify({'error': 'Missing required data'}), 400
         
+        # The site is changing: stop prebuilding it and drop its warm artifacts
+        website_id = request_data.get('website_id')
+        if website_id:
+            prebuilder.invalidate(website_id)
+        
+        mode = request_data.get('edit_mode', COMPONENT_EDIT_MODE)
+        if mode not in (PATCH, FULL):
+            return jsonify({'error': f'edit_mode must be {PATCH} or {FULL}'}), 400
+        
+        fallback = None
+        if mode == PATCH:
+            modified_html, reply, ops, fallback = patch_component(component_html, instructions, component_type, deadline)
+            if modified_html is not None:
+                edit_stats.record(PATCH, component_html, len(reply))
+                return jsonify({
+                    'success': True,
+                    'modified_html': modified_html,
+                    'edit_mode': PATCH,
+                    'patch_ops': ops
+                })
+        
         # Use Gemini to modify the component
         prompt = f"""
         You are a web developer. I have an HTML component that I want to modify based on user instructions.
@@ -871,57 +1277,68 @@ def modify_component():
         Please provide the modified HTML component that follows the user's instructions while maintaining the same structure and CSS classes. Only return the HTML code, no explanations.
         """
         
-        response = gemini_model.generate_content(prompt)
-        modified_html = response.text.strip()
-        
-        # Clean up the response (remove markdown formatting if present)
-        if modified_html.startswith('\`\`\`html'):
-            modified_html = modified_html[7:]
-        if modified_html.endswith('\`\`\`'):
-            modified_html = modified_html[:-3]
+        mark_measured()
+        with llm_scheduler.slot(tenant_id(), INTERACTIVE, cost=estimate_tokens(prompt), request_deadline=deadline):
+            reply = deadline.run("llm", llm.gemini_generate, prompt)
+        edit_stats.record(FULL, component_html, len(reply), fallback)
         
         return jsonify({
             'success': True,
-            'modified_html': modified_html.strip()
+            'modified_html': strip_code_fence(reply, 'html'),
+            'edit_mode': FULL,
+            'patch_fallback': fallback
         })
         
+    except LLMQueueTimeout as e:
+        return queue_timeout_response(e)
+    except RequestCancelled as e:
+        return cancelled_response(e)
     except Exception as e:
         print(f"Error modifying component: {str(e)}")
         return jsonify({'error': f'Failed to modify component: {str(e)}'}), 500
 
-@app.route('/preview/<website_id>')
+@app.route('/preview/<website_id>/')
 def preview_website(website_id):
     try:
-        website_folder = os.path.join(app.config['GENERATED_FOLDER'], website_id)
-        index_path = os.path.join(website_folder, 'index.html')
-        
-        if not os.path.exists(index_path):
+        if site_folder(website_id, app.config['GENERATED_FOLDER']) is None:
             return "Website not found", 404
         
-        with open(index_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        response = precompressed_response(website_id, 'index.html')
+        if response is not None:
+            return response
+        return site_file_response(stored_preview(website_id), PREVIEW_FILE)
             
     except Exception as e:
         return f"Error loading preview: {str(e)}", 500
 
+@app.route('/editor.js')
+def editor_script():
+    return Response(EDITOR_JS, mimetype='application/javascript')
+
+@app.route('/preview/<website_id>/<path:filename>')
+def preview_asset(website_id, filename):
+    """Serve the stylesheet, script and fonts referenced by a preview"""
+    response = precompressed_response(website_id, filename)
+    if response is not None:
+        return response
+    folder = site_source(website_id)
+    if folder is None:
+        return "Not found", 404
+    return site_file_response(folder, filename)
+
 @app.route('/download/<website_id>')
 def download_website(website_id):
     try:
-        website_folder = os.path.join(app.config['GENERATED_FOLDER'], website_id)
-        
-        if not os.path.exists(website_folder):
+        if site_folder(website_id, app.config['GENERATED_FOLDER']) is None:
             return jsonify({'error': 'Website not found'}), 404
         
-        # Create zip file
-        zip_path = os.path.join(tempfile.gettempdir(), f'portfolio_{website_id}.zip')
-        
-        with zipfile.ZipFile(zip_path, 'w') as zipf:
-            for file_name in ['index.html', 'styles.css', 'script.js']:
-                file_path = os.path.join(website_folder, file_name)
-                if os.path.exists(file_path):
-                    zipf.write(file_path, file_name)
+        # Serve the archive built in the background when it is ready, else build it now
+        archive = prebuilder.get((website_id, 'zip'))
+        if archive is None:
+            archive = zip_bytes(website_id)
         
-        return send_file(zip_path, as_attachment=True, download_name=f'portfolio_website.zip')
+        return send_file(io.BytesIO(archive), mimetype='application/zip', as_attachment=True,
+                         download_name='portfolio_website.zip')
         
     except Exception as e:
         return jsonify({'error': f'Failed to create download: {str(e)}'}), 500
@@ -930,4 +1347,5 @@ if __name__ == '__main__':
     print("Starting Portfolio Generator Server...")
     print(f"GROQ API configured: {'Yes' if groq_api_key else 'No'}")
     print(f"Gemini API configured: {'Yes' if gemini_api_key else 'No'}")
+    print(f"LLM transport: {llm.mode}")
     app.run(debug=True, host='0.0.0.0', port=5000)
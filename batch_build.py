@@ -0,0 +1,253 @@
+"""Offline batch build: a directory of resume PDFs -> portfolio sites, without HTTP.
+
+Runs the same pipeline as ``POST /`` and ``/generate-website`` by calling
+app.py directly: extraction in the isolated worker pool (``extract_pool``),
+``get_all_info`` for parsing and ``generate_website_code`` for the chosen
+style. Extraction runs on ``--workers`` processes, and at most
+``--llm-concurrency`` resumes are parsed at once.
+
+Everything goes to the output directory::
+
+    <out>/sites/<style>/<name>/  index.html, styles.css, script.js, fonts/
+    <out>/zips/<style>/<name>.zip  with --zip
+    <out>/parsed/<name>.json     the parsed Candidate, reused when only the style changes
+    <out>/manifest.jsonl         one checkpoint line per finished PDF
+    <out>/report.json            throughput, stage timings and errors
+
+A re-run skips every PDF already built with the same content and style, so an
+interrupted batch resumes where it stopped; ``--retry-failed`` also retries
+the PDFs that failed.
+
+    python batch_build.py resumes/ --out build/ --style futuristic --workers 4 --llm-concurrency 4
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+MANIFEST = "manifest.jsonl"
+REPORT = "report.json"
+STAGES = ("extract", "parse", "render")
+
+# Finished PDFs between two progress lines
+PROGRESS_EVERY = 25
+
+_SLUG = re.compile(r"[^a-z0-9]+")
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def site_name(path, digest):
+    stem = _SLUG.sub("-", os.path.splitext(os.path.basename(path))[0].lower()).strip("-") or "resume"
+    return f"{stem[:48]}-{digest[:8]}"
+
+
+def load_manifest(out_dir):
+    """Latest checkpoint per (PDF content hash, style)"""
+    entries = {}
+    path = os.path.join(out_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by an interrupted run
+                    continue
+                entries[entry["sha256"], entry["style"]] = entry
+    return entries
+
+
+class BatchBuilder:
+    def __init__(self, app, out_dir, style, llm_concurrency, make_zip=False):
+        self.app = app
+        self.out_dir = out_dir
+        self.style = style
+        self.make_zip = make_zip
+        self.llm_gate = threading.BoundedSemaphore(max(1, llm_concurrency))
+        self.manifest_lock = threading.Lock()
+        self.manifest = open(os.path.join(out_dir, MANIFEST), "a", encoding="utf-8")
+        for folder in ("parsed", os.path.join("sites", style), os.path.join("zips", style) if make_zip else None):
+            if folder:
+                os.makedirs(os.path.join(out_dir, folder), exist_ok=True)
+
+    def build(self, path, digest):
+        """Extract, parse and render one PDF; returns its checkpoint entry"""
+        app = self.app
+        name = site_name(path, digest)
+        entry = {"file": path, "sha256": digest, "name": name, "style": self.style, "timings": {}}
+        stage = "extract"
+        try:
+            parsed_path = os.path.join(self.out_dir, "parsed", f"{name}.json")
+            if os.path.exists(parsed_path):
+                # Parsed by an earlier run with another style
+                with open(parsed_path, "rb") as f:
+                    candidate = app.load_candidate(json.loads(f.read()))
+                entry["reused_parse"] = True
+            else:
+                started = time.perf_counter()
+                text, _ = app.extract_pdf_text(path)
+                entry["timings"]["extract"] = round(time.perf_counter() - started, 3)
+                if not text:
+                    raise ValueError("Could not extract text from PDF")
+
+                stage = "parse"
+                with self.llm_gate:
+                    started = time.perf_counter()
+                    candidate, repairs, routing = app.get_all_info(text, "batch")
+                    entry["timings"]["parse"] = round(time.perf_counter() - started, 3)
+                entry["repairs"] = len(repairs)
+                entry["tier"] = routing["tier"]
+                with open(parsed_path, "wb") as f:
+                    f.write(app.dumps(candidate))
+
+            stage = "render"
+            started = time.perf_counter()
+            folder = os.path.join(self.out_dir, "sites", self.style, name)
+            os.makedirs(folder, exist_ok=True)
+            app.write_site(folder, app.generate_website_code(candidate, self.style))
+            if self.make_zip:
+                app.build_zip(folder, os.path.join(self.out_dir, "zips", self.style, f"{name}.zip"))
+            entry["timings"]["render"] = round(time.perf_counter() - started, 3)
+            entry["status"] = "ok"
+        except Exception as e:
+            entry["status"] = "failed"
+            entry["stage"] = stage
+            entry["error"] = str(e)
+        self.checkpoint(entry)
+        return entry
+
+    def checkpoint(self, entry):
+        with self.manifest_lock:
+            self.manifest.write(json.dumps(entry) + "\n")
+            self.manifest.flush()
+
+    def close(self):
+        self.manifest.close()
+
+
+def fingerprint_file(path):
+    from upload_cache import fingerprint
+    with open(path, "rb") as f:
+        return fingerprint(f.read())
+
+
+def summarize(entries, skipped, seconds, app):
+    ok = [e for e in entries if e["status"] == "ok"]
+    failed = [e for e in entries if e["status"] == "failed"]
+    stages = {}
+    for stage in STAGES:
+        values = [e["timings"][stage] for e in entries if stage in e["timings"]]
+        stages[stage] = {
+            "count": len(values),
+            "p50_s": percentile(values, 50),
+            "p95_s": percentile(values, 95),
+            "total_s": round(sum(values), 2),
+        }
+    return {
+        "processed": len(entries),
+        "built": len(ok),
+        "failed": len(failed),
+        "skipped": skipped,
+        "seconds": round(seconds, 2),
+        "throughput_per_min": round(len(ok) / seconds * 60, 2) if seconds else None,
+        "stages": stages,
+        "errors_by_stage": dict(Counter(e["stage"] for e in failed)),
+        "top_errors": Counter(e["error"] for e in failed).most_common(10),
+        "failed_files": [e["file"] for e in failed],
+        "model_router": app.model_router.stats(),
+        "extraction_pool": app.extraction_pool.stats(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build portfolio sites for a directory of resume PDFs")
+    parser.add_argument("input", help="directory of PDFs (searched recursively)")
+    parser.add_argument("--out", default="batch_output", help="output directory")
+    parser.add_argument("--style", default="professional")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="extraction processes")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="resumes parsed at once")
+    parser.add_argument("--zip", action="store_true", help="also write a zip per site")
+    parser.add_argument("--retry-failed", action="store_true", help="retry PDFs that failed in an earlier run")
+    parser.add_argument("--limit", type=int, help="only the first N PDFs")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input):
+        parser.error(f"No directory at {args.input}")
+    pdfs = sorted(os.path.join(root, name) for root, _, names in os.walk(args.input)
+                  for name in names if name.lower().endswith(".pdf"))[:args.limit]
+    if not pdfs:
+        parser.error(f"No PDFs found in {args.input}")
+
+    # Size the extraction pool and the LLM scheduler for the batch before app.py builds them
+    os.environ["EXTRACT_WORKERS"] = str(max(1, args.workers))
+    os.environ.setdefault("LLM_CONCURRENCY", str(args.llm_concurrency + 1))
+    os.environ.setdefault("LLM_QUEUE_TIMEOUT", "3600")
+    import app
+
+    if args.style not in app.THEMES:
+        parser.error(f"Unknown style {args.style!r}; expected one of {', '.join(app.THEMES)}")
+
+    os.makedirs(args.out, exist_ok=True)
+    done = load_manifest(args.out)
+    pending, skipped, seen = [], 0, set()
+    for path in pdfs:
+        digest = fingerprint_file(path)
+        if digest in seen:
+            print(f"Skipping {path}: same file as an earlier PDF")
+            skipped += 1
+            continue
+        seen.add(digest)
+        previous = done.get((digest, args.style))
+        if previous and (
+                previous["status"] == "ok" and os.path.isdir(os.path.join(args.out, "sites", args.style, previous["name"]))
+                or previous["status"] == "failed" and not args.retry_failed):
+            skipped += 1
+            continue
+        pending.append((path, digest))
+    print(f"{len(pdfs)} PDFs, {skipped} already done, building {len(pending)} "
+          f"with {args.workers} extraction workers and {args.llm_concurrency} concurrent parses")
+
+    builder = BatchBuilder(app, args.out, args.style, args.llm_concurrency, args.zip)
+    entries = []
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max(1, args.workers) + max(1, args.llm_concurrency))
+    try:
+        futures = [executor.submit(builder.build, path, digest) for path, digest in pending]
+        for future in as_completed(futures):
+            entry = future.result()
+            entries.append(entry)
+            if entry["status"] == "failed":
+                print(f"FAILED {entry['file']} during {entry['stage']}: {entry['error']}")
+            if len(entries) % PROGRESS_EVERY == 0 or len(entries) == len(pending):
+                elapsed = time.perf_counter() - started
+                print(f"{len(entries)}/{len(pending)} done, {len(entries) / elapsed * 60:.1f}/min")
+    except KeyboardInterrupt:
+        print("Interrupted; re-run the same command to resume")
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        builder.close()
+        app.extraction_pool.close()
+
+    report = summarize(entries, skipped, time.perf_counter() - started, app)
+    with open(os.path.join(args.out, REPORT), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps({k: report[k] for k in ("processed", "built", "failed", "skipped", "seconds",
+                                             "throughput_per_min", "errors_by_stage")}, indent=2))
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
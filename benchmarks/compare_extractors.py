@@ -0,0 +1,128 @@
+"""Quality-versus-speed comparison of the PDF text-extraction backends.
+
+Every available backend in ``pdf_extract.EXTRACTORS`` extracts every document
+of the corpus. Fidelity is scored against the reference ``.txt`` written by
+``make_corpus`` (word-level F1 for content, sequence similarity for reading
+order), and the fastest backend whose mean fidelity clears ``--min-fidelity``
+is recommended as ``PDF_EXTRACTOR``. Backends whose optional package is not
+installed (``pdfium`` needs ``pypdfium2``) are reported as skipped.
+
+    python -m benchmarks.compare_extractors
+    python -m benchmarks.compare_extractors --corpus my_resumes/ --min-fidelity 0.9
+"""
+import argparse
+import difflib
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+from benchmarks.make_corpus import CORPUS_DIR
+from pdf_extract import EXTRACTORS, OPTIONAL_DEPENDENCIES, available_extractors, get_extractor
+
+
+def word_f1(reference, candidate):
+    """F1 of the word multisets of two texts"""
+    ref, got = Counter(reference.split()), Counter(candidate.split())
+    overlap = sum((ref & got).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(got.values())
+    recall = overlap / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def order_similarity(reference, candidate):
+    """How closely the word order of ``candidate`` follows ``reference``"""
+    return difflib.SequenceMatcher(None, reference.split(), candidate.split(), autojunk=False).ratio()
+
+
+def fidelity(reference, candidate):
+    return round(0.5 * word_f1(reference, candidate) + 0.5 * order_similarity(reference, candidate), 4)
+
+
+def load_corpus(corpus_dir):
+    """Return (name, pdf path, reference text) for every PDF with a reference"""
+    documents = []
+    for file_name in sorted(os.listdir(corpus_dir)):
+        if not file_name.lower().endswith(".pdf"):
+            continue
+        reference_path = os.path.join(corpus_dir, file_name[:-4] + ".txt")
+        if not os.path.exists(reference_path):
+            continue
+        with open(reference_path, "r", encoding="utf-8") as f:
+            documents.append((file_name[:-4], os.path.join(corpus_dir, file_name), f.read()))
+    return documents
+
+
+def compare(documents, backends, repeat=5, max_pages=1000):
+    results = {}
+    for backend in backends:
+        extractor = get_extractor(backend)
+        per_doc = {}
+        for name, path, reference in documents:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                text = extractor.extract(path, max_pages=max_pages)
+                timings.append(time.perf_counter() - started)
+            per_doc[name] = {"median_s": statistics.median(timings), "fidelity": fidelity(reference, text)}
+        results[backend] = {
+            "documents": per_doc,
+            "mean_fidelity": round(statistics.mean(d["fidelity"] for d in per_doc.values()), 4),
+            "total_median_s": sum(d["median_s"] for d in per_doc.values()),
+        }
+    return results
+
+
+def recommend(results, min_fidelity):
+    """Fastest backend whose mean fidelity is at least ``min_fidelity``"""
+    eligible = [name for name, r in results.items() if r["mean_fidelity"] >= min_fidelity]
+    return min(eligible, key=lambda name: results[name]["total_median_s"]) if eligible else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare PDF extraction backends on speed and fidelity")
+    parser.add_argument("--corpus", default=CORPUS_DIR, help="directory of PDFs with reference .txt files")
+    parser.add_argument("--backends", default=",".join(EXTRACTORS))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-fidelity", type=float, default=0.95)
+    parser.add_argument("--output", help="write the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    documents = load_corpus(args.corpus)
+    if not documents:
+        parser.error(f"No PDFs with reference .txt files in {args.corpus}")
+    backends = args.backends.split(",")
+    unknown = [name for name in backends if name not in EXTRACTORS]
+    if unknown:
+        parser.error(f"Unknown backends {', '.join(unknown)}; expected some of {', '.join(EXTRACTORS)}")
+    available = available_extractors()
+    skipped = {name: OPTIONAL_DEPENDENCIES.get(name) for name in backends if name not in available}
+    results = compare(documents, [name for name in backends if name in available], repeat=args.repeat)
+
+    print(f"{'backend':12s} {'document':16s} {'median ms':>10s} {'fidelity':>9s}")
+    for backend, result in results.items():
+        for name, doc in result["documents"].items():
+            print(f"{backend:12s} {name:16s} {doc['median_s'] * 1000:>10.2f} {doc['fidelity']:>9.4f}")
+        print(f"{backend:12s} {'TOTAL':16s} {result['total_median_s'] * 1000:>10.2f} {result['mean_fidelity']:>9.4f}")
+    for backend, package in skipped.items():
+        print(f"{backend:12s} skipped: optional dependency {package} is not installed (pip install {package})")
+
+    choice = recommend(results, args.min_fidelity)
+    if choice:
+        print(f"\nRecommended: PDF_EXTRACTOR={choice}")
+    else:
+        print(f"\nNo backend reached a mean fidelity of {args.min_fidelity}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"results": results, "skipped": skipped, "recommended": choice,
+                       "min_fidelity": args.min_fidelity}, f, indent=2)
+    return 0 if choice else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""Deterministic resume fixtures of increasing size for the benchmarks"""
+import random
+
+from benchmarks.make_corpus import COMPANIES, DEGREES, INSTITUTES, POSITIONS, SKILLS, WORDS
+
+# Number of entries per list section for each fixture size
+SIZES = {
+    "small": 3,
+    "medium": 30,
+    "large": 300,
+}
+
+
+def _text(rng, n_words):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def make_candidate_dict(n, seed=0):
+    """Return a dict shaped like the LLM output validated into ``Candidate``"""
+    rng = random.Random(seed + n)
+    return {
+        "name": "Fixture Candidate",
+        "Education": [{"Institute_name": rng.choice(INSTITUTES), "Degree_name": rng.choice(DEGREES),
+                       "marks": f"{rng.randint(60, 99)}%"} for _ in range(n)],
+        "Projects": [{"project_name": f"Project {i}", "about_project": _text(rng, 20),
+                      "skills_used": rng.sample(SKILLS, 4)} for i in range(n)],
+        "Experience": [{"Position_name": rng.choice(POSITIONS), "Company_name": rng.choice(COMPANIES),
+                        "skills_used": rng.sample(SKILLS, 5)} for _ in range(n)],
+        "Achivements": [{"Achivement_name": f"Award {i}", "institute_name": rng.choice(INSTITUTES),
+                         "about": _text(rng, 12)} for i in range(n)],
+        "Skills": [f"{rng.choice(SKILLS)} {i}" for i in range(n)],
+        "Position_of_Responsibility": [{"Position_name": "Coordinator", "Society_name": f"Society {i}",
+                                        "Description": _text(rng, 10)} for i in range(n)],
+        "Contact_Info": {f"contact_{i}": f"value-{i}@example.com" for i in range(n)},
+    }
@@ -0,0 +1,177 @@
+"""Write replay cassettes for the prompts app.py sends today.
+
+The cassettes must be re-made whenever a prompt changes, or replay only finds
+fallbacks. Without API keys the exchanges cannot be recorded live, so this
+drives the app in-process over the benchmark corpus with a transport that
+answers every prompt with a well-formed synthetic reply and records it
+(``"source": "synthetic"``):
+
+- resume parses get a fixture Candidate named after the resume;
+- section re-asks get the matching fixture section;
+- component edits get a one-op patch for the instruction, or the component
+  with that patch applied for the full-HTML prompt.
+
+It walks the same flow as loadtest.py (upload, generate every style, edit
+every component with every instruction), so a load test replays from exact
+matches. With API keys, ``LLM_MODE=record`` writes real cassettes instead.
+
+    python -m benchmarks.make_cassettes
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.fixtures import make_candidate_dict
+from component_patch import FULL, PATCH, apply_patch
+from llm_transport import GEMINI_GENERATE, GROQ_CHAT, RecordingTransport, estimate_tokens, request_key, request_shape
+from loadtest import COMPONENT_RE, DEFAULT_CORPUS, EDIT_INSTRUCTIONS, STYLES
+from model_router import SECTION_HEADINGS, section_heading
+
+# Recorded latency of a synthetic reply: a fixed overhead plus generation time
+SYNTHETIC_BASE_S = 0.4
+SYNTHETIC_TOKENS_PER_S = 250.0
+
+# The patch op a synthetic reply uses for each loadtest instruction
+INSTRUCTION_OPS = {
+    "Make the title bold": {"op": "set_attr", "node": 0, "name": "style", "value": "font-weight: 700;"},
+    "Use a warmer colour": {"op": "set_attr", "node": 0, "name": "style", "value": "color: #b45309;"},
+    "Shorten the description": {"op": "add_class", "node": 0, "class": "compact"},
+    "Add an icon": {"op": "insert", "node": 0, "position": "prepend", "html": '<span class="icon">*</span>'},
+}
+DEFAULT_OP = {"op": "add_class", "node": 0, "class": "edited"}
+
+INSTRUCTIONS_RE = re.compile(r"User instructions: (.*)")
+COMPONENT_HTML_RE = re.compile(r"Current HTML component:\s*(.*?)\s*Component type:", re.S)
+
+
+class SyntheticTransport(RecordingTransport):
+    """Records a synthetic, well-formed reply to every prompt instead of calling the providers"""
+
+    source = "synthetic"
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.written = set()
+
+    def _groq_chat(self, **request):
+        info = request["messages"][-1]["content"].removeprefix("use this ")
+        first_line = next((line.strip() for line in info.splitlines() if line.strip()), "")
+        candidate = make_candidate_dict(3, seed=int(request_key(GROQ_CHAT, request)[:8], 16))
+        candidate["name"] = first_line if first_line and not section_heading(first_line) else "Fixture Candidate"
+        shape = request_shape(GROQ_CHAT, request)
+        if shape.startswith("resume.section:"):
+            section = shape.split(":", 1)[1]
+            candidate = {section: candidate[section]}
+        content = json.dumps(candidate, indent=2)
+        return content, estimate_tokens(content)
+
+    def _gemini_generate(self, prompt):
+        instructions = INSTRUCTIONS_RE.search(prompt)
+        op = INSTRUCTION_OPS.get(instructions.group(1).strip() if instructions else "", DEFAULT_OP)
+        if request_shape(GEMINI_GENERATE, {"prompt": prompt}) == "component.patch":
+            text = json.dumps({"ops": [op]})
+        else:
+            text = f"```html\n{apply_patch(COMPONENT_HTML_RE.search(prompt).group(1), {'ops': [op]})}\n```"
+        return text, estimate_tokens(text)
+
+    def _record(self, kind, request, response, latency_s, output_tokens):
+        key = request_key(kind, request)
+        self.written.add((kind, key))
+        path = os.path.join(self.cassette_dir, kind, f"{key}.json")
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                if json.load(f).get("response") == response:
+                    # Unchanged: keep the file (and its recorded_at) as it is
+                    return
+        latency_s = SYNTHETIC_BASE_S + output_tokens / SYNTHETIC_TOKENS_PER_S
+        super()._record(kind, request, response, latency_s, output_tokens)
+
+
+def record_corpus(app, corpus_dir):
+    """Run every corpus PDF through the loadtest flow; returns the number of requests made per route"""
+    client = app.app.test_client()
+    counts = {"parse": 0, "edit": 0, "reask": 0}
+    for file_name in sorted(os.listdir(corpus_dir)):
+        if not file_name.lower().endswith(".pdf"):
+            continue
+        path = os.path.join(corpus_dir, file_name)
+        with open(path, "rb") as f:
+            response = client.post("/", data={"file": (f, file_name)}, content_type="multipart/form-data")
+        if response.status_code != 200:
+            raise RuntimeError(f"Upload of {file_name} failed: {response.get_data(as_text=True)}")
+        counts["parse"] += 1
+        data = response.get_json()["data"]
+
+        for style in STYLES:
+            site = client.post("/generate-website", json={"data": data, "style": style}).get_json()
+            html = client.get(f"/preview/{site['website_id']}/").get_data(as_text=True)
+            for index, component in enumerate(sorted(set(COMPONENT_RE.findall(html)))):
+                component_type = re.search(r'data-component="([^"]+)"', component).group(1)
+                # loadtest edits in the default patch mode; one component per site also covers the full prompt
+                for mode in (PATCH, FULL) if index == 0 else (PATCH,):
+                    for instructions in EDIT_INSTRUCTIONS:
+                        response = client.post("/modify-component", json={
+                            "component_html": component, "instructions": instructions,
+                            "component_type": component_type, "website_id": site["website_id"], "edit_mode": mode})
+                        if response.status_code != 200:
+                            raise RuntimeError(f"Edit of {component_type} failed: {response.get_data(as_text=True)}")
+                        counts["edit"] += 1
+
+    # Re-asks only happen for sections the repair could not fix, so one resume is enough to cover the prompts
+    first_pdf = sorted(name for name in os.listdir(corpus_dir) if name.lower().endswith(".pdf"))[0]
+    text, _ = app.extract_pdf_text(os.path.join(corpus_dir, first_pdf))
+    for section in sorted(set(SECTION_HEADINGS.values()) - {None}):
+        for tier in app.TIERS.values():
+            app.reask_section(section, text, "cassettes", tier)
+            counts["reask"] += 1
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic replay cassettes for the current prompts")
+    parser.add_argument("--cassettes", default=os.path.join(REPO_DIR, "cassettes"))
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--keep", action="store_true", help="keep cassettes of prompts the app no longer sends")
+    args = parser.parse_args(argv)
+
+    cassette_dir = os.path.abspath(args.cassettes)
+    corpus_dir = os.path.abspath(args.corpus)
+
+    # The app keeps its uploads, sites and index in the working directory
+    workdir = tempfile.mkdtemp(prefix="portfolio_cassettes_")
+    cwd = os.getcwd()
+    os.environ["LLM_MODE"] = "replay"
+    # Fonts only change the page head, never a prompt
+    os.environ.setdefault("FONT_FALLBACK", "google")
+    os.chdir(workdir)
+    try:
+        import app
+        transport = app.llm = SyntheticTransport(cassette_dir=cassette_dir)
+        counts = record_corpus(app, corpus_dir)
+        app.extraction_pool.close()
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    removed = 0
+    for kind in (GROQ_CHAT, GEMINI_GENERATE):
+        for file_name in os.listdir(os.path.join(cassette_dir, kind)):
+            if not args.keep and (kind, file_name[:-len(".json")]) not in transport.written:
+                os.remove(os.path.join(cassette_dir, kind, file_name))
+                removed += 1
+
+    written = {kind: len(os.listdir(os.path.join(cassette_dir, kind))) for kind in (GROQ_CHAT, GEMINI_GENERATE)}
+    print(f"Ran {counts['parse']} parses, {counts['edit']} edits and {counts['reask']} re-asks; "
+          f"{written[GROQ_CHAT]} Groq and {written[GEMINI_GENERATE]} Gemini cassettes in {cassette_dir}, "
+          f"{removed} stale ones removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Generate the synthetic resume PDF corpus used by the benchmarks.
+
+The PDFs are written by hand with the standard Helvetica font so the corpus
+can be regenerated without any PDF library. Each PDF is written next to a
+``.txt`` file holding the text in reading order, which is used as the
+reference when scoring extraction quality. Besides plain resumes the corpus
+has layouts where extractors disagree: two text columns, a table whose
+cells are drawn column by column, and words drawn with the fi/fl ligature
+glyphs (the reference spells them out).
+
+    python -m benchmarks.make_corpus
+"""
+import os
+import random
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+MARGIN = 54
+LINE_HEIGHT = 13
+RIGHT_COLUMN_X = 250
+LIGATURE_FONT = "F2"
+
+FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Ananya", "Kabir", "Meera", "Vikram", "Isha", "Arjun", "Sara"]
+LAST_NAMES = ["Sharma", "Verma", "Iyer", "Gupta", "Nair", "Kapoor", "Rao", "Mehta", "Das", "Singh"]
+COMPANIES = ["Google", "Microsoft", "Flipkart", "Zomato", "Infosys", "Razorpay", "Atlassian", "Swiggy", "Adobe", "Oracle"]
+POSITIONS = ["Software Engineer Intern", "Backend Developer", "Data Analyst", "ML Engineer", "Frontend Developer", "SDE II"]
+INSTITUTES = ["IIT Delhi", "NIT Trichy", "BITS Pilani", "IIIT Hyderabad", "Delhi University", "VIT Vellore"]
+DEGREES = ["B.Tech Computer Science", "M.Tech Data Science", "B.Sc Mathematics", "MCA", "B.E. Electronics"]
+SKILLS = ["Python", "Java", "C++", "React", "Flask", "Django", "Kubernetes", "Docker", "AWS", "SQL",
+          "PostgreSQL", "MongoDB", "TensorFlow", "PyTorch", "Go", "TypeScript", "Redis", "Kafka", "Spark", "Git"]
+WORDS = ["built", "designed", "scalable", "service", "pipeline", "reduced", "latency", "dashboard", "users",
+         "api", "model", "accuracy", "deployed", "automated", "tests", "realtime", "platform", "improved"]
+# Words drawn with the fi/fl ligature glyphs in the ligatures document
+LIGATURE_WORDS = ["efficient", "workflow", "profiled", "offline", "certified", "fluent", "flexible", "finance",
+                  "configured", "simplified", "overflow", "unified"]
+
+
+def _sentence(rng, n_words):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words)).capitalize() + "."
+
+
+def _resume_lines(rng, n_projects, n_experience):
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [name, f"{name.split()[0].lower()}@example.com | +91 98{rng.randint(10000000, 99999999)}", ""]
+    lines.append("EDUCATION")
+    for _ in range(2):
+        lines.append(f"{rng.choice(INSTITUTES)} - {rng.choice(DEGREES)} - CGPA {rng.randint(70, 99) / 10}")
+    lines.append("")
+    lines.append("EXPERIENCE")
+    for _ in range(n_experience):
+        lines.append(f"{rng.choice(POSITIONS)}, {rng.choice(COMPANIES)}")
+        lines.append(_sentence(rng, 10))
+        lines.append("Skills: " + ", ".join(rng.sample(SKILLS, 4)))
+    lines.append("")
+    lines.append("PROJECTS")
+    for i in range(n_projects):
+        lines.append(f"Project {i + 1}: {rng.choice(WORDS).capitalize()} {rng.choice(WORDS).capitalize()}")
+        lines.append(_sentence(rng, 12))
+        lines.append("Tech: " + ", ".join(rng.sample(SKILLS, 3)))
+    lines.append("")
+    lines.append("SKILLS")
+    lines.append(", ".join(rng.sample(SKILLS, 12)))
+    return lines
+
+
+def _two_column_lines(rng):
+    """(left, right) column lines: contact, education and skills beside experience and projects"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    left = [name, f"{name.split()[0].lower()}@example.com", "", "EDUCATION"]
+    for _ in range(2):
+        left.extend([rng.choice(INSTITUTES), f"{rng.choice(DEGREES)}, CGPA {rng.randint(70, 99) / 10}"])
+    left.extend(["", "SKILLS"])
+    skills = rng.sample(SKILLS, 12)
+    left.extend(", ".join(skills[i:i + 3]) for i in range(0, len(skills), 3))
+    right = ["EXPERIENCE"]
+    for _ in range(4):
+        right.extend([f"{rng.choice(POSITIONS)}, {rng.choice(COMPANIES)}", _sentence(rng, 7)])
+    right.extend(["", "PROJECTS"])
+    for i in range(4):
+        right.extend([f"Project {i + 1}: {rng.choice(WORDS).capitalize()} {rng.choice(WORDS).capitalize()}",
+                      _sentence(rng, 7)])
+    return left, right
+
+
+def _ligature_lines(rng):
+    """A resume whose sentences are full of fi/fl words"""
+    words = WORDS + LIGATURE_WORDS * 2
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [name, f"{name.split()[0].lower()}@example.com", "", "PROFILE"]
+    lines.extend(" ".join(rng.choice(words) for _ in range(10)).capitalize() + "." for _ in range(3))
+    lines.extend(["", "EXPERIENCE"])
+    for _ in range(5):
+        lines.append(f"{rng.choice(POSITIONS)}, {rng.choice(COMPANIES)}")
+        lines.append(" ".join(rng.choice(words) for _ in range(10)).capitalize() + ".")
+    lines.extend(["", "CERTIFICATIONS"])
+    lines.extend(f"Certified {rng.choice(SKILLS)} Professional, {rng.choice(INSTITUTES)}" for _ in range(3))
+    return lines
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _ligatures(text):
+    """Escaped text drawn with the fi/fl glyphs of the ligature font"""
+    return _escape(text).replace("fi", "\\001").replace("fl", "\\002")
+
+
+def _text_stream(lines, x=MARGIN, font="F1"):
+    ops = ["BT", f"/{font} 10 Tf", f"{LINE_HEIGHT} TL", f"{x} {PAGE_HEIGHT - MARGIN} Td"]
+    for line in lines:
+        ops.append(f"({_ligatures(line) if font == LIGATURE_FONT else _escape(line)}) '")
+    ops.append("ET")
+    return "\n".join(ops)
+
+
+def _columns_stream(left, right, right_x):
+    """Two columns side by side, the left one drawn first"""
+    return _text_stream(left) + "\n" + _text_stream(right, x=right_x)
+
+
+def _table_stream(title, header, rows, col_widths, by_column=False):
+    ops = ["BT", "/F1 12 Tf", f"{MARGIN} {PAGE_HEIGHT - MARGIN} Td", f"({_escape(title)}) Tj", "ET"]
+    y = PAGE_HEIGHT - MARGIN - 2 * LINE_HEIGHT
+    row_height = LINE_HEIGHT + 4
+    table_width = sum(col_widths)
+    cells = []
+    for row in [header] + rows:
+        x = MARGIN
+        ops.append(f"{MARGIN} {y - 4} {table_width} {row_height} re S")
+        row_cells = []
+        for cell, width in zip(row, col_widths):
+            row_cells.append(f"BT /F1 9 Tf {x + 3} {y} Td ({_escape(cell)}) Tj ET")
+            x += width
+        if by_column:
+            cells.append(row_cells)
+        else:
+            ops.extend(row_cells)
+        y -= row_height
+    # Some generators emit a table column by column; the reading order is still row by row
+    for column in zip(*cells):
+        ops.extend(column)
+    return "\n".join(ops)
+
+
+def write_pdf(path, page_streams, ligature_font=False):
+    """Write a minimal PDF with one content stream per page"""
+    objects = []
+    font_id = 3
+    page_ids = []
+    next_id = 4
+    for _ in page_streams:
+        page_ids.append(next_id)
+        next_id += 2
+    fonts = f"/F1 {font_id} 0 R"
+    if ligature_font:
+        # Helvetica with its fi and fl glyphs at codes 1 and 2
+        objects.append((next_id, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                                 "/Encoding << /BaseEncoding /WinAnsiEncoding /Differences [1 /fi /fl] >> >>"))
+        fonts += f" /{LIGATURE_FONT} {next_id} 0 R"
+
+    objects.append((1, "<< /Type /Catalog /Pages 2 0 R >>"))
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append((2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>"))
+    objects.append((font_id, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"))
+    for page_id, stream in zip(page_ids, page_streams):
+        content_id = page_id + 1
+        objects.append((page_id, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                                 f"/Resources << /Font << {fonts} >> >> /Contents {content_id} 0 R >>"))
+        data = stream.encode("latin-1")
+        objects.append((content_id, f"<< /Length {len(data)} >>\nstream\n{stream}\nendstream"))
+
+    objects.sort()
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = {}
+    for obj_id, body in objects:
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for obj_id, _ in objects:
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _paginate(lines):
+    per_page = (PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT
+    return [lines[i:i + per_page] for i in range(0, len(lines), per_page)]
+
+
+def build_corpus(corpus_dir=CORPUS_DIR):
+    """Write every corpus document and its reference text, return their names"""
+    os.makedirs(corpus_dir, exist_ok=True)
+    documents = {}
+
+    rng = random.Random(26)
+    documents["one_page"] = [_resume_lines(rng, n_projects=3, n_experience=2)]
+
+    rng = random.Random(27)
+    documents["multi_page"] = _paginate(_resume_lines(rng, n_projects=30, n_experience=12))
+
+    rng = random.Random(28)
+    header = ["Company", "Position", "Duration", "Stack"]
+    rows = [[rng.choice(COMPANIES), rng.choice(POSITIONS), f"{rng.randint(1, 36)} months", rng.choice(SKILLS)]
+            for _ in range(38)]
+    documents["heavy_tables"] = [[("table", "EXPERIENCE SUMMARY", header, rows)],
+                                 _resume_lines(rng, n_projects=4, n_experience=3)]
+
+    rng = random.Random(29)
+    documents["two_column"] = [[("columns",) + _two_column_lines(rng)]]
+
+    rng = random.Random(30)
+    header = ["Institute", "Degree", "Year", "Score"]
+    rows = [[rng.choice(INSTITUTES), rng.choice(DEGREES), str(rng.randint(2012, 2024)), f"{rng.randint(60, 99)}%"]
+            for _ in range(20)]
+    documents["table_by_column"] = [[("table_by_column", "ACADEMIC RECORD", header, rows)]]
+
+    rng = random.Random(31)
+    documents["ligatures"] = [[("ligatures", _ligature_lines(rng))]]
+
+    for name, pages in documents.items():
+        streams, reference = [], []
+        ligature_font = False
+        for page in pages:
+            kind = page[0][0] if page and isinstance(page[0], tuple) else "text"
+            if kind in ("table", "table_by_column"):
+                _, title, head, body = page[0]
+                streams.append(_table_stream(title, head, body, [140, 170, 90, 110],
+                                             by_column=kind == "table_by_column"))
+                reference.append(title)
+                reference.extend(" ".join(row) for row in [head] + body)
+            elif kind == "columns":
+                _, left, right = page[0]
+                streams.append(_columns_stream(left, right, RIGHT_COLUMN_X))
+                reference.extend(line for line in left + right if line)
+            elif kind == "ligatures":
+                lines = page[0][1]
+                streams.append(_text_stream(lines, font=LIGATURE_FONT))
+                reference.extend(line for line in lines if line)
+                ligature_font = True
+            else:
+                streams.append(_text_stream(page))
+                reference.extend(line for line in page if line)
+        write_pdf(os.path.join(corpus_dir, f"{name}.pdf"), streams, ligature_font=ligature_font)
+        with open(os.path.join(corpus_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(reference) + "\n")
+    return sorted(documents)
+
+
+if __name__ == "__main__":
+    for name in build_corpus():
+        print(f"Wrote {os.path.join(CORPUS_DIR, name)}.pdf")
@@ -0,0 +1,216 @@
+"""Microbenchmarks for the extraction and rendering hot paths of app.py.
+
+Runs fully offline against the committed corpus in ``benchmarks/corpus`` and
+the fixtures in ``benchmarks/fixtures.py``. Results are written as JSON and
+compared with ``baseline.json`` using the ratios in ``thresholds.json``; the
+process exits non-zero when a case regresses past its threshold.
+
+    python -m benchmarks.run_benchmarks                   # run and compare
+    python -m benchmarks.run_benchmarks -k render         # only matching cases
+    python -m benchmarks.run_benchmarks --update-baseline # accept new numbers
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from datetime import datetime
+
+import app
+from benchmarks.fixtures import SIZES, make_candidate_dict
+from benchmarks.make_corpus import CORPUS_DIR
+from pdf_extract import available_extractors, get_extractor
+from resume_model import dumps
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_PATH = os.path.join(BENCH_DIR, "results.json")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+THRESHOLDS_PATH = os.path.join(BENCH_DIR, "thresholds.json")
+
+STYLES = ["professional", "futuristic", "playful"]
+CORPUS = ["one_page", "multi_page", "heavy_tables"]
+
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _fixture_candidate(size):
+    return app.Candidate.model_validate(make_candidate_dict(SIZES[size]))
+
+
+def _legacy_response(info):
+    """The pre-canonical upload response: a re-keyed copy of the model serialized by json"""
+    data = {
+        "name": info.name,
+        "education": [{"Institute_name": e.Institute_name, "Degree_name": e.Degree_name, "Marks": e.marks} for e in info.Education],
+        "Contact_Info": info.Contact_Info,
+        "skills": info.Skills,
+        "projects": [{"title": p.project_name, "desc": p.about_project, "tech": p.skills_used} for p in info.Projects],
+        "Experience": [{"Company": e.Company_name, "Position": e.Position_name, "Skills": e.skills_used} for e in info.Experience],
+        "Achievements": [{"achievement_name": a.Achivement_name, "institute_name": a.institute_name, "description": a.about} for a in info.Achivements],
+        "Position_of_responsibility": [{"position_name": p.Position_name, "soc_name": p.Society_name, "description": p.Description} for p in info.Position_of_Responsibility],
+    }
+    return json.dumps({"success": True, "data": data}).encode("utf-8")
+
+
+def _zip_case(size, workdir):
+    site = app.generate_website_code(_fixture_candidate(size))
+    folder = os.path.join(workdir, f"site_{size}")
+    os.makedirs(folder, exist_ok=True)
+    app.write_site(folder, site)
+    zip_path = os.path.join(workdir, f"site_{size}.zip")
+    return lambda: app.build_zip(folder, zip_path)
+
+
+def collect_cases(workdir):
+    """Return an ordered list of (case name, zero-argument callable)"""
+    cases = []
+
+    for backend in available_extractors():
+        extractor = get_extractor(backend)
+        for doc in CORPUS:
+            path = os.path.join(CORPUS_DIR, f"{doc}.pdf")
+            cases.append((f"extract/{backend}/{doc}", lambda extractor=extractor, path=path: extractor.extract(path)))
+
+    for size in SIZES:
+        info = _fixture_candidate(size)
+        raw = json.dumps(make_candidate_dict(SIZES[size]))
+        cases.append((f"validate/candidate/{size}", lambda raw=raw: app.Candidate.model_validate_json(raw)))
+        cases.append((f"serialize/legacy_json/{size}", lambda info=info: _legacy_response(info)))
+        cases.append((f"serialize/canonical/{size}", lambda info=info: dumps({"success": True, "data": info})))
+
+        for style in STYLES:
+            cases.append((f"render/generate_website_code/{style}/{size}",
+                          lambda info=info, style=style: app.generate_website_code(info, style)))
+
+        helpers = {
+            "experience": (app.generate_experience_html, info.Experience),
+            "projects": (app.generate_projects_html, info.Projects),
+            "skills": (app.generate_skills_html, info.Skills),
+            "education": (app.generate_education_html, info.Education),
+            "contact": (app.generate_contact_html, info.Contact_Info),
+        }
+        for section, (helper, value) in helpers.items():
+            cases.append((f"render/generate_{section}_html/{size}",
+                          lambda helper=helper, value=value: helper(value)))
+
+        cases.append((f"zip/build_zip/{size}", _zip_case(size, workdir)))
+
+    return cases
+
+
+def peak_allocation(fn):
+    """Peak bytes allocated by a single call"""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def time_case(fn, repeat=5, min_time=0.2):
+    """Time a callable, auto-scaling the loop count so each sample takes ``min_time``"""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    if elapsed < min_time:
+        number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    samples = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "number": number,
+        "repeat": repeat,
+        "peak_alloc_bytes": peak_allocation(fn),
+    }
+
+
+def threshold_for(name, thresholds):
+    """Allowed slowdown ratio for a case; the last matching pattern wins"""
+    ratio = thresholds.get("default", 1.3)
+    for pattern, value in thresholds.get("cases", {}).items():
+        if fnmatch.fnmatch(name, pattern):
+            ratio = value
+    return ratio
+
+
+def compare(results, baseline, thresholds):
+    """Return a list of regressions of ``results`` against ``baseline``"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        ratio = result["median_s"] / previous["median_s"]
+        result["baseline_median_s"] = previous["median_s"]
+        result["ratio"] = round(ratio, 3)
+        limit = threshold_for(name, thresholds)
+        if ratio > limit:
+            regressions.append({"case": name, "ratio": round(ratio, 3), "threshold": limit})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the portfolio generator microbenchmarks")
+    parser.add_argument("-k", "--filter", default="*", help="glob of case names to run (substring also matches)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing sample")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    pattern = args.filter if any(c in args.filter for c in "*?[") else f"*{args.filter}*"
+    workdir = tempfile.mkdtemp(prefix="portfolio_bench_")
+    try:
+        results = {}
+        for name, fn in collect_cases(workdir):
+            if not fnmatch.fnmatch(name, pattern):
+                continue
+            results[name] = time_case(fn, repeat=args.repeat, min_time=args.min_time)
+            print(f"{name:55s} {results[name]['median_s'] * 1e6:12.1f} us "
+                  f"{results[name]['peak_alloc_bytes'] / 1024:10.1f} KiB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    thresholds = _load_json(THRESHOLDS_PATH, {})
+    baseline = _load_json(BASELINE_PATH, {})
+    regressions = compare(results, baseline.get("results", {}), thresholds)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+        "regressions": regressions,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        merged = baseline.get("results", {})
+        merged.update({name: {"median_s": r["median_s"]} for name, r in results.items()})
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"created": report["created"], "python": report["python"],
+                       "machine": report["machine"], "results": merged}, f, indent=2, sort_keys=True)
+        print(f"Baseline updated at {BASELINE_PATH}")
+        return 0
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['case']}: {regression['ratio']}x baseline "
+              f"(threshold {regression['threshold']}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""Columnar bulk export of parsed candidates to Parquet.
+
+Reads the candidate store written by ``candidate_index`` (``SEARCH_DB``) and
+flattens every ``Candidate`` into one table per section, all keyed by
+``candidate_id``:
+
+    candidates        candidate_id, upload_id, name, created
+    skills            candidate_id, source, source_index, skill, skill_normalized
+    education         candidate_id, position, institute_name, degree_name, marks
+    experience        candidate_id, position, position_name, company_name
+    projects          candidate_id, position, project_name, about_project
+    achievements      candidate_id, position, achievement_name, institute_name, about
+    responsibilities  candidate_id, position, position_name, society_name, description
+    contacts          candidate_id, key, value
+    removed           candidate_id, removed
+
+Each table is a directory of Parquet files (``<out>/<table>/part-NNNNN.parquet``)
+that pyarrow.dataset, DuckDB or pandas can read as one dataset. Rows are
+buffered and written one row group at a time; skill, company and institute
+columns are dictionary-encoded. Exports are incremental: ``_state.json``
+records the last exported candidate id, and each run appends a new part with
+only the candidates added since.
+
+The store replaces a re-parsed upload with a new candidate id and can delete
+candidates, so each run also writes a tombstone to ``removed`` for every
+exported id no longer in the store. Readers drop tombstoned ids (``live_filter``
+does it for pyarrow.dataset); ``compact`` rewrites each table without them.
+
+    python candidate_export.py export --out exports/
+    python candidate_export.py report --out exports/ --top 20
+    python candidate_export.py compact --out exports/
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from functools import lru_cache
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+from candidate_index import SEARCH_DB, normalize_skill
+from resume_model import loads
+
+EXPORT_ROW_GROUP_ROWS = int(os.getenv("EXPORT_ROW_GROUP_ROWS", "100000"))
+STATE_FILE = "_state.json"
+
+# Rows read from the store per query
+READ_BATCH = 5000
+
+# The same few thousand skill spellings repeat across the whole archive
+_normalize_skill = lru_cache(maxsize=65536)(normalize_skill)
+
+
+def _schemas():
+    text = pa.string()
+    category = pa.dictionary(pa.int32(), pa.string())
+    key = ("candidate_id", pa.int64())
+    return {
+        "candidates": pa.schema([key, ("upload_id", text), ("name", text), ("created", pa.timestamp("ms"))]),
+        "skills": pa.schema([key, ("source", category), ("source_index", pa.int32()),
+                             ("skill", category), ("skill_normalized", category)]),
+        "education": pa.schema([key, ("position", pa.int32()), ("institute_name", category),
+                                ("degree_name", category), ("marks", text)]),
+        "experience": pa.schema([key, ("position", pa.int32()), ("position_name", category),
+                                 ("company_name", category)]),
+        "projects": pa.schema([key, ("position", pa.int32()), ("project_name", text), ("about_project", text)]),
+        "achievements": pa.schema([key, ("position", pa.int32()), ("achievement_name", text),
+                                   ("institute_name", category), ("about", text)]),
+        "responsibilities": pa.schema([key, ("position", pa.int32()), ("position_name", category),
+                                       ("society_name", text), ("description", text)]),
+        "contacts": pa.schema([key, ("key", category), ("value", text)]),
+        "removed": pa.schema([key, ("removed", pa.timestamp("ms"))]),
+    }
+
+
+def flatten(candidate_id, upload_id, created, data):
+    """Rows of each child table for one stored candidate dict; returns {table: [tuple, ...]}"""
+    skills = [(candidate_id, "skills", 0, s, _normalize_skill(s)) for s in data.get("Skills", [])]
+    for source, section in (("experience", "Experience"), ("project", "Projects")):
+        for index, item in enumerate(data.get(section, [])):
+            skills.extend((candidate_id, source, index, s, _normalize_skill(s)) for s in item.get("skills_used", []))
+    return {
+        "candidates": [(candidate_id, upload_id, data.get("name", ""), int(created * 1000))],
+        "skills": skills,
+        "education": [(candidate_id, i, e["Institute_name"], e["Degree_name"], e["marks"])
+                      for i, e in enumerate(data.get("Education", []))],
+        "experience": [(candidate_id, i, e["Position_name"], e["Company_name"])
+                       for i, e in enumerate(data.get("Experience", []))],
+        "projects": [(candidate_id, i, p["project_name"], p["about_project"])
+                     for i, p in enumerate(data.get("Projects", []))],
+        "achievements": [(candidate_id, i, a["Achivement_name"], a["institute_name"], a["about"])
+                         for i, a in enumerate(data.get("Achivements", []))],
+        "responsibilities": [(candidate_id, i, p["Position_name"], p["Society_name"], p["Description"])
+                             for i, p in enumerate(data.get("Position_of_Responsibility", []))],
+        "contacts": [(candidate_id, str(k), str(v)) for k, v in (data.get("Contact_Info") or {}).items()],
+    }
+
+
+class CandidateExporter:
+    """Buffers flattened rows per table and appends them to Parquet one row group at a time"""
+
+    def __init__(self, out_dir, part, row_group_rows=EXPORT_ROW_GROUP_ROWS):
+        if pa is None:
+            raise RuntimeError("pyarrow is required for the Parquet export: pip install pyarrow")
+        self.out_dir = out_dir
+        self.part = part
+        self.row_group_rows = row_group_rows
+        self.schemas = _schemas()
+        self.buffers = {table: [] for table in self.schemas}
+        self.writers = {}
+        self.rows = {table: 0 for table in self.schemas}
+        self.row_groups = 0
+
+    def add(self, candidate_id, upload_id, created, data):
+        for table, rows in flatten(candidate_id, upload_id, created, data).items():
+            buffer = self.buffers[table]
+            buffer.extend(rows)
+            if len(buffer) >= self.row_group_rows:
+                self._flush(table)
+
+    def remove(self, candidate_id, removed):
+        """Tombstone an exported candidate that was replaced or deleted in the store"""
+        self.buffers["removed"].append((candidate_id, int(removed * 1000)))
+
+    def _flush(self, table):
+        rows = self.buffers[table]
+        if not rows:
+            return
+        schema = self.schemas[table]
+        columns = [pa.array(list(values), type=field.type) if not pa.types.is_dictionary(field.type)
+                   else pa.array(list(values), type=pa.string()).dictionary_encode()
+                   for values, field in zip(zip(*rows), schema)]
+        writer = self.writers.get(table)
+        if writer is None:
+            folder = os.path.join(self.out_dir, table)
+            os.makedirs(folder, exist_ok=True)
+            writer = pq.ParquetWriter(os.path.join(folder, f"part-{self.part:05d}.parquet"), schema,
+                                      compression="zstd")
+            self.writers[table] = writer
+        writer.write_table(pa.Table.from_arrays(columns, schema=schema), row_group_size=len(rows))
+        self.rows[table] += len(rows)
+        self.row_groups += 1
+        self.buffers[table] = []
+
+    def close(self):
+        for table in self.schemas:
+            self._flush(table)
+        for writer in self.writers.values():
+            writer.close()
+        return dict(self.rows)
+
+
+def load_state(out_dir):
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {"last_candidate_id": 0, "parts": 0}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _ids(out_dir, table):
+    """Candidate ids in an exported table"""
+    folder = os.path.join(out_dir, table)
+    if not os.path.isdir(folder):
+        return set()
+    return set(ds.dataset(folder, format="parquet").to_table(columns=["candidate_id"])
+               .column("candidate_id").to_pylist())
+
+
+def live_filter(out_dir):
+    """Dataset filter dropping the rows of tombstoned candidates, or None when there are none"""
+    removed = _ids(out_dir, "removed")
+    if not removed:
+        return None
+    return ~ds.field("candidate_id").isin(pa.array(sorted(removed), type=pa.int64()))
+
+
+def export_store(out_dir, store_path=SEARCH_DB, row_group_rows=EXPORT_ROW_GROUP_ROWS):
+    """Append every candidate added to the store since the last export and tombstone the ones
+    removed from it; returns a summary"""
+    state = load_state(out_dir)
+    previous = _ids(out_dir, "candidates") - _ids(out_dir, "removed")
+    os.makedirs(out_dir, exist_ok=True)
+    connection = sqlite3.connect(f"file:{store_path}?mode=ro", uri=True)
+    exporter = CandidateExporter(out_dir, state["parts"] + 1, row_group_rows)
+    started = time.perf_counter()
+    last_id, exported = state["last_candidate_id"], 0
+    try:
+        while True:
+            rows = connection.execute(
+                "SELECT id, upload_id, created, data FROM candidates WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, READ_BATCH)).fetchall()
+            if not rows:
+                break
+            for candidate_id, upload_id, created, data in rows:
+                exporter.add(candidate_id, upload_id, created, loads(data))
+            last_id = rows[-1][0]
+            exported += len(rows)
+        # Replaced uploads and deleted candidates: exported before, gone from the store now
+        live = {row[0] for row in connection.execute("SELECT id FROM candidates WHERE id <= ?",
+                                                     (state["last_candidate_id"],))}
+        removed = sorted(previous - live)
+        now = time.time()
+        for candidate_id in removed:
+            exporter.remove(candidate_id, now)
+        table_rows = exporter.close()
+    finally:
+        connection.close()
+
+    if exported or removed:
+        state = {"last_candidate_id": last_id, "parts": exporter.part}
+        with open(os.path.join(out_dir, STATE_FILE), "w", encoding="utf-8") as f:
+            json.dump(state, f)
+    return {
+        "candidates": exported,
+        "removed": len(removed),
+        "tables": table_rows,
+        "row_groups": exporter.row_groups,
+        "part": exporter.part if exported or removed else None,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def top_values(out_dir, table, column, top=20):
+    """Most frequent values of ``column`` in an exported table, counted once per candidate"""
+    dataset = ds.dataset(os.path.join(out_dir, table), format="parquet")
+    data = dataset.to_table(columns=["candidate_id", column], filter=live_filter(out_dir))
+    data = data.set_column(1, column, data.column(column).cast(pa.string()))
+    counts = data.group_by(column).aggregate([("candidate_id", "count_distinct")])
+    counts = counts.sort_by([("candidate_id_count_distinct", "descending")]).slice(0, top)
+    return list(zip(counts.column(column).to_pylist(), counts.column("candidate_id_count_distinct").to_pylist()))
+
+
+def compact(out_dir, row_group_rows=EXPORT_ROW_GROUP_ROWS):
+    """Rewrite every table into a single part without tombstoned candidates; returns a summary"""
+    state = load_state(out_dir)
+    keep = live_filter(out_dir)
+    started = time.perf_counter()
+    part = state["parts"] + 1
+    rows = {}
+    for table in _schemas():
+        folder = os.path.join(out_dir, table)
+        if table == "removed" or not os.path.isdir(folder):
+            continue
+        data = ds.dataset(folder, format="parquet").to_table(filter=keep)
+        staging = folder + ".compacting"
+        os.makedirs(staging, exist_ok=True)
+        pq.write_table(data, os.path.join(staging, f"part-{part:05d}.parquet"),
+                       row_group_size=row_group_rows, compression="zstd")
+        # Swap the compacted table in; the old parts are dropped only once it is complete
+        old = folder + ".old"
+        os.rename(folder, old)
+        os.rename(staging, folder)
+        shutil.rmtree(old)
+        rows[table] = data.num_rows
+    shutil.rmtree(os.path.join(out_dir, "removed"), ignore_errors=True)
+    state["parts"] = part
+    with open(os.path.join(out_dir, STATE_FILE), "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    return {"tables": rows, "part": part, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export parsed candidates to Parquet and report on them")
+    parser.add_argument("command", choices=["export", "report", "compact"])
+    parser.add_argument("--out", default="exports", help="export directory")
+    parser.add_argument("--store", default=SEARCH_DB, help="candidate store written by the app")
+    parser.add_argument("--row-group-rows", type=int, default=EXPORT_ROW_GROUP_ROWS)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if pa is None:
+        print("pyarrow is required: pip install pyarrow")
+        return 1
+
+    if args.command == "export":
+        if not os.path.exists(args.store):
+            parser.error(f"No candidate store at {args.store}")
+        summary = export_store(args.out, args.store, args.row_group_rows)
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    if args.command == "compact":
+        print(json.dumps(compact(args.out, args.row_group_rows), indent=2))
+        return 0
+
+    started = time.perf_counter()
+    for title, table, column in [("Skills", "skills", "skill_normalized"),
+                                 ("Companies", "experience", "company_name"),
+                                 ("Institutes", "education", "institute_name"),
+                                 ("Degrees", "education", "degree_name")]:
+        print(f"\n{title}")
+        for value, count in top_values(args.out, table, column, args.top):
+            print(f"  {value:40s} {count:>10d}")
+    print(f"\nReport took {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
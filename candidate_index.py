@@ -0,0 +1,492 @@
+"""Persistent, searchable store of parsed resumes.
+
+Every ``Candidate`` parsed by ``get_all_info`` is added to a SQLite database
+(``SEARCH_DB``) together with its postings, one per ``field:term``, in a
+single transaction. The inverted index itself lives in memory: it is rebuilt
+from the stored postings at startup and updated incrementally on every add.
+Several processes (e.g. gunicorn workers) can share one ``SEARCH_DB``: every
+add and remove is also written to a change log in the same transaction, and
+before each operation the index checks SQLite's ``data_version`` and applies
+only the log rows committed by other connections since. The log keeps the
+last ``SEARCH_CHANGE_LOG_KEEP`` to twice that many rows; a process that falls
+further behind rebuilds from the stored postings.
+
+Indexed fields:
+
+- ``skill``      Skills plus the skills used in Experience and Projects,
+                 normalized (case, punctuation, common aliases: k8s -> kubernetes)
+- ``company``    words of Experience company names
+- ``institute``  words of Education and Achievement institute names
+- ``position``   words of Experience and Position of Responsibility titles
+
+Queries are parsed by ``parse_query``::
+
+    skill:kubernetes AND (company:google OR company:meta) NOT institute:"iit delhi"
+    python react                       # bare terms match any field; adjacent terms are ANDed
+
+In ``boolean`` mode the expression selects the candidates; in ``ranked`` mode
+any positive term matches. Either way results are ordered by the summed
+inverse document frequency of the query terms they contain.
+"""
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from resume_model import dumps, loads
+
+SEARCH_DB = os.getenv("SEARCH_DB", "candidates.db")
+SEARCH_CHANGE_LOG_KEEP = int(os.getenv("SEARCH_CHANGE_LOG_KEEP", "10000"))
+
+FIELDS = ("skill", "company", "institute", "position")
+
+SKILL_ALIASES = {
+    "k8s": "kubernetes",
+    "js": "javascript",
+    "ts": "typescript",
+    "node": "nodejs",
+    "node js": "nodejs",
+    "react js": "react",
+    "reactjs": "react",
+    "vue js": "vue",
+    "vuejs": "vue",
+    "golang": "go",
+    "postgres": "postgresql",
+    "mongo": "mongodb",
+    "py": "python",
+    "python3": "python",
+    "ml": "machine learning",
+    "dl": "deep learning",
+    "ai": "artificial intelligence",
+    "nlp": "natural language processing",
+    "aws cloud": "aws",
+    "amazon web services": "aws",
+    "gcp": "google cloud",
+    "tf": "tensorflow",
+    "sklearn": "scikit learn",
+}
+
+_NON_WORD = re.compile(r"[^a-z0-9+#]+")
+_QUERY_TOKEN = re.compile(r'\s*(\(|\)|"[^"]*"|[\w+#.-]+:"[^"]*"|[^\s()]+)')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY,
+    upload_id TEXT UNIQUE,
+    name TEXT NOT NULL,
+    data BLOB NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    candidate_id INTEGER NOT NULL,
+    PRIMARY KEY (term, candidate_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_candidate ON postings (candidate_id);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    candidate_id INTEGER NOT NULL,
+    terms TEXT NOT NULL
+);
+"""
+
+
+class QueryError(ValueError):
+    """Raised for a search query that cannot be parsed"""
+
+
+def normalize_text(value):
+    return _NON_WORD.sub(" ", value.lower().replace(".js", "js")).strip()
+
+
+def normalize_skill(value):
+    """Canonical form of a skill name, used both when indexing and when querying"""
+    skill = normalize_text(value)
+    return SKILL_ALIASES.get(skill, SKILL_ALIASES.get(skill.replace(" ", ""), skill))
+
+
+def field_terms(field, value):
+    """Index terms for ``value`` in ``field``: one term per skill, one per word otherwise"""
+    if field == "skill":
+        skill = normalize_skill(value)
+        return [f"skill:{skill}"] if skill else []
+    return [f"{field}:{word}" for word in normalize_text(value).split()]
+
+
+def candidate_terms(candidate):
+    """Distinct index terms of a Candidate"""
+    values = {
+        "skill": list(candidate.Skills)
+        + [s for e in candidate.Experience for s in e.skills_used]
+        + [s for p in candidate.Projects for s in p.skills_used],
+        "company": [e.Company_name for e in candidate.Experience],
+        "institute": [e.Institute_name for e in candidate.Education]
+        + [a.institute_name for a in candidate.Achivements],
+        "position": [e.Position_name for e in candidate.Experience]
+        + [p.Position_name for p in candidate.Position_of_Responsibility],
+    }
+    return sorted({term for field in FIELDS for value in values[field] for term in field_terms(field, value)})
+
+
+# Query AST: ("terms", [alternatives, each a list of terms that must all match]), ("and"|"or", a, b), ("not", a)
+
+def _tokenize(query):
+    tokens, position = [], 0
+    query = query.strip()
+    while position < len(query):
+        match = _QUERY_TOKEN.match(query, position)
+        if not match:
+            raise QueryError(f"Cannot parse query near {query[position:]!r}")
+        tokens.append(match.group(1))
+        position = match.end()
+    return tokens
+
+
+def _term_node(token):
+    field, _, value = token.partition(":") if ":" in token and not token.startswith('"') else ("", "", token)
+    value = value.strip('"')
+    if field and field not in FIELDS:
+        raise QueryError(f"Unknown field {field!r}; expected one of {', '.join(FIELDS)}")
+    alternatives = [field_terms(f, value) for f in ([field] if field else FIELDS)]
+    alternatives = [terms for terms in alternatives if terms]
+    if not alternatives:
+        raise QueryError(f"Empty search term {token!r}")
+    return ("terms", alternatives)
+
+
+def parse_query(query):
+    """Parse a boolean query (AND, OR, NOT, parentheses, field:term) into an AST"""
+    tokens = _tokenize(query)
+    if not tokens:
+        raise QueryError("Empty query")
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def take():
+        nonlocal position
+        position += 1
+        return tokens[position - 1]
+
+    def parse_or():
+        node = parse_and()
+        while peek() == "OR":
+            take()
+            node = ("or", node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() not in (None, ")", "OR"):
+            if peek() == "AND":
+                take()
+            node = ("and", node, parse_not())
+        return node
+
+    def parse_not():
+        if peek() == "NOT":
+            take()
+            return ("not", parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        token = take() if peek() is not None else None
+        if token is None:
+            raise QueryError("Query ends unexpectedly")
+        if token == "(":
+            node = parse_or()
+            if peek() != ")":
+                raise QueryError("Missing closing parenthesis")
+            take()
+            return node
+        if token in (")", "AND", "OR"):
+            raise QueryError(f"Unexpected {token!r}")
+        return _term_node(token)
+
+    node = parse_or()
+    if peek() is not None:
+        raise QueryError(f"Unexpected {peek()!r}")
+    return node
+
+
+def positive_terms(node):
+    """Terms that count towards the score (everything not under NOT)"""
+    kind = node[0]
+    if kind == "terms":
+        return {term for alternative in node[1] for term in alternative}
+    if kind == "not":
+        return set()
+    return positive_terms(node[1]) | positive_terms(node[2])
+
+
+def _bits(ids):
+    bitmap = 0
+    for candidate_id in ids:
+        bitmap |= 1 << candidate_id
+    return bitmap
+
+
+def _iter_bits(bitmap):
+    """Set bit positions of ``bitmap``, lowest first"""
+    while bitmap:
+        lowest = bitmap & -bitmap
+        yield lowest.bit_length() - 1
+        bitmap ^= lowest
+
+
+class CandidateIndex:
+    """SQLite-backed record store with an in-memory inverted index.
+
+    Postings of frequent terms are kept as bitmaps (Python ints, bit = candidate
+    id) and those of rare terms as sets; a term switches to a bitmap once the
+    bitmap is no larger than the set would be (about ``df * 400 > ids`` bits).
+    Boolean queries are evaluated as bitwise AND/OR/AND-NOT over bitmaps.
+    """
+
+    def __init__(self, path=SEARCH_DB, change_log_keep=SEARCH_CHANGE_LOG_KEEP):
+        self.path = path
+        self.change_log_keep = change_log_keep
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.postings = {}
+        self.df = {}
+        self.live = 0
+        self.max_id = 0
+        self.seq = 0
+        self.reloads = 0
+        self.changes_applied = 0
+        # Read before loading, so a write landing during the load is picked up by the next refresh
+        self.data_version = self._data_version()
+        self._load()
+
+    def _data_version(self):
+        return self.connection.execute("PRAGMA data_version").fetchone()[0]
+
+    def _refresh(self):
+        """Apply the changes other connections (other processes) committed since the last check"""
+        version = self._data_version()
+        if version == self.data_version:
+            return
+        self.data_version = version
+        rows = self.connection.execute("SELECT seq, op, candidate_id, terms FROM changes WHERE seq > ? ORDER BY seq",
+                                       (self.seq,)).fetchall()
+        # Sequence numbers have no gaps, so a first row past the next one means rows were compacted away
+        if rows and rows[0][0] != self.seq + 1:
+            self._load()
+            self.reloads += 1
+            return
+        for seq, op, candidate_id, terms in rows:
+            self._apply(op, candidate_id, terms.split("\n") if terms else [])
+            self.seq = seq
+            self.changes_applied += 1
+
+    def _load(self):
+        """Rebuild the in-memory index from the stored postings"""
+        # One read transaction, so the postings and the change log position match
+        snapshot = not self.connection.in_transaction
+        if snapshot:
+            self.connection.execute("BEGIN")
+        try:
+            self.postings = {}
+            self.df = {}
+            cursor = self.connection.cursor()
+            ids = [row[0] for row in cursor.execute("SELECT id FROM candidates")]
+            self.live = _bits(ids)
+            self.max_id = max(ids, default=0)
+            grouped = {}
+            for term, candidate_id in cursor.execute("SELECT term, candidate_id FROM postings"):
+                grouped.setdefault(term, []).append(candidate_id)
+            for term, term_ids in grouped.items():
+                self.df[term] = len(term_ids)
+                self.postings[term] = _bits(term_ids) if self._dense(len(term_ids)) else set(term_ids)
+            self.seq = cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+        finally:
+            if snapshot:
+                self.connection.commit()
+
+    def _apply(self, op, candidate_id, terms):
+        """Apply one change log row to the in-memory index"""
+        if op == "add":
+            self.max_id = max(self.max_id, candidate_id)
+            self.live |= 1 << candidate_id
+            for term in terms:
+                self._post(term, candidate_id)
+        else:
+            for term in terms:
+                self._unpost(term, candidate_id)
+            self.live &= ~(1 << candidate_id)
+
+    def _log(self, cursor, op, candidate_id, terms):
+        """Write a change to the log and apply it; the caller holds the write lock since its refresh"""
+        cursor.execute("INSERT INTO changes (op, candidate_id, terms) VALUES (?, ?, ?)",
+                       (op, candidate_id, "\n".join(terms)))
+        self.seq = cursor.lastrowid
+        if self.seq % self.change_log_keep == 0:
+            cursor.execute("DELETE FROM changes WHERE seq <= ?", (self.seq - self.change_log_keep,))
+        self._apply(op, candidate_id, terms)
+
+    def _begin_write(self):
+        """Take the database write lock, then catch up, so no other commit lands between the two"""
+        self.connection.execute("BEGIN IMMEDIATE")
+        self._refresh()
+
+    def _dense(self, df):
+        return df * 400 > self.max_id
+
+    def _post(self, term, candidate_id):
+        entry = self.postings.get(term)
+        df = self.df.get(term, 0) + 1
+        self.df[term] = df
+        if isinstance(entry, int):
+            self.postings[term] = entry | (1 << candidate_id)
+        elif entry is None:
+            self.postings[term] = {candidate_id}
+        else:
+            entry.add(candidate_id)
+            if self._dense(df):
+                self.postings[term] = _bits(entry)
+
+    def _unpost(self, term, candidate_id):
+        entry = self.postings.get(term)
+        if entry is None:
+            return
+        self.df[term] -= 1
+        if not self.df[term]:
+            del self.df[term], self.postings[term]
+        elif isinstance(entry, int):
+            self.postings[term] = entry & ~(1 << candidate_id)
+        else:
+            entry.discard(candidate_id)
+
+    def _remove(self, cursor, candidate_id):
+        terms = [term for (term,) in cursor.execute("SELECT term FROM postings WHERE candidate_id = ?", (candidate_id,))]
+        cursor.execute("DELETE FROM postings WHERE candidate_id = ?", (candidate_id,))
+        if cursor.execute("DELETE FROM candidates WHERE id = ?", (candidate_id,)).rowcount:
+            self._log(cursor, "remove", candidate_id, terms)
+
+    def add(self, candidate, upload_id=None):
+        """Store a Candidate and index it; re-adding an ``upload_id`` replaces the earlier record"""
+        terms = candidate_terms(candidate)
+        with self.lock, self.connection:
+            self._begin_write()
+            cursor = self.connection.cursor()
+            if upload_id is not None:
+                row = cursor.execute("SELECT id FROM candidates WHERE upload_id = ?", (upload_id,)).fetchone()
+                if row:
+                    self._remove(cursor, row[0])
+            cursor.execute("INSERT INTO candidates (upload_id, name, data, created) VALUES (?, ?, ?, ?)",
+                           (upload_id, candidate.name, dumps(candidate), time.time()))
+            candidate_id = cursor.lastrowid
+            cursor.executemany("INSERT INTO postings (term, candidate_id) VALUES (?, ?)",
+                               [(term, candidate_id) for term in terms])
+            self._log(cursor, "add", candidate_id, terms)
+        return candidate_id
+
+    def remove(self, candidate_id):
+        with self.lock, self.connection:
+            self._begin_write()
+            self._remove(self.connection.cursor(), candidate_id)
+
+    def count(self):
+        with self.lock:
+            self._refresh()
+            return self.live.bit_count()
+
+    def _term_bits(self, term):
+        entry = self.postings.get(term)
+        if entry is None:
+            return 0
+        return entry if isinstance(entry, int) else _bits(entry)
+
+    def _evaluate(self, node):
+        """Bitmap of the candidates matched by a query AST"""
+        kind = node[0]
+        if kind == "terms":
+            matched = 0
+            for terms in node[1]:
+                alternative = self.live
+                for term in terms:
+                    alternative &= self._term_bits(term)
+                matched |= alternative
+            return matched
+        if kind == "not":
+            return self.live & ~self._evaluate(node[1])
+        if kind == "and" and node[2][0] == "not":
+            return self._evaluate(node[1]) & ~self._evaluate(node[2][1])
+        left = self._evaluate(node[1])
+        right = self._evaluate(node[2])
+        return left & right if kind == "and" else left | right
+
+    def search(self, query, mode="boolean", limit=20, offset=0):
+        """Run a query; returns {"total", "results": [{"id", "upload_id", "name", "score", "candidate"}]}"""
+        if mode not in ("boolean", "ranked"):
+            raise QueryError(f"Unknown mode {mode!r}; expected boolean or ranked")
+        node = parse_query(query)
+        with self.lock:
+            self._refresh()
+            total_docs = self.live.bit_count()
+            weighted = [(term, math.log(1 + total_docs / self.df[term]), self._term_bits(term))
+                        for term in sorted(positive_terms(node)) if self.df.get(term)]
+            if mode == "boolean":
+                matched = self._evaluate(node)
+            else:
+                matched = 0
+                for _, _, bits in weighted:
+                    matched |= bits
+            total = matched.bit_count()
+
+            # Split the matches into groups by which query terms they contain; each group shares a score
+            groups = [(matched, 0.0)]
+            for _, weight, bits in sorted(weighted, key=lambda item: -item[1]):
+                split = []
+                for members, score in groups:
+                    inside, outside = members & bits, members & ~bits
+                    if inside:
+                        split.append((inside, score + weight))
+                    if outside:
+                        split.append((outside, score))
+                groups = split
+            groups.sort(key=lambda group: -group[1])
+
+            page, skip = [], offset
+            for members, score in groups:
+                if len(page) >= limit:
+                    break
+                count = members.bit_count()
+                if skip >= count:
+                    skip -= count
+                    continue
+                for candidate_id in _iter_bits(members):
+                    if skip:
+                        skip -= 1
+                        continue
+                    page.append((candidate_id, score))
+                    if len(page) >= limit:
+                        break
+
+            results = []
+            cursor = self.connection.cursor()
+            for candidate_id, score in page:
+                upload_id, name, data = cursor.execute(
+                    "SELECT upload_id, name, data FROM candidates WHERE id = ?", (candidate_id,)).fetchone()
+                results.append({"id": candidate_id, "upload_id": upload_id, "name": name,
+                                "score": round(score, 4), "candidate": loads(data)})
+        return {"total": total, "results": results}
+
+    def stats(self):
+        with self.lock:
+            self._refresh()
+            return {
+                "candidates": self.live.bit_count(),
+                "terms": len(self.df),
+                "bitmap_terms": sum(isinstance(entry, int) for entry in self.postings.values()),
+                "changes_applied": self.changes_applied,
+                "reloads": self.reloads,
+            }
@@ -0,0 +1,356 @@
+"""Structured patches for component edits.
+
+Rewriting a whole component costs as many output tokens as the component has,
+even to change one word, and the model tends to drift the markup. In patch
+mode ``/modify-component`` sends the component with every element numbered
+(``data-pid``) and asks for a compact JSON patch instead::
+
+    {"ops": [
+        {"op": "replace_text", "node": 3, "find": "Backend Developer", "replace": "Platform Engineer"},
+        {"op": "set_text", "node": 4, "text": "Led a team of five"},
+        {"op": "set_attr", "node": 2, "name": "href", "value": "https://example.com"},
+        {"op": "remove_attr", "node": 2, "name": "title"},
+        {"op": "add_class", "node": 0, "class": "highlight"},
+        {"op": "remove_class", "node": 0, "class": "muted"},
+        {"op": "insert", "node": 5, "position": "append", "html": "<li>Kafka</li>"},
+        {"op": "remove", "node": 6}
+    ]}
+
+``apply_patch`` applies it to a fresh parse of the original ``component_html``
+and validates the result: every node id and ``find`` text must exist,
+inserted HTML must be well formed, no scripts or event handler attributes may
+be introduced (including iframes, embeds and non-http(s)/mailto/tel URLs),
+no op may target a node an earlier op removed, and the root element keeps
+its tag and ``data-component``.
+Any failure raises ``PatchError`` and the caller falls back to regenerating
+the full HTML.
+"""
+import html
+import os
+import re
+import threading
+from html.parser import HTMLParser
+
+from resume_repair import parse_json_object
+
+# "patch" asks for a patch first and regenerates the full HTML only when it fails; "full" always regenerates
+COMPONENT_EDIT_MODE = os.getenv("COMPONENT_EDIT_MODE", "patch")
+PATCH = "patch"
+FULL = "full"
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+RAW_TEXT_TAGS = {"script", "style"}
+POSITIONS = ("append", "prepend", "before", "after")
+PID = "data-pid"
+
+_EVENT_ATTR = re.compile(r"^on", re.I)
+# Browsers drop ASCII whitespace and control characters inside a URL scheme ("java\tscript:")
+_URL_IGNORED = re.compile(r"[\x00-\x20\x7f]+")
+_URL_SCHEME = re.compile(r"^([a-z][a-z0-9+.-]*):", re.I)
+
+# Elements and attributes a patch may never add: they run script or embed other documents
+UNSAFE_TAGS = {"script", "style", "iframe", "frame", "frameset", "object", "embed", "applet",
+               "base", "meta", "link", "svg", "math", "template"}
+UNSAFE_ATTRS = {"srcdoc"}
+URL_ATTRS = {"href", "src", "action", "formaction", "poster", "data", "cite", "background", "ping",
+             "xlink:href", "srcset"}
+URL_SCHEMES = {"http", "https", "mailto", "tel"}
+
+PATCH_INSTRUCTIONS = """Return only a JSON object {"ops": [...]} that edits the component; do not return HTML.
+Elements are numbered with data-pid; refer to them by that number as "node". Operations:
+- {"op": "replace_text", "node": N, "find": "exact text", "replace": "new text"}
+- {"op": "set_text", "node": N, "text": "new text"}   (replaces all content of the element)
+- {"op": "set_attr", "node": N, "name": "attribute", "value": "value"}
+- {"op": "remove_attr", "node": N, "name": "attribute"}
+- {"op": "add_class", "node": N, "class": "name"} / {"op": "remove_class", "node": N, "class": "name"}
+- {"op": "insert", "node": N, "position": "append|prepend|before|after", "html": "<tag>...</tag>"}
+- {"op": "remove", "node": N}
+Use as few operations as possible and keep the existing structure and CSS classes.
+If the instructions need the component rebuilt from scratch, return {"ops": [], "rewrite": true}."""
+
+
+class PatchError(ValueError):
+    """The patch cannot be applied to the component or produces invalid markup"""
+
+
+class Text:
+    def __init__(self, data):
+        self.data = data
+        self.parent = None
+
+
+class Comment(Text):
+    pass
+
+
+class Element:
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = [list(pair) for pair in attrs]
+        self.children = []
+        self.parent = None
+
+    def get(self, name):
+        return next((value for key, value in self.attrs if key == name), None)
+
+    def set(self, name, value):
+        for pair in self.attrs:
+            if pair[0] == name:
+                pair[1] = value
+                return
+        self.attrs.append([name, value])
+
+    def remove(self, name):
+        self.attrs = [pair for pair in self.attrs if pair[0] != name]
+
+    def append(self, node, index=None):
+        node.parent = self
+        if index is None:
+            self.children.append(node)
+        else:
+            self.children.insert(index, node)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self, strict):
+        super().__init__(convert_charrefs=True)
+        self.strict = strict
+        self.root = Element("#fragment", [])
+        self.stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        element = Element(tag, attrs)
+        self.stack[-1].append(element)
+        if tag not in VOID_TAGS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.stack[-1].append(Element(tag, attrs))
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        for depth in range(len(self.stack) - 1, 0, -1):
+            if self.stack[depth].tag == tag:
+                if self.strict and depth != len(self.stack) - 1:
+                    raise PatchError(f"</{tag}> closes unclosed <{self.stack[-1].tag}>")
+                del self.stack[depth:]
+                return
+        if self.strict:
+            raise PatchError(f"Unexpected </{tag}>")
+
+    def handle_data(self, data):
+        self.stack[-1].append(Text(data))
+
+    def handle_comment(self, data):
+        self.stack[-1].append(Comment(data))
+
+
+def parse_fragment(markup, strict=False):
+    """Nodes of an HTML fragment, under a ``#fragment`` element"""
+    builder = _TreeBuilder(strict)
+    builder.feed(markup)
+    builder.close()
+    if strict and len(builder.stack) > 1:
+        raise PatchError(f"Unclosed <{builder.stack[-1].tag}>")
+    return builder.root
+
+
+def parse_component(markup):
+    """The single root element of a component"""
+    fragment = parse_fragment(markup)
+    elements = [node for node in fragment.children if isinstance(node, Element)]
+    others = [node for node in fragment.children if isinstance(node, Text) and not isinstance(node, Comment)
+              and node.data.strip()]
+    if len(elements) != 1 or others:
+        raise PatchError("The component must have exactly one root element")
+    return elements[0]
+
+
+def elements(root):
+    """Elements in document order; the index is the element's data-pid"""
+    found, stack = [], [root]
+    while stack:
+        node = stack.pop()
+        found.append(node)
+        stack.extend(reversed([child for child in node.children if isinstance(child, Element)]))
+    return found
+
+
+def serialize(node):
+    if isinstance(node, Comment):
+        return f"<!--{node.data}-->"
+    if isinstance(node, Text):
+        raw = node.parent is not None and node.parent.tag in RAW_TEXT_TAGS
+        return node.data if raw else html.escape(node.data, quote=False)
+    if node.tag == "#fragment":
+        return "".join(serialize(child) for child in node.children)
+    attrs = "".join(f" {key}" if value is None else f' {key}="{html.escape(value, quote=True)}"'
+                    for key, value in node.attrs)
+    if node.tag in VOID_TAGS:
+        return f"<{node.tag}{attrs}>"
+    return f"<{node.tag}{attrs}>{''.join(serialize(child) for child in node.children)}</{node.tag}>"
+
+
+def annotate(markup):
+    """The component with a data-pid on every element, as sent to the model"""
+    root = parse_component(markup)
+    for pid, element in enumerate(elements(root)):
+        element.set(PID, str(pid))
+    return serialize(root)
+
+
+def _safe_url(value):
+    """Relative URLs, fragments and the URL_SCHEMES only"""
+    match = _URL_SCHEME.match(_URL_IGNORED.sub("", value))
+    return match is None or match.group(1).lower() in URL_SCHEMES
+
+
+def _check_safe(element):
+    for node in elements(element):
+        if node.tag in UNSAFE_TAGS:
+            raise PatchError(f"Patches may not add <{node.tag}>")
+        for key, value in node.attrs:
+            key, value = key.lower(), value or ""
+            if _EVENT_ATTR.match(key) or key in UNSAFE_ATTRS:
+                raise PatchError(f"Patches may not add the {key} attribute")
+            urls = [part.split()[0] for part in value.split(",") if part.split()] if key == "srcset" else [value]
+            if key in URL_ATTRS and not all(_safe_url(url) for url in urls):
+                raise PatchError(f"Patches may not set {key} to {value!r}")
+            if key == "style" and re.search(r"javascript:|expression\(", _URL_IGNORED.sub("", value), re.I):
+                raise PatchError(f"Patches may not set style to {value!r}")
+
+
+def _node(nodes, op):
+    try:
+        node = nodes[int(op["node"])]
+    except (KeyError, ValueError, TypeError, IndexError):
+        raise PatchError(f"Unknown node in {op}")
+    # Removed subtrees are detached, so their nodes no longer reach the root
+    ancestor = node
+    while ancestor.parent is not None:
+        ancestor = ancestor.parent
+    if ancestor is not nodes[0].parent:
+        raise PatchError(f"Node {op['node']} was removed by an earlier op")
+    return node
+
+
+def _detach(node):
+    node.parent.children.remove(node)
+    node.parent = None
+
+
+def _apply(nodes, op):
+    kind = op.get("op")
+    node = _node(nodes, op)
+    if kind == "replace_text":
+        find, replace = op.get("find"), op.get("replace")
+        if not isinstance(find, str) or not find or not isinstance(replace, str):
+            raise PatchError(f"replace_text needs find and replace: {op}")
+        texts = [child for child in node.children if type(child) is Text and find in child.data]
+        if not texts:
+            raise PatchError(f"Text {find!r} not found in node {op['node']}")
+        texts[0].data = texts[0].data.replace(find, replace, 1)
+    elif kind == "set_text":
+        if not isinstance(op.get("text"), str):
+            raise PatchError(f"set_text needs text: {op}")
+        for child in list(node.children):
+            _detach(child)
+        node.append(Text(op["text"]))
+    elif kind == "set_attr":
+        name, value = op.get("name"), op.get("value")
+        if not isinstance(name, str) or not re.fullmatch(r"[A-Za-z_:][-A-Za-z0-9_:.]*", name) or name == PID:
+            raise PatchError(f"Invalid attribute name in {op}")
+        probe = Element(node.tag, [[name, str(value)]])
+        _check_safe(probe)
+        node.set(name, str(value))
+    elif kind == "remove_attr":
+        node.remove(op.get("name"))
+    elif kind in ("add_class", "remove_class"):
+        name = op.get("class")
+        if not isinstance(name, str) or not name.strip() or " " in name.strip():
+            raise PatchError(f"{kind} needs one class name: {op}")
+        classes = (node.get("class") or "").split()
+        if kind == "add_class" and name not in classes:
+            classes.append(name)
+        elif kind == "remove_class":
+            classes = [c for c in classes if c != name]
+        node.set("class", " ".join(classes))
+    elif kind == "insert":
+        position = op.get("position", "append")
+        if position not in POSITIONS or not isinstance(op.get("html"), str):
+            raise PatchError(f"insert needs html and a position in {POSITIONS}: {op}")
+        fragment = parse_fragment(op["html"], strict=True)
+        _check_safe(fragment)
+        new_nodes = list(fragment.children)
+        if position in ("before", "after"):
+            if node.parent is None or node.parent.tag == "#fragment":
+                raise PatchError("Cannot insert next to the component root")
+            parent, index = node.parent, node.parent.children.index(node) + (position == "after")
+        else:
+            parent, index = node, (0 if position == "prepend" else len(node.children))
+        for offset, new_node in enumerate(new_nodes):
+            parent.append(new_node, index + offset)
+    elif kind == "remove":
+        if node.parent is None or node.parent.tag == "#fragment":
+            raise PatchError("Cannot remove the component root")
+        _detach(node)
+    else:
+        raise PatchError(f"Unknown op {kind!r}")
+
+
+def parse_patch(reply):
+    """The patch object in a model reply; raises PatchError"""
+    try:
+        patch = parse_json_object(reply)
+    except ValueError as e:
+        raise PatchError(str(e))
+    if not isinstance(patch.get("ops"), list):
+        raise PatchError("The patch has no ops list")
+    return patch
+
+
+def apply_patch(component_html, patch):
+    """The component after applying ``patch``; raises PatchError if it does not apply cleanly"""
+    root = parse_component(component_html)
+    identity = (root.tag, root.get("data-component"))
+    # Node ids refer to the original numbering, even after earlier ops moved things
+    nodes = elements(root)
+    for op in patch["ops"]:
+        if not isinstance(op, dict):
+            raise PatchError(f"Invalid op {op!r}")
+        _apply(nodes, op)
+    result = serialize(root)
+    check = parse_component(result)
+    if (check.tag, check.get("data-component")) != identity:
+        raise PatchError("The patch changed the component root")
+    return result
+
+
+class EditStats:
+    """How component edits were answered and how much output each mode cost"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.edits = {PATCH: 0, FULL: 0}
+        self.reply_chars = {PATCH: 0, FULL: 0}
+        self.component_chars = {PATCH: 0, FULL: 0}
+        self.fallbacks = {}
+
+    def record(self, mode, component_html, reply_chars, fallback=None):
+        with self.lock:
+            self.edits[mode] += 1
+            self.reply_chars[mode] += reply_chars
+            self.component_chars[mode] += len(component_html)
+            if fallback:
+                self.fallbacks[fallback] = self.fallbacks.get(fallback, 0) + 1
+
+    def stats(self):
+        with self.lock:
+            return {
+                "edits": dict(self.edits),
+                "fallbacks": dict(self.fallbacks),
+                # Model output per edit as a share of the component it edited
+                "output_ratio": {mode: round(self.reply_chars[mode] / self.component_chars[mode], 3)
+                                 for mode in self.edits if self.component_chars[mode]},
+            }
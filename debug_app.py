@@ -2,13 +2,12 @@ import pdfplumber
 import os
 from dotenv import load_dotenv
 from groq import Groq
-from typing import List
 import json
-from pydantic import BaseModel
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import uuid
 import traceback
+from resume_model import Candidate, dumps
 
 # Load environment variables
 load_dotenv()
@@ -41,41 +40,6 @@ except Exception as e:
 
 print("=== END ENVIRONMENT DEBUG ===\n")
 
-class Project(BaseModel):
-    project_name: str
-    about_project: str
-    skills_used: list[str]
-
-class Achivements(BaseModel):
-    Achivement_name: str
-    institute_name: str
-    about: str
-
-class Experience(BaseModel):
-    Position_name: str
-    Company_name: str
-    skills_used: list[str]
-
-class Education(BaseModel):
-    Institute_name: str
-    Degree_name: str
-    marks: str
-
-class Position_of_Responsibility(BaseModel):
-    Position_name: str
-    Society_name: str
-    Description: str
-
-class Candidate(BaseModel):
-    name: str
-    Education: List[Education]
-    Projects: List[Project]
-    Experience: List[Experience]
-    Achivements: List[Achivements]
-    Skills: List[str]
-    Position_of_Responsibility: List[Position_of_Responsibility]
-    Contact_Info: dict
-
 def test_groq_connection():
     """Test GROQ API connection with a simple request"""
     try:
@@ -259,55 +223,13 @@ def upload_pdf():
                 
                 # Step 6: Build response
                 print("STEP 6: Building response...")
-                candidate_name = info.name
-                print(f"   Candidate name: {candidate_name}")
-
-                skill_list = [skill for skill in info.Skills]
-                education_json = [{
-                    "Institute_name": edu.Institute_name, 
-                    "Degree_name": edu.Degree_name, 
-                    "Marks": edu.marks
-                } for edu in info.Education]
-                
-                experience_json = [{
-                    "Company": exp.Company_name, 
-                    "Position": exp.Position_name, 
-                    "Skills": list(exp.skills_used)
-                } for exp in info.Experience]
-                
-                achievement_json = [{
-                    "achievement_name": achievement.Achivement_name, 
-                    "institute_name": achievement.institute_name, 
-                    "description": achievement.about
-                } for achievement in info.Achivements]
-                
-                position_of_responsibility_json = [{
-                    "position_name": responsibility.Position_name, 
-                    "soc_name": responsibility.Society_name, 
-                    "description": responsibility.Description
-                } for responsibility in info.Position_of_Responsibility]
-                
-                project_json = [{
-                    "title": project.project_name, 
-                    "desc": project.about_project, 
-                    "tech": list(project.skills_used)
-                } for project in info.Projects]
-
-                data = {
-                    "name": candidate_name,
-                    "education": education_json,
-                    "Contact_Info": info.Contact_Info,
-                    "skills": skill_list,
-                    "projects": project_json,
-                    "Experience": experience_json,
-                    "Achievements": achievement_json,
-                    "Position_of_responsibility": position_of_responsibility_json
-                }
-                
+                print(f"   Candidate name: {info.name}")
+                body = dumps(info)
                 print("✅ Response data structure created successfully")
-                print(f"   Response keys: {list(data.keys())}")
+                print(f"   Response keys: {list(Candidate.model_fields)}")
+                print(f"   Response size: {len(body)} bytes")
                 print("✅ REQUEST COMPLETED SUCCESSFULLY")
-                return jsonify(data)
+                return Response(body, mimetype='application/json')
                 
             except Exception as ai_error:
                 print(f"❌ ERROR in AI processing: {ai_error}")
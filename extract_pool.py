@@ -0,0 +1,351 @@
+"""PDF text extraction in a pool of dedicated worker processes.
+
+pdfplumber builds large per-character object graphs, and the memory a
+pathological PDF pulls in is not reliably returned to the OS. Running
+extraction in the web worker makes its RSS creep until it is OOM-killed, so
+``ExtractionPool`` hands every PDF to a separate process instead:
+
+- each worker is a plain ``python extract_pool.py`` subprocess speaking JSON
+  lines over its stdin/stdout, so it never imports the web app;
+- before each task the worker caps its address space at its current size plus
+  ``EXTRACT_MEMORY_LIMIT_MB`` and its CPU time at ``EXTRACT_CPU_TIMEOUT``
+  seconds; hitting either fails that task and the worker exits;
+- the parent kills a worker that has not answered after ``EXTRACT_WALL_TIMEOUT``
+  seconds, and replaces one that crashed;
+- a worker is recycled after ``EXTRACT_MAX_TASKS_PER_CHILD`` tasks.
+
+Each task reports the worker's resident memory before and after and its peak
+during the task; recent figures and the parent's own RSS are in ``stats()``.
+``EXTRACT_WORKERS=0`` extracts in-process, as before. So does a platform
+without the POSIX resource limits and pipe polling the workers rely on
+(Windows), with a warning at startup.
+"""
+import json
+import os
+import queue
+import select
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from request_deadline import POLL_INTERVAL, RequestCancelled, counters
+
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "2"))
+EXTRACT_MAX_TASKS_PER_CHILD = int(os.getenv("EXTRACT_MAX_TASKS_PER_CHILD", "20"))
+EXTRACT_MEMORY_LIMIT_MB = int(os.getenv("EXTRACT_MEMORY_LIMIT_MB", "512"))
+EXTRACT_CPU_TIMEOUT = int(os.getenv("EXTRACT_CPU_TIMEOUT", "20"))
+EXTRACT_WALL_TIMEOUT = float(os.getenv("EXTRACT_WALL_TIMEOUT", "60"))
+
+# Per-task memory figures kept for the percentiles
+TASK_SAMPLES = 200
+
+# Workers need rlimits and SIGXCPU, and select() on pipes, which Windows lacks
+WORKERS_SUPPORTED = resource is not None and hasattr(signal, "SIGXCPU") and os.name == "posix"
+
+
+class ExtractionError(Exception):
+    def __init__(self, message, status=422, reason="failed"):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+
+
+def _proc_status_kb(field, pid="self"):
+    """A ``Vm*`` field of /proc/<pid>/status in KiB, or None where /proc is unavailable"""
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def _mb(kb):
+    return None if kb is None else round(kb / 1024, 1)
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class _Worker:
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        self.tasks = 0
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def request(self, task, timeout, request_deadline=None):
+        """Send one task and wait for its reply; None if the worker died or timed out.
+
+        Raises RequestCancelled, leaving the worker running, if the request is cancelled while waiting.
+        """
+        self.process.stdin.write((json.dumps(task) + "\n").encode("utf-8"))
+        self.process.stdin.flush()
+        expires = time.monotonic() + timeout
+        while True:
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                return None
+            wait = remaining if request_deadline is None else min(remaining, POLL_INTERVAL)
+            ready, _, _ = select.select([self.process.stdout], [], [], wait)
+            if ready:
+                break
+            if request_deadline is not None and request_deadline.cancelled():
+                request_deadline.check("extraction")
+        line = self.process.stdout.readline()
+        return json.loads(line) if line else None
+
+    def stop(self, kill=False):
+        if self.alive():
+            if kill:
+                self.process.kill()
+            else:
+                self.process.stdin.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class ExtractionPool:
+    def __init__(self, workers=EXTRACT_WORKERS, max_tasks_per_child=EXTRACT_MAX_TASKS_PER_CHILD,
+                 memory_limit_mb=EXTRACT_MEMORY_LIMIT_MB, cpu_timeout=EXTRACT_CPU_TIMEOUT,
+                 wall_timeout=EXTRACT_WALL_TIMEOUT):
+        if workers > 0 and not WORKERS_SUPPORTED:
+            print("WARNING: extraction worker processes are not supported on this platform; "
+                  "extracting PDFs in-process without memory or CPU limits")
+            workers = 0
+        self.size = workers
+        self.max_tasks_per_child = max(1, max_tasks_per_child)
+        self.memory_limit_mb = memory_limit_mb
+        self.cpu_timeout = cpu_timeout
+        self.wall_timeout = wall_timeout
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(max(1, workers))
+        self.lock = threading.Lock()
+        self.started = 0
+        self.recycled = 0
+        self.tasks = 0
+        self.failures = {}
+        self.peaks = deque(maxlen=TASK_SAMPLES)
+        self.growth = deque(maxlen=TASK_SAMPLES)
+
+    def extract(self, path, max_pages=None, extractor=None, request_deadline=None):
+        """Text of the PDF at ``path`` and the task's stats; raises ExtractionError.
+
+        With a ``request_deadline``, a cancelled request stops waiting for a worker, and a running
+        extraction is stopped by killing its worker (RequestCancelled).
+        """
+        if self.size <= 0:
+            from pdf_extract import extract_text, get_extractor, PDF_EXTRACT_PAGES
+            pages = max_pages or PDF_EXTRACT_PAGES
+            started = time.perf_counter()
+            text = get_extractor(extractor).extract(path, pages) if extractor else extract_text(path, pages)
+            return text, {"in_process": True, "wall_s": round(time.perf_counter() - started, 3)}
+
+        task = {
+            "path": os.path.abspath(path),
+            "max_pages": max_pages,
+            "extractor": extractor,
+            "memory_limit_mb": self.memory_limit_mb,
+            "cpu_timeout": self.cpu_timeout,
+        }
+        self._acquire(request_deadline)
+        try:
+            worker = self._checkout()
+            try:
+                reply = worker.request(task, self.wall_timeout, request_deadline)
+            except (OSError, ValueError):
+                reply = None
+            except RequestCancelled:
+                worker.stop(kill=True)
+                counters.skip("extractions")
+                raise
+            worker.tasks += 1
+            if reply is None:
+                timed_out = worker.alive()
+                worker.stop(kill=True)
+                reason = "wall_timeout" if timed_out else "crashed"
+                self._failed(reason)
+                raise ExtractionError(
+                    f"PDF extraction {'timed out' if timed_out else 'failed'}; the file may be too complex",
+                    reason=reason)
+            if reply.get("exit") or worker.tasks >= self.max_tasks_per_child:
+                worker.stop()
+                with self.lock:
+                    self.recycled += 1
+            else:
+                self.idle.put(worker)
+        finally:
+            self.slots.release()
+
+        stats = reply["stats"]
+        with self.lock:
+            self.tasks += 1
+            if stats.get("peak_rss_kb") is not None:
+                self.peaks.append(stats["peak_rss_kb"])
+            if stats.get("rss_after_kb") is not None and stats.get("rss_before_kb") is not None:
+                self.growth.append(stats["rss_after_kb"] - stats["rss_before_kb"])
+        print(f"PDF extraction in worker {stats['pid']}: {stats['wall_s']}s wall, {stats['cpu_s']}s CPU, "
+              f"RSS {_mb(stats['rss_before_kb'])} -> {_mb(stats['rss_after_kb'])} MB, "
+              f"peak {_mb(stats['peak_rss_kb'])} MB")
+        if not reply["ok"]:
+            self._failed(reply["reason"])
+            raise ExtractionError(reply["error"], reason=reply["reason"])
+        return reply["text"], stats
+
+    def _acquire(self, request_deadline):
+        if request_deadline is None:
+            self.slots.acquire()
+            return
+        while not self.slots.acquire(timeout=POLL_INTERVAL):
+            if request_deadline.cancelled():
+                counters.skip("extractions")
+                request_deadline.check("extraction_queue")
+
+    def _checkout(self):
+        while True:
+            try:
+                worker = self.idle.get_nowait()
+            except queue.Empty:
+                with self.lock:
+                    self.started += 1
+                return _Worker()
+            if worker.alive():
+                return worker
+            worker.stop()
+
+    def _failed(self, reason):
+        with self.lock:
+            self.failures[reason] = self.failures.get(reason, 0) + 1
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().stop()
+            except queue.Empty:
+                return
+
+    def stats(self):
+        with self.lock:
+            peaks = list(self.peaks)
+            growth = list(self.growth)
+            return {
+                "workers": self.size,
+                "idle": self.idle.qsize(),
+                "started": self.started,
+                "recycled": self.recycled,
+                "tasks": self.tasks,
+                "failures": dict(self.failures),
+                "max_tasks_per_child": self.max_tasks_per_child,
+                "memory_limit_mb": self.memory_limit_mb,
+                "task_peak_rss_p50_mb": _mb(_percentile(peaks, 50)),
+                "task_peak_rss_p95_mb": _mb(_percentile(peaks, 95)),
+                "task_peak_rss_max_mb": _mb(max(peaks) if peaks else None),
+                "task_rss_growth_p95_mb": _mb(_percentile(growth, 95)),
+                "web_rss_mb": _mb(_proc_status_kb("VmRSS")),
+            }
+
+
+class _CPUTimeout(Exception):
+    pass
+
+
+def _on_cpu_limit(signum, frame):
+    raise _CPUTimeout()
+
+
+def _reset_peak_rss():
+    """Start a new VmHWM measurement for this task (Linux only)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _run_task(task, extractors, get_extractor, default_pages):
+    name = task.get("extractor")
+    if name not in extractors:
+        extractors[name] = get_extractor(name)
+    size_kb = _proc_status_kb("VmSize")
+    _, hard_as = resource.getrlimit(resource.RLIMIT_AS)
+    if size_kb is not None:
+        limit = (size_kb + task["memory_limit_mb"] * 1024) * 1024
+        if hard_as != resource.RLIM_INFINITY:
+            limit = min(limit, hard_as)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard_as))
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_before = usage.ru_utime + usage.ru_stime
+    _, hard_cpu = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (int(cpu_before) + 1 + task["cpu_timeout"], hard_cpu))
+    try:
+        text = extractors[name].extract(task["path"], max_pages=task.get("max_pages") or default_pages)
+        return {"ok": True, "text": text}
+    except MemoryError:
+        return {"ok": False, "reason": "memory", "exit": True,
+                "error": f"PDF extraction needed more than {task['memory_limit_mb']} MB"}
+    except _CPUTimeout:
+        return {"ok": False, "reason": "cpu_timeout", "exit": True,
+                "error": f"PDF extraction took more than {task['cpu_timeout']}s of CPU"}
+    except Exception as e:
+        return {"ok": False, "reason": "failed", "error": f"Could not extract text from PDF: {str(e)}"}
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard_cpu, hard_cpu))
+        resource.setrlimit(resource.RLIMIT_AS, (hard_as, hard_as))
+
+
+def worker_main():
+    """Serve extraction tasks from stdin until it closes, the task budget runs out or a limit is hit"""
+    # Anything printed by the extractors must not corrupt the reply channel
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    sys.stdout = sys.stderr
+    signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    from pdf_extract import get_extractor, PDF_EXTRACT_PAGES
+    extractors = {}
+    for line in sys.stdin:
+        task = json.loads(line)
+        rss_before = _proc_status_kb("VmRSS")
+        _reset_peak_rss()
+        started = time.perf_counter()
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        cpu_before = usage.ru_utime + usage.ru_stime
+        reply = _run_task(task, extractors, get_extractor, PDF_EXTRACT_PAGES)
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        reply["stats"] = {
+            "pid": os.getpid(),
+            "wall_s": round(time.perf_counter() - started, 3),
+            "cpu_s": round(usage.ru_utime + usage.ru_stime - cpu_before, 3),
+            "rss_before_kb": rss_before,
+            "rss_after_kb": _proc_status_kb("VmRSS"),
+            "peak_rss_kb": _proc_status_kb("VmHWM"),
+        }
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+        if reply.get("exit"):
+            return
+
+
+if __name__ == "__main__":
+    worker_main()
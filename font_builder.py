@@ -0,0 +1,218 @@
+"""Self-hosted, per-theme web fonts for generated portfolios.
+
+Only the family used by the chosen theme is included. Each of its bundled
+font files (see ``THEME_FONTS``, stored in ``FONT_DIR``) is subset to the
+characters that actually appear on the page, converted to woff2, declared
+with ``font-display: swap`` and preloaded from the page head.
+
+The font files are not committed; fetching them is part of setup. If
+fontTools/brotli are not installed or a font file is missing, the app refuses
+to start (``require_fonts``) and building a site raises ``FontsUnavailable``.
+For local development without the files, ``FONT_FALLBACK=google`` links the
+theme's family from Google Fonts instead, with a warning logged once per
+theme. That stylesheet is loaded without blocking rendering: the page paints
+in the fallback font stack and swaps when the web font arrives.
+
+    python font_builder.py fetch     # download the bundled fonts into FONT_DIR
+    python font_builder.py check     # exit with 1 when a theme cannot self-host its fonts
+"""
+import io
+import os
+import sys
+import urllib.request
+from functools import lru_cache
+from html import unescape
+from html.parser import HTMLParser
+
+try:
+    from fontTools import subset
+except ImportError:
+    subset = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FONT_DIR = os.getenv("FONT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts"))
+FONT_SOURCE_URL = "https://github.com/google/fonts/raw/main/ofl"
+# "google" links the theme's family from Google Fonts when the bundled fonts are missing (development only)
+FONT_FALLBACK = os.getenv("FONT_FALLBACK", "")
+FONT_HEAD_MARKER = "<!-- font-faces -->"
+FONT_HEAD_END = "<!-- /font-faces -->"
+
+# family, fallback Google Fonts weights, then (file in FONT_DIR, path under FONT_SOURCE_URL, CSS weight)
+THEME_FONTS = {
+    "professional": ("Inter", "400;500;600;700", [
+        ("Inter[opsz,wght].ttf", "inter/Inter%5Bopsz,wght%5D.ttf", "100 900"),
+    ]),
+    "futuristic": ("Orbitron", "400;500;600;700", [
+        ("Orbitron[wght].ttf", "orbitron/Orbitron%5Bwght%5D.ttf", "400 900"),
+    ]),
+    "playful": ("Poppins", "400;500;600;700", [
+        ("Poppins-Regular.ttf", "poppins/Poppins-Regular.ttf", "400"),
+        ("Poppins-Medium.ttf", "poppins/Poppins-Medium.ttf", "500"),
+        ("Poppins-SemiBold.ttf", "poppins/Poppins-SemiBold.ttf", "600"),
+        ("Poppins-Bold.ttf", "poppins/Poppins-Bold.ttf", "700"),
+    ]),
+}
+
+
+class FontsUnavailable(RuntimeError):
+    """Raised when a theme's fonts cannot be self-hosted and no fallback was configured"""
+
+
+class _TextCollector(HTMLParser):
+    """Collects the text a browser would draw, skipping scripts and styles"""
+
+    def __init__(self):
+        super().__init__()
+        self.chars = set()
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.chars.update(data)
+
+
+def page_text(html):
+    """Sorted string of the distinct visible characters of a page"""
+    collector = _TextCollector()
+    collector.feed(html)
+    chars = {c for c in unescape("".join(collector.chars)) if not c.isspace()}
+    return "".join(sorted(chars)) + " "
+
+
+def missing_fonts(styles=None):
+    """What keeps the given themes (all by default) from self-hosting their fonts, as readable problems"""
+    problems = [f"{name} is not installed" for name, module in (("fontTools", subset), ("brotli", brotli))
+                if module is None]
+    for style in THEME_FONTS if styles is None else styles:
+        problems.extend(f"{name} ({style}) is missing from {FONT_DIR}" for name, _, _ in THEME_FONTS[style][2]
+                        if not os.path.exists(os.path.join(FONT_DIR, name)))
+    return problems
+
+
+def fonts_available(style):
+    return style in THEME_FONTS and not missing_fonts([style])
+
+
+def require_fonts():
+    """Raise FontsUnavailable unless every theme can self-host its fonts or ``FONT_FALLBACK`` is set"""
+    problems = missing_fonts()
+    if problems and FONT_FALLBACK != "google":
+        raise FontsUnavailable(f"Bundled fonts are unavailable: {'; '.join(problems)}. Run `python font_builder.py "
+                               "fetch` and install fontTools and brotli, or set FONT_FALLBACK=google for development")
+
+
+@lru_cache(maxsize=64)
+def subset_font(path, text):
+    """woff2 bytes of ``path`` reduced to the glyphs needed for ``text``"""
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.desubroutinize = True
+    font = subset.load_font(path, options)
+    try:
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(text=text)
+        subsetter.subset(font)
+        buffer = io.BytesIO()
+        subset.save_font(font, buffer, options)
+        return buffer.getvalue()
+    finally:
+        font.close()
+
+
+def _output_name(family, weight):
+    return f"fonts/{family.lower()}-{weight.replace(' ', '-')}.woff2"
+
+
+def _google_fonts_head(family, weights):
+    url_family = family.replace(" ", "+")
+    # media="print" keeps the stylesheet off the critical path until it has loaded
+    return ('<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
+            f'    <link href="https://fonts.googleapis.com/css2?family={url_family}:wght@{weights}&display=swap" '
+            'rel="stylesheet" media="print" onload="this.media=\'all\'">')
+
+
+# Themes already warned about falling back to Google Fonts
+_warned = set()
+
+
+def build_theme_fonts(html, style):
+    """Return the head markup and the subset font files for a rendered page.
+
+    The result is ``{"head": str, "files": {relative path: bytes}}``.
+    """
+    if style not in THEME_FONTS:
+        return {"head": "", "files": {}}
+    family, weights, faces = THEME_FONTS[style]
+    if not fonts_available(style):
+        if FONT_FALLBACK != "google":
+            raise FontsUnavailable(f"Bundled fonts for the {style} theme are unavailable: "
+                                   f"{'; '.join(missing_fonts([style]))}")
+        if style not in _warned:
+            _warned.add(style)
+            print(f"WARNING: bundled fonts for the {style} theme are unavailable; FONT_FALLBACK=google, "
+                  f"linking {family} from Google Fonts instead")
+        return {"head": _google_fonts_head(family, weights), "files": {}}
+
+    text = page_text(html)
+    files, preloads, rules = {}, [], []
+    for file_name, _, weight in faces:
+        output = _output_name(family, weight)
+        files[output] = subset_font(os.path.join(FONT_DIR, file_name), text)
+        preloads.append(f'<link rel="preload" href="{output}" as="font" type="font/woff2" crossorigin>')
+        rules.append(f"@font-face {{ font-family: '{family}'; font-style: normal; font-weight: {weight}; "
+                     f"font-display: swap; src: url('{output}') format('woff2'); }}")
+    head = "\n    ".join(preloads) + "\n    <style>\n        " + "\n        ".join(rules) + "\n    </style>"
+    return {"head": head, "files": files}
+
+
+def apply_fonts(html, style):
+    """Insert the theme's font head into a rendered page; returns (html, font files)"""
+    fonts = build_theme_fonts(html, style)
+    block = f"{FONT_HEAD_MARKER}\n    {fonts['head']}\n    {FONT_HEAD_END}"
+    return html.replace(FONT_HEAD_MARKER, block, 1), fonts["files"]
+
+
+def replace_fonts(html, style):
+    """Swap the font head of a page built by ``apply_fonts`` for another theme's; returns (html, font files)"""
+    start = html.find(FONT_HEAD_MARKER)
+    end = html.find(FONT_HEAD_END, start)
+    if start < 0 or end < 0:
+        return html, {}
+    html = html[:start] + FONT_HEAD_MARKER + html[end + len(FONT_HEAD_END):]
+    return apply_fonts(html, style)
+
+
+def fetch_fonts(font_dir=FONT_DIR):
+    """Download every bundled font file that is missing from ``font_dir``"""
+    os.makedirs(font_dir, exist_ok=True)
+    for _, _, faces in THEME_FONTS.values():
+        for file_name, source, _ in faces:
+            target = os.path.join(font_dir, file_name)
+            if os.path.exists(target):
+                continue
+            print(f"Downloading {file_name}")
+            urllib.request.urlretrieve(f"{FONT_SOURCE_URL}/{source}", target)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["fetch"]:
+        fetch_fonts()
+    elif sys.argv[1:] == ["check"]:
+        problems = missing_fonts()
+        for problem in problems:
+            print(problem)
+        sys.exit(1 if problems else 0)
+    else:
+        print("usage: python font_builder.py fetch|check")
@@ -0,0 +1,220 @@
+"""Fair, prioritized admission of LLM calls.
+
+Every Groq/Gemini call made by app.py waits for a slot from ``LLMScheduler``.
+At most ``LLM_CONCURRENCY`` calls run at once. Waiting calls are ordered by:
+
+- lane: ``interactive`` (component edits) always goes before ``bulk`` (resume
+  parsing), and ``LLM_INTERACTIVE_RESERVED`` slots are kept free for the
+  interactive lane so an edit never queues behind a full pool of bulk calls;
+- tenant, within a lane: weighted fair queuing. Each call gets a virtual finish
+  tag ``max(lane virtual time, tenant's last tag) + cost / weight`` and the
+  smallest tag runs first, so a tenant submitting a large batch only delays
+  its own calls. Weights come from ``LLM_TENANT_WEIGHTS`` (``id=2,other=0.5``).
+  A tenant's last tag is forgotten once the lane's virtual time has passed it
+  and the tenant has nothing queued, since its next call would start at the
+  virtual time anyway. When a lane goes idle its virtual time moves past every
+  tag, so only tenants active since then are kept.
+
+A call its request abandoned (``request_deadline``) keeps its slot until the
+provider actually returns, so cancellations never push the real number of
+calls in flight above ``LLM_CONCURRENCY``; ``abandoned`` in the stats counts
+the slots held that way.
+
+Queue depth, running calls and wait-time percentiles per lane are returned by
+``stats()`` and reported by ``GET /health``.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from llm_transport import LLMError
+from request_deadline import POLL_INTERVAL, counters
+
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+LLM_INTERACTIVE_RESERVED = int(os.getenv("LLM_INTERACTIVE_RESERVED", "1"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "120"))
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+# Wait times kept per lane for the percentiles
+WAIT_SAMPLES = 1000
+
+
+class LLMQueueTimeout(LLMError):
+    """Raised when a call waits longer than the queue timeout for a slot"""
+
+
+def parse_weights(spec):
+    """``"a=2,b=0.5"`` -> {"a": 2.0, "b": 0.5}"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        tenant, _, weight = item.partition("=")
+        weights[tenant.strip()] = float(weight)
+    return weights
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class _Ticket:
+    __slots__ = ("tenant", "lane", "start_tag", "finish_tag", "enqueued")
+
+    def __init__(self, tenant, lane, start_tag, finish_tag):
+        self.tenant = tenant
+        self.lane = lane
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.enqueued = time.perf_counter()
+
+
+class LLMScheduler:
+    def __init__(self, concurrency=LLM_CONCURRENCY, interactive_reserved=LLM_INTERACTIVE_RESERVED,
+                 weights=None, queue_timeout=LLM_QUEUE_TIMEOUT):
+        self.concurrency = max(1, concurrency)
+        self.interactive_reserved = min(max(0, interactive_reserved), self.concurrency - 1)
+        self.weights = parse_weights(os.getenv("LLM_TENANT_WEIGHTS")) if weights is None else weights
+        self.queue_timeout = queue_timeout
+        self.condition = threading.Condition()
+        self.sequence = itertools.count()
+        self.queues = {lane: [] for lane in LANES}
+        self.running = {lane: 0 for lane in LANES}
+        self.virtual_time = {lane: 0.0 for lane in LANES}
+        self.last_finish = {lane: {} for lane in LANES}
+        self.served = {lane: 0 for lane in LANES}
+        self.timeouts = {lane: 0 for lane in LANES}
+        self.cancelled = {lane: 0 for lane in LANES}
+        self.abandoned = {lane: 0 for lane in LANES}
+        self.max_depth = {lane: 0 for lane in LANES}
+        self.waits = {lane: deque(maxlen=WAIT_SAMPLES) for lane in LANES}
+
+    def _limit(self, lane):
+        return self.concurrency if lane == INTERACTIVE else self.concurrency - self.interactive_reserved
+
+    def _can_start(self, ticket):
+        queue = self.queues[ticket.lane]
+        if not queue or queue[0][2] is not ticket:
+            return False
+        # Lanes are strictly prioritized: nothing starts while a higher lane is waiting
+        for lane in LANES[:LANES.index(ticket.lane)]:
+            if self.queues[lane]:
+                return False
+        return sum(self.running.values()) < self._limit(ticket.lane)
+
+    def _enqueue(self, tenant, lane, cost):
+        weight = self.weights.get(tenant, 1.0)
+        start_tag = max(self.virtual_time[lane], self.last_finish[lane].get(tenant, 0.0))
+        ticket = _Ticket(tenant, lane, start_tag, start_tag + cost / weight)
+        self.last_finish[lane][tenant] = ticket.finish_tag
+        heapq.heappush(self.queues[lane], (ticket.finish_tag, next(self.sequence), ticket))
+        self.max_depth[lane] = max(self.max_depth[lane], len(self.queues[lane]))
+        return ticket
+
+    def _prune(self, lane):
+        """Drop the last tags the lane's virtual time has passed, of tenants with nothing queued"""
+        virtual_time = self.virtual_time[lane]
+        waiting = {entry[2].tenant for entry in self.queues[lane]}
+        last_finish = self.last_finish[lane]
+        for tenant in [t for t, tag in last_finish.items() if tag <= virtual_time and t not in waiting]:
+            del last_finish[tenant]
+
+    def _settle(self, lane):
+        """Once a lane is idle every tag has been served: move its virtual time past them all"""
+        if not self.queues[lane] and not self.running[lane] and self.last_finish[lane]:
+            self.virtual_time[lane] = max(self.virtual_time[lane], *self.last_finish[lane].values())
+            self.last_finish[lane].clear()
+
+    def _remove(self, ticket):
+        queue = self.queues[ticket.lane]
+        queue[:] = [entry for entry in queue if entry[2] is not ticket]
+        heapq.heapify(queue)
+        self._settle(ticket.lane)
+        self.condition.notify_all()
+
+    @contextmanager
+    def slot(self, tenant, lane=BULK, cost=1.0, request_deadline=None):
+        """Block until the call of ``tenant`` in ``lane`` may run, then hold a slot.
+
+        With a ``request_deadline`` the call leaves the queue as soon as its request is cancelled.
+        """
+        if lane not in self.queues:
+            raise ValueError(f"Unknown lane {lane!r}; expected one of {LANES}")
+        deadline = time.monotonic() + self.queue_timeout
+        with self.condition:
+            ticket = self._enqueue(tenant, lane, max(cost, 1e-6))
+            while not self._can_start(ticket):
+                if request_deadline is not None and request_deadline.cancelled():
+                    self._remove(ticket)
+                    self.cancelled[lane] += 1
+                    counters.skip("llm_calls")
+                    counters.skip("llm_tokens_est", int(cost))
+                    request_deadline.check(f"llm_queue_{lane}")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove(ticket)
+                    self.timeouts[lane] += 1
+                    raise LLMQueueTimeout(f"No LLM capacity for the {lane} lane within {self.queue_timeout:g}s")
+                self.condition.wait(remaining if request_deadline is None else min(remaining, POLL_INTERVAL))
+            heapq.heappop(self.queues[lane])
+            # Virtual time follows the start tag of the call being served
+            if ticket.start_tag > self.virtual_time[lane]:
+                self.virtual_time[lane] = ticket.start_tag
+                self._prune(lane)
+            self.running[lane] += 1
+            self.served[lane] += 1
+            self.waits[lane].append(time.perf_counter() - ticket.enqueued)
+            self.condition.notify_all()
+        try:
+            yield
+        finally:
+            with self.condition:
+                if request_deadline is not None and request_deadline.defer_to_calls(
+                        lambda: self._release_abandoned(lane)):
+                    self.abandoned[lane] += 1
+                else:
+                    self.running[lane] -= 1
+                    self._settle(lane)
+                    self.condition.notify_all()
+
+    def _release_abandoned(self, lane):
+        """Free the slot of an abandoned call once the provider has returned"""
+        with self.condition:
+            self.running[lane] -= 1
+            self.abandoned[lane] -= 1
+            self._settle(lane)
+            self.condition.notify_all()
+
+    def stats(self):
+        with self.condition:
+            lanes = {}
+            for lane in LANES:
+                waits = list(self.waits[lane])
+                lanes[lane] = {
+                    "queued": len(self.queues[lane]),
+                    "max_queued": self.max_depth[lane],
+                    "running": self.running[lane],
+                    "limit": self._limit(lane),
+                    "served": self.served[lane],
+                    "timeouts": self.timeouts[lane],
+                    "cancelled": self.cancelled[lane],
+                    "abandoned": self.abandoned[lane],
+                    "tenants_waiting": len({entry[2].tenant for entry in self.queues[lane]}),
+                    "tenants_tracked": len(self.last_finish[lane]),
+                    "wait_p50_ms": _ms(_percentile(waits, 50)),
+                    "wait_p95_ms": _ms(_percentile(waits, 95)),
+                    "wait_p99_ms": _ms(_percentile(waits, 99)),
+                }
+            return {"concurrency": self.concurrency, "lanes": lanes}
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
@@ -0,0 +1,249 @@
+"""Local stand-in for Groq and Gemini that replays recorded cassettes.
+
+Point app.py at it with ``LLM_MODE=replay`` and ``LLM_STANDIN_URL``. Every
+response is delayed by a configurable latency distribution plus a per-token
+generation time, and a share of requests can be turned into 429s or
+timeouts. Randomness is seeded per request key, so the same request gets the
+same latency and the same injected errors on every run, whatever the
+concurrency.
+
+A request without an exact cassette is answered from a cassette of the same
+prompt shape (see ``llm_transport.request_shape``), or 404 when there is none
+or ``--no-fallback`` is set. Fallback hits are counted per shape in
+``/stats``: a benchmark served mostly by fallbacks is not replaying what it
+recorded, so re-record (or ``python -m benchmarks.make_cassettes``) after
+changing a prompt.
+
+    python llm_standin.py --cassettes cassettes --latency lognormal:-0.5,0.4 \\
+        --tokens-per-second 300 --rate-limit-rate 0.02 --timeout-rate 0.01
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_transport import CASSETTE_DIR, GEMINI_GENERATE, GROQ_CHAT, estimate_tokens, request_key, request_shape
+
+KINDS = (GROQ_CHAT, GEMINI_GENERATE)
+
+
+def parse_latency(spec):
+    """Parse a latency spec into a sampler taking (rng, cassette).
+
+    ``recorded``, ``fixed:S``, ``uniform:LO,HI``, ``normal:MEAN,STD`` or
+    ``lognormal:MU,SIGMA`` (parameters of the underlying normal, in seconds).
+    """
+    name, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",")] if params else []
+    if name == "recorded":
+        return lambda rng, cassette: cassette.get("latency_s", 0.0)
+    if name == "fixed":
+        return lambda rng, cassette: values[0]
+    if name == "uniform":
+        return lambda rng, cassette: rng.uniform(values[0], values[1])
+    if name == "normal":
+        return lambda rng, cassette: max(0.0, rng.gauss(values[0], values[1]))
+    if name == "lognormal":
+        return lambda rng, cassette: rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency distribution '{spec}'")
+
+
+class CassetteLibrary:
+    """In-memory index of the cassettes on disk"""
+
+    def __init__(self, cassette_dir):
+        self.cassette_dir = cassette_dir
+        self.by_key = {}
+        self.by_shape = {}
+        self.reload()
+
+    def reload(self):
+        self.by_key.clear()
+        self.by_shape.clear()
+        for kind in KINDS:
+            folder = os.path.join(self.cassette_dir, kind)
+            if not os.path.isdir(folder):
+                continue
+            for file_name in sorted(os.listdir(folder)):
+                if not file_name.endswith(".json"):
+                    continue
+                with open(os.path.join(folder, file_name), "r", encoding="utf-8") as f:
+                    cassette = json.load(f)
+                # Cassettes written before shapes were stored get theirs from the request
+                shape = cassette.setdefault("shape", request_shape(kind, cassette["request"]))
+                self.by_key[cassette["key"]] = cassette
+                self.by_shape.setdefault((kind, shape), []).append(cassette)
+
+    def lookup(self, kind, key, shape, fallback=True):
+        """Exact match by key, else a deterministic pick among the cassettes of the same shape"""
+        cassette = self.by_key.get(key)
+        candidates = self.by_shape.get((kind, shape))
+        if cassette or not fallback or not candidates:
+            return cassette, bool(cassette)
+        return candidates[int(key[:8], 16) % len(candidates)], False
+
+
+class StandinConfig:
+    def __init__(self, latency="recorded", tokens_per_second=0.0, rate_limit_rate=0.0,
+                 timeout_rate=0.0, timeout_s=30.0, retry_after_s=1.0, seed=0, fallback=True):
+        self.latency = latency
+        self.sample_latency = parse_latency(latency)
+        self.tokens_per_second = tokens_per_second
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_s = timeout_s
+        self.retry_after_s = retry_after_s
+        self.seed = seed
+        self.fallback = fallback
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, library, config):
+        super().__init__(address, StandinHandler)
+        self.library = library
+        self.config = config
+        self.lock = threading.Lock()
+        self.occurrences = {}
+        self.stats = {"requests": 0, "exact": 0, "fallback": 0, "missing": 0, "rate_limited": 0, "timeouts": 0}
+        # Requests without an exact cassette, by prompt shape
+        self.fallback_shapes = {}
+        self.missing_shapes = {}
+
+    def handle_error(self, request, client_address):
+        # Clients that give up (timeouts, shutdown) are expected under load
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def rng_for(self, key):
+        """RNG seeded by the request key and how many times it has been seen"""
+        with self.lock:
+            nth = self.occurrences.get(key, 0)
+            self.occurrences[key] = nth + 1
+        digest = hashlib.sha256(f"{self.config.seed}:{key}:{nth}".encode("utf-8")).hexdigest()
+        return random.Random(int(digest[:16], 16))
+
+    def count(self, name, shape=None):
+        with self.lock:
+            self.stats[name] += 1
+            by_shape = {"fallback": self.fallback_shapes, "missing": self.missing_shapes}.get(name)
+            if by_shape is not None:
+                by_shape[shape] = by_shape.get(shape, 0) + 1
+
+    def snapshot(self):
+        """Counters plus the per-shape fallback and missing counts"""
+        with self.lock:
+            return dict(self.stats, fallback_shapes=dict(self.fallback_shapes),
+                        missing_shapes=dict(self.missing_shapes))
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = "LLMStandin/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            stats = self.server.snapshot()
+            stats["cassettes"] = len(self.server.library.by_key)
+            return self._send_json(200, stats)
+        if self.path == "/health":
+            return self._send_json(200, {"status": "healthy"})
+        self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        kind = self.path.rsplit("/", 1)[-1]
+        if not self.path.startswith("/v1/") or kind not in KINDS:
+            return self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}").get("request", {})
+        key = request_key(kind, request)
+        shape = request_shape(kind, request)
+        server, config = self.server, self.server.config
+        server.count("requests")
+        rng = server.rng_for(key)
+
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            server.count("rate_limited")
+            return self._send_json(429, {"error": "Rate limit exceeded (injected)"},
+                                   {"Retry-After": f"{config.retry_after_s:g}"})
+        if roll < config.rate_limit_rate + config.timeout_rate:
+            server.count("timeouts")
+            time.sleep(config.timeout_s)
+            return self._send_json(504, {"error": "Upstream timed out (injected)"})
+
+        cassette, exact = server.library.lookup(kind, key, shape, fallback=config.fallback)
+        if cassette is None:
+            server.count("missing", shape)
+            return self._send_json(404, {"error": f"No cassette for {shape} request {key}"})
+        server.count("exact" if exact else "fallback", shape)
+
+        delay = config.sample_latency(rng, cassette)
+        if config.tokens_per_second > 0:
+            tokens = cassette.get("output_tokens") or estimate_tokens(cassette["response"])
+            delay += tokens / config.tokens_per_second
+        time.sleep(delay)
+        self._send_json(200, {"response": cassette["response"], "key": cassette["key"], "exact": exact,
+                              "delay_s": round(delay, 4)})
+
+
+def start_standin(cassette_dir=CASSETTE_DIR, host="127.0.0.1", port=0, **config):
+    """Start a stand-in server on a background thread and return (server, base_url)"""
+    server = StandinServer((host, port), CassetteLibrary(cassette_dir), StandinConfig(**config))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded LLM exchanges with injected latency and errors")
+    parser.add_argument("--cassettes", default=CASSETTE_DIR)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--latency", default="recorded",
+                        help="recorded | fixed:S | uniform:LO,HI | normal:MEAN,STD | lognormal:MU,SIGMA")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="extra delay of output_tokens / rate per response (0 disables)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="share of requests that hang then 504")
+    parser.add_argument("--timeout-s", type=float, default=30.0, help="how long an injected timeout hangs")
+    parser.add_argument("--retry-after-s", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-fallback", action="store_true",
+                        help="answer 404 instead of a same-shape cassette when there is no exact match")
+    args = parser.parse_args(argv)
+
+    library = CassetteLibrary(args.cassettes)
+    config = StandinConfig(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                           rate_limit_rate=args.rate_limit_rate, timeout_rate=args.timeout_rate,
+                           timeout_s=args.timeout_s, retry_after_s=args.retry_after_s, seed=args.seed,
+                           fallback=not args.no_fallback)
+    server = StandinServer((args.host, args.port), library, config)
+    print(f"LLM stand-in serving {len(library.by_key)} cassettes on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Pluggable transport for the Groq and Gemini calls made by app.py.
+
+``LLM_MODE`` selects the transport:
+
+- ``live``   talks to Groq and Gemini directly (default)
+- ``record`` talks to Groq and Gemini and writes every exchange to a cassette
+- ``replay`` sends every request to the local stand-in server (llm_standin.py),
+             which answers from the recorded cassettes without any network
+
+Cassettes are JSON files stored as ``<LLM_CASSETTE_DIR>/<kind>/<key>.json``
+where ``kind`` is ``groq.chat`` or ``gemini.generate`` and ``key`` is the
+SHA-256 of the canonical request. Each cassette also stores the request's
+``shape`` (which prompt of app.py it came from), so the stand-in only falls
+back to a cassette answering the same prompt.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+LLM_MODE = os.getenv("LLM_MODE", "live")
+CASSETTE_DIR = os.getenv("LLM_CASSETTE_DIR", "cassettes")
+STANDIN_URL = os.getenv("LLM_STANDIN_URL", "http://127.0.0.1:5055")
+STANDIN_TIMEOUT = float(os.getenv("LLM_STANDIN_TIMEOUT", "60"))
+
+GROQ_CHAT = "groq.chat"
+GEMINI_GENERATE = "gemini.generate"
+
+
+class LLMError(Exception):
+    """Raised when an LLM call fails"""
+
+
+class LLMRateLimitError(LLMError):
+    """Raised when the provider (or the stand-in) answers 429"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMTimeoutError(LLMError):
+    """Raised when the provider (or the stand-in) does not answer in time"""
+
+
+def request_key(kind, request):
+    """Stable cassette key for a request payload"""
+    canonical = json.dumps({"kind": kind, "request": request}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# Markers of the prompts app.py sends, most specific first
+SECTION_RE = re.compile(r"Extract only the (\w+) section")
+PROMPT_SHAPES = {
+    GROQ_CHAT: [("resume.parse", "resume parser that extracts information")],
+    GEMINI_GENERATE: [("component.patch", 'Return only a JSON object {"ops"'),
+                      ("component.full", "Only return the HTML code")],
+}
+
+
+def request_shape(kind, request):
+    """Which app prompt a request was built from, e.g. ``resume.parse`` or ``component.patch``"""
+    if kind == GROQ_CHAT:
+        text = next((m.get("content", "") for m in request.get("messages", []) if m.get("role") == "system"), "")
+        section = SECTION_RE.search(text)
+        if section:
+            return f"resume.section:{section.group(1)}"
+    else:
+        text = request.get("prompt", "")
+    for shape, marker in PROMPT_SHAPES.get(kind, []):
+        if marker in text:
+            return shape
+    return f"{kind}.other"
+
+
+def estimate_tokens(text):
+    """Rough token count used when the provider does not report usage"""
+    return max(1, len(text) // 4)
+
+
+class LiveTransport:
+    """Calls Groq and Gemini directly; the clients are created on first use"""
+
+    mode = "live"
+
+    def __init__(self, groq_api_key=None, gemini_api_key=None, gemini_model_name="gemini-pro"):
+        self.groq_api_key = groq_api_key
+        self.gemini_api_key = gemini_api_key
+        self.gemini_model_name = gemini_model_name
+        self._groq_client = None
+        self._gemini_model = None
+
+    @property
+    def groq_client(self):
+        if self._groq_client is None:
+            from groq import Groq
+            self._groq_client = Groq(api_key=self.groq_api_key)
+        return self._groq_client
+
+    @property
+    def gemini_model(self):
+        if self._gemini_model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.gemini_api_key)
+            self._gemini_model = genai.GenerativeModel(self.gemini_model_name)
+        return self._gemini_model
+
+    def _groq_chat(self, **request):
+        completion = self.groq_client.chat.completions.create(**request)
+        usage = getattr(completion, "usage", None)
+        content = completion.choices[0].message.content
+        tokens = getattr(usage, "completion_tokens", None) or estimate_tokens(content)
+        return content, tokens
+
+    def _gemini_generate(self, prompt):
+        response = self.gemini_model.generate_content(prompt)
+        usage = getattr(response, "usage_metadata", None)
+        text = response.text
+        tokens = getattr(usage, "candidates_token_count", None) or estimate_tokens(text)
+        return text, tokens
+
+    def groq_chat(self, **request):
+        """Run a Groq chat completion and return the message content"""
+        return self._groq_chat(**request)[0]
+
+    def gemini_generate(self, prompt):
+        """Run a Gemini generation and return the response text"""
+        return self._gemini_generate(prompt)[0]
+
+
+class RecordingTransport(LiveTransport):
+    """Live transport that also writes every exchange to a cassette file"""
+
+    mode = "record"
+    # Written to every cassette; benchmarks/make_cassettes.py writes synthetic ones
+    source = "live"
+
+    def __init__(self, cassette_dir=CASSETTE_DIR, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette_dir = cassette_dir
+
+    def _record(self, kind, request, response, latency_s, output_tokens):
+        folder = os.path.join(self.cassette_dir, kind)
+        os.makedirs(folder, exist_ok=True)
+        key = request_key(kind, request)
+        cassette = {
+            "kind": kind,
+            "key": key,
+            "shape": request_shape(kind, request),
+            "request": request,
+            "response": response,
+            "latency_s": round(latency_s, 4),
+            "output_tokens": output_tokens,
+            "source": self.source,
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        with open(os.path.join(folder, f"{key}.json"), "w", encoding="utf-8") as f:
+            json.dump(cassette, f, indent=2)
+
+    def groq_chat(self, **request):
+        started = time.perf_counter()
+        content, tokens = self._groq_chat(**request)
+        self._record(GROQ_CHAT, request, content, time.perf_counter() - started, tokens)
+        return content
+
+    def gemini_generate(self, prompt):
+        started = time.perf_counter()
+        text, tokens = self._gemini_generate(prompt)
+        self._record(GEMINI_GENERATE, {"prompt": prompt}, text, time.perf_counter() - started, tokens)
+        return text
+
+
+class ReplayTransport:
+    """Sends every request to the local stand-in server instead of the providers"""
+
+    mode = "replay"
+
+    def __init__(self, base_url=STANDIN_URL, timeout=STANDIN_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, kind, request):
+        body = json.dumps({"request": request}).encode("utf-8")
+        http_request = urllib.request.Request(f"{self.base_url}/v1/{kind}", data=body,
+                                              headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(http_request, timeout=self.timeout) as response:
+                return json.loads(response.read())["response"]
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                retry_after = e.headers.get("Retry-After")
+                raise LLMRateLimitError(f"{kind} rate limited by stand-in",
+                                        float(retry_after) if retry_after else None)
+            if e.code == 504:
+                raise LLMTimeoutError(f"{kind} timed out in stand-in")
+            raise LLMError(f"{kind} failed in stand-in: HTTP {e.code} {e.read().decode('utf-8', 'replace')}")
+        except TimeoutError:
+            raise LLMTimeoutError(f"{kind} timed out after {self.timeout}s")
+        except urllib.error.URLError as e:
+            if isinstance(e.reason, TimeoutError):
+                raise LLMTimeoutError(f"{kind} timed out after {self.timeout}s")
+            raise LLMError(f"Could not reach LLM stand-in at {self.base_url}: {e.reason}")
+
+    def groq_chat(self, **request):
+        return self._post(GROQ_CHAT, request)
+
+    def gemini_generate(self, prompt):
+        return self._post(GEMINI_GENERATE, {"prompt": prompt})
+
+
+def create_transport(mode=None, groq_api_key=None, gemini_api_key=None):
+    """Build the transport selected by ``mode`` (defaults to ``LLM_MODE``)"""
+    mode = mode or LLM_MODE
+    if mode == "live":
+        return LiveTransport(groq_api_key=groq_api_key, gemini_api_key=gemini_api_key)
+    if mode == "record":
+        return RecordingTransport(groq_api_key=groq_api_key, gemini_api_key=gemini_api_key)
+    if mode == "replay":
+        return ReplayTransport()
+    raise ValueError(f"Unknown LLM_MODE '{mode}', expected live, record or replay")
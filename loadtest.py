@@ -0,0 +1,404 @@
+"""Load generator for the upload -> generate -> preview -> modify -> download flow.
+
+By default it starts the LLM stand-in (llm_standin.py) in-process and spawns
+the Flask app in a temporary working directory with ``LLM_MODE=replay``, so a
+run needs no network or API keys. Virtual users then run realistic sessions
+while concurrency ramps through the configured stages:
+
+    python loadtest.py --stages 1:20,2:20,4:20,8:20,16:20
+    python loadtest.py --target http://127.0.0.1:5000 --server-pid 1234
+
+The report (printed and written as JSON) has throughput and p50/p95/p99 per
+route for every stage, error rates, server CPU and RSS, and the stage where
+throughput stopped scaling. Responses the stand-in served without an exact
+cassette are reported per prompt shape; ``--strict-cassettes`` turns them into
+errors and a non-zero exit instead.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from llm_standin import start_standin
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(REPO_DIR, "benchmarks", "corpus")
+STYLES = ["professional", "futuristic", "playful"]
+EDIT_INSTRUCTIONS = ["Make the title bold", "Use a warmer colour", "Shorten the description", "Add an icon"]
+COMPONENT_RE = re.compile(r'<div class="[^"]*" data-component="[^"]+">.*?</div>', re.S)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def parse_stages(spec):
+    """Parse ``users:seconds,users:seconds`` into a list of (users, seconds)"""
+    stages = []
+    for part in spec.split(","):
+        users, seconds = part.split(":")
+        stages.append((int(users), float(seconds)))
+    return stages
+
+
+def _multipart(field, filename, payload, content_type="application/pdf"):
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: {content_type}\r\n\r\n").encode("utf-8") + payload + f"\r\n--{boundary}--\r\n".encode("utf-8")
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+class Recorder:
+    """Thread-safe store of request samples tagged with the current stage"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = []
+        self.stage = 0
+        self.sessions = {}
+
+    def record(self, route, status, latency, ok):
+        with self.lock:
+            self.samples.append((self.stage, route, status, latency, ok))
+
+    def session_done(self):
+        with self.lock:
+            self.sessions[self.stage] = self.sessions.get(self.stage, 0) + 1
+
+
+class VirtualUser(threading.Thread):
+    def __init__(self, base_url, pdfs, recorder, stop_event, rng, previews, edits, think_time, timeout):
+        super().__init__(daemon=True)
+        self.base_url = base_url
+        self.pdfs = pdfs
+        self.recorder = recorder
+        self.stop_event = stop_event
+        self.rng = rng
+        self.previews = previews
+        self.edits = edits
+        self.think_time = think_time
+        self.timeout = timeout
+
+    def _request(self, route, method, path, body=None, content_type=None):
+        request = urllib.request.Request(self.base_url + path, data=body, method=method)
+        if content_type:
+            request.add_header("Content-Type", content_type)
+        # Each virtual user is its own tenant for the app's fair LLM scheduler
+        request.add_header("X-Client-Id", self.name)
+        started = time.perf_counter()
+        status, payload = 0, b""
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                status, payload = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        except Exception:
+            status = 0
+        latency = time.perf_counter() - started
+        ok = 200 <= status < 300
+        self.recorder.record(route, status, latency, ok)
+        return ok, payload
+
+    def _json(self, route, path, data):
+        ok, payload = self._request(route, "POST", path, json.dumps(data).encode("utf-8"), "application/json")
+        return json.loads(payload) if ok else None
+
+    def _think(self):
+        if self.think_time > 0:
+            self.stop_event.wait(self.rng.expovariate(1.0 / self.think_time))
+
+    def run_session(self):
+        name, pdf = self.rng.choice(self.pdfs)
+        body, content_type = _multipart("file", name, pdf)
+        ok, payload = self._request("POST /", "POST", "/", body, content_type)
+        if not ok:
+            return
+        self._think()
+
+        result = self._json("POST /generate-website", "/generate-website",
+                            {"data": json.loads(payload)["data"], "style": self.rng.choice(STYLES)})
+        if not result:
+            return
+        website_id = result["website_id"]
+
+        html = ""
+        for _ in range(self.previews):
+            self._think()
+            ok, page = self._request("GET /preview/<id>/", "GET", f"/preview/{website_id}/")
+            html = page.decode("utf-8", "replace") if ok else html
+
+        components = COMPONENT_RE.findall(html) or ['<div class="skill-tag" data-component="skill-tag">Python</div>']
+        for _ in range(self.edits):
+            self._think()
+            component = self.rng.choice(components)
+            component_type = re.search(r'data-component="([^"]+)"', component)
+            self._json("POST /modify-component", "/modify-component", {
+                "component_html": component,
+                "instructions": self.rng.choice(EDIT_INSTRUCTIONS),
+                "component_type": component_type.group(1) if component_type else "component",
+                "website_id": website_id,
+            })
+
+        self._think()
+        ok, _ = self._request("GET /download/<id>", "GET", f"/download/{website_id}")
+        if ok:
+            self.recorder.session_done()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.run_session()
+
+
+class ResourceSampler(threading.Thread):
+    """Samples CPU and RSS of the server process from /proc"""
+
+    def __init__(self, pid, recorder, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.recorder = recorder
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.samples = []
+        self.ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+    def _read(self):
+        with open(f"/proc/{self.pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_s = (int(fields[11]) + int(fields[12])) / self.ticks
+        threads = int(fields[17])
+        rss_kb = 0
+        with open(f"/proc/{self.pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    rss_kb = int(line.split()[1])
+        return cpu_s, rss_kb, threads
+
+    def run(self):
+        previous = None
+        while not self.stop_event.wait(self.interval):
+            try:
+                cpu_s, rss_kb, threads = self._read()
+            except (OSError, IndexError, ValueError):
+                return
+            now = time.perf_counter()
+            if previous:
+                cpu_pct = 100.0 * (cpu_s - previous[1]) / (now - previous[0])
+                self.samples.append((self.recorder.stage, cpu_pct, rss_kb, threads))
+            previous = (now, cpu_s)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_app(standin_url, workdir, extra_env=None):
+    """Start app.py with the replay transport and wait until /health answers"""
+    port = _free_port()
+    env = dict(os.environ, LLM_MODE="replay", LLM_STANDIN_URL=standin_url,
+               PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    env.update(extra_env or {})
+    command = [sys.executable, "-c",
+               f"from app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    process = subprocess.Popen(command, cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("App exited during startup")
+        try:
+            with urllib.request.urlopen(base_url + "/health", timeout=1):
+                return process, base_url
+        except Exception:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("App did not become healthy within 30s")
+
+
+def build_report(recorder, sampler, stages):
+    report = {"stages": [], "routes": {}}
+    routes = sorted({sample[1] for sample in recorder.samples})
+
+    def summarize(samples, duration):
+        latencies = [s[3] for s in samples]
+        errors = sum(1 for s in samples if not s[4])
+        return {
+            "requests": len(samples),
+            "throughput_rps": round(len(samples) / duration, 2) if duration else None,
+            "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        }
+
+    for index, (users, duration) in enumerate(stages):
+        stage_samples = [s for s in recorder.samples if s[0] == index]
+        stage = {"users": users, "duration_s": duration, "sessions": recorder.sessions.get(index, 0)}
+        stage.update(summarize(stage_samples, duration))
+        stage["routes"] = {route: summarize([s for s in stage_samples if s[1] == route], duration)
+                           for route in routes}
+        resources = [s for s in (sampler.samples if sampler else []) if s[0] == index]
+        if resources:
+            stage["server"] = {
+                "cpu_pct_avg": round(sum(r[1] for r in resources) / len(resources), 1),
+                "rss_mb_peak": round(max(r[2] for r in resources) / 1024, 1),
+                "threads_peak": max(r[3] for r in resources),
+            }
+        report["stages"].append(stage)
+
+    total = sum(duration for _, duration in stages)
+    for route in routes:
+        report["routes"][route] = summarize([s for s in recorder.samples if s[1] == route], total)
+    report["knee"] = find_knee(report["stages"])
+    return report
+
+
+def find_knee(stages, min_gain=0.1):
+    """First stage whose extra users no longer buy at least ``min_gain`` more throughput"""
+    for previous, current in zip(stages, stages[1:]):
+        if not previous.get("throughput_rps") or current["users"] <= previous["users"]:
+            continue
+        gain = current["throughput_rps"] / previous["throughput_rps"] - 1
+        if gain < min_gain:
+            return {"users": previous["users"], "throughput_rps": previous["throughput_rps"],
+                    "p95_ms": previous["p95_ms"], "next_stage_gain": round(gain, 3)}
+    return None
+
+
+def print_report(report):
+    print(f"\n{'stage':>5} {'users':>5} {'rps':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'cpu%':>6} {'rssMB':>7}")
+    for index, stage in enumerate(report["stages"]):
+        server = stage.get("server", {})
+        print(f"{index:>5} {stage['users']:>5} {stage['throughput_rps'] or 0:>8.2f} {stage['error_rate'] * 100:>6.2f} "
+              f"{stage['p50_ms'] or 0:>8.1f} {stage['p95_ms'] or 0:>8.1f} {stage['p99_ms'] or 0:>8.1f} "
+              f"{server.get('cpu_pct_avg', 0):>6.1f} {server.get('rss_mb_peak', 0):>7.1f}")
+    print(f"\n{'route':28s} {'reqs':>6} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for route, stats in report["routes"].items():
+        print(f"{route:28s} {stats['requests']:>6} {stats['error_rate'] * 100:>6.2f} "
+              f"{stats['p50_ms'] or 0:>8.1f} {stats['p95_ms'] or 0:>8.1f} {stats['p99_ms'] or 0:>8.1f}")
+    knee = report.get("knee")
+    print(f"\nScaling knee: {knee['users']} users at {knee['throughput_rps']} req/s" if knee
+          else "\nScaling knee: not reached")
+    standin = report.get("llm_standin")
+    if standin:
+        print(f"LLM stand-in: {standin['exact']} exact, {standin['fallback']} fallback, "
+              f"{standin['missing']} missing of {standin['requests']} requests")
+        for label, shapes in (("fallback", standin["fallback_shapes"]), ("missing", standin["missing_shapes"])):
+            if shapes:
+                print(f"WARNING: LLM responses without an exact cassette ({label}): "
+                      + ", ".join(f"{shape} x{count}" for shape, count in sorted(shapes.items()))
+                      + "; re-record the cassettes for the current prompts")
+
+
+def run_load(base_url, stages, pdfs, recorder, previews=3, edits=2, think_time=0.5, timeout=60.0, seed=0):
+    """Drive virtual users through the stages, adding or stopping users between stages"""
+    users = []
+    rng = random.Random(seed)
+    for index, (target, duration) in enumerate(stages):
+        recorder.stage = index
+        while len(users) < target:
+            stop_event = threading.Event()
+            user = VirtualUser(base_url, pdfs, recorder, stop_event, random.Random(rng.random()),
+                               previews, edits, think_time, timeout)
+            users.append((user, stop_event))
+            user.start()
+        while len(users) > target:
+            users.pop()[1].set()
+        print(f"Stage {index}: {target} users for {duration:g}s")
+        time.sleep(duration)
+    for _, stop_event in users:
+        stop_event.set()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the portfolio generator end to end")
+    parser.add_argument("--target", help="base URL of a running server (default: spawn one)")
+    parser.add_argument("--server-pid", type=int, help="pid to sample CPU/RSS from when using --target")
+    parser.add_argument("--stages", default="1:15,2:15,4:15,8:15", help="users:seconds,... ramp schedule")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="directory of PDFs to upload")
+    parser.add_argument("--previews", type=int, default=3, help="preview fetches per session")
+    parser.add_argument("--edits", type=int, default=2, help="component edits per session")
+    parser.add_argument("--think-time", type=float, default=0.5, help="mean seconds between user actions")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--cassettes", default=os.path.join(REPO_DIR, "cassettes"))
+    parser.add_argument("--llm-latency", default="lognormal:-1.0,0.4", help="stand-in latency distribution")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--llm-timeout-rate", type=float, default=0.0)
+    parser.add_argument("--strict-cassettes", action="store_true",
+                        help="fail LLM requests without an exact cassette and exit non-zero if any occurred")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="loadtest_report.json")
+    args = parser.parse_args(argv)
+
+    pdfs = []
+    for file_name in sorted(os.listdir(args.corpus)):
+        if file_name.lower().endswith(".pdf"):
+            with open(os.path.join(args.corpus, file_name), "rb") as f:
+                pdfs.append((file_name, f.read()))
+    if not pdfs:
+        parser.error(f"No PDFs found in {args.corpus}")
+
+    stages = parse_stages(args.stages)
+    process = standin = None
+    workdir = None
+    base_url, server_pid = args.target, args.server_pid
+    try:
+        if not base_url:
+            standin, standin_url = start_standin(args.cassettes, latency=args.llm_latency,
+                                                 tokens_per_second=args.llm_tokens_per_second,
+                                                 rate_limit_rate=args.llm_rate_limit_rate,
+                                                 timeout_rate=args.llm_timeout_rate, seed=args.seed,
+                                                 fallback=not args.strict_cassettes)
+            workdir = tempfile.mkdtemp(prefix="portfolio_loadtest_")
+            process, base_url = spawn_app(standin_url, workdir)
+            server_pid = process.pid
+
+        recorder = Recorder()
+        sampler = ResourceSampler(server_pid, recorder) if server_pid and os.path.exists(f"/proc/{server_pid}") else None
+        if sampler:
+            sampler.start()
+        run_load(base_url, stages, pdfs, recorder, previews=args.previews, edits=args.edits,
+                 think_time=args.think_time, timeout=args.timeout, seed=args.seed)
+        if sampler:
+            sampler.stop_event.set()
+
+        report = build_report(recorder, sampler, stages)
+        report["target"] = base_url
+        if standin:
+            report["llm_standin"] = standin.snapshot()
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print_report(report)
+        print(f"\nReport written to {args.output}")
+        if standin and args.strict_cassettes and report["llm_standin"]["missing"]:
+            sys.exit(f"{report['llm_standin']['missing']} LLM requests had no exact cassette")
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=10)
+        if standin:
+            standin.shutdown()
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Cascade routing of resume parsing between a fast and a large Groq model.
+
+``ModelRouter.pick`` chooses the starting tier from features of the extracted
+text: long text, many section headings or a complex layout (multi-column
+gaps, tables, heavy bulleting) go straight to the large model; everything
+else starts on the fast one. ``ModelRouter.check`` then decides whether the
+fast model's output is good enough or the request must escalate: it fails on
+unparseable JSON, too many field coercions, a missing name, or sections whose heading
+appears in the text but came back empty. Sections that could not be repaired
+do not escalate: the caller re-asks for just those sections on the large
+model.
+
+Per request the router returns a record of the tier used, whether and why it
+escalated, the latency spent and the latency saved against the large model
+(its running average, minus the fast call; an escalation counts the wasted
+fast call as negative savings). Totals and the escalation rate are in
+``stats()``, reported by ``GET /health``.
+"""
+import os
+import re
+import threading
+
+from resume_repair import section_of
+
+GROQ_FAST_MODEL = os.getenv("GROQ_FAST_MODEL", "llama-3.1-8b-instant")
+GROQ_LARGE_MODEL = os.getenv("GROQ_LARGE_MODEL", "llama-3.3-70b-versatile")
+ROUTER_FAST_MAX_CHARS = int(os.getenv("ROUTER_FAST_MAX_CHARS", "6000"))
+ROUTER_FAST_MAX_SECTIONS = int(os.getenv("ROUTER_FAST_MAX_SECTIONS", "8"))
+ROUTER_FAST_MAX_LAYOUT = float(os.getenv("ROUTER_FAST_MAX_LAYOUT", "0.35"))
+ROUTER_MAX_REPAIRS = int(os.getenv("ROUTER_MAX_REPAIRS", "4"))
+
+FAST = "fast"
+LARGE = "large"
+TIERS = {FAST: GROQ_FAST_MODEL, LARGE: GROQ_LARGE_MODEL}
+
+# Heading words mapped to the Candidate section they should fill
+SECTION_HEADINGS = {
+    "education": "Education",
+    "academic": "Education",
+    "experience": "Experience",
+    "employment": "Experience",
+    "internship": "Experience",
+    "internships": "Experience",
+    "projects": "Projects",
+    "project": "Projects",
+    "skills": "Skills",
+    "technical skills": "Skills",
+    "achievements": "Achivements",
+    "awards": "Achivements",
+    "honors": "Achivements",
+    "positions of responsibility": "Position_of_Responsibility",
+    "leadership": "Position_of_Responsibility",
+    "extracurricular": "Position_of_Responsibility",
+    "certifications": None,
+    "publications": None,
+    "summary": None,
+    "objective": None,
+    "interests": None,
+}
+
+# Longer lines are sentences or job titles, not headings
+HEADING_MAX_WORDS = 4
+
+_HEADING = re.compile(r"^\s*([A-Za-z][A-Za-z &]{2,40}?)\s*:?\s*$")
+_COLUMN_GAP = re.compile(r"\S\s{4,}\S|\t")
+_DIGIT = re.compile(r"\d")
+_BULLET = re.compile(r"^\s*[•\-\*▪●◦]")
+
+# Weight of the large model's running latency average for each new sample
+LATENCY_EWMA = 0.2
+
+# Consecutive row-like lines needed before they count as a table
+TABLE_MIN_ROWS = 5
+
+
+def section_heading(line):
+    """The SECTION_HEADINGS key found in a short heading line, or None"""
+    match = _HEADING.match(line)
+    if not match:
+        return None
+    words = match.group(1).lower().split()
+    if len(words) > HEADING_MAX_WORDS:
+        return None
+    # "Professional Experience" and "Experience Summary" both count as "experience";
+    # the earliest keyword wins, the longest on a tie ("technical skills" over "skills")
+    padded = f" {' '.join(words)} "
+    found = [(padded.find(f" {h} "), -len(h), h) for h in SECTION_HEADINGS if f" {h} " in padded]
+    return min(found)[2] if found else None
+
+
+def _table_rows(lines):
+    """Lines in runs of short, numeric, unpunctuated rows — a table flattened by text extraction"""
+    rows = run = 0
+    for line in lines + [""]:
+        words = line.split()
+        if 4 <= len(words) <= 10 and _DIGIT.search(line) and not line.rstrip().endswith((".", ",", ";")):
+            run += 1
+            continue
+        if run >= TABLE_MIN_ROWS:
+            rows += run
+        run = 0
+    return rows
+
+
+def resume_features(text):
+    """Routing features of extracted resume text"""
+    lines = [line for line in text.splitlines() if line.strip()]
+    sections = {h for h in map(section_heading, lines) if h}
+    columns = sum(1 for line in lines if _COLUMN_GAP.search(line)) + _table_rows(lines)
+    bullets = sum(1 for line in lines if _BULLET.match(line))
+    short = sum(1 for line in lines if len(line.strip()) < 20)
+    total = max(1, len(lines))
+    return {
+        "chars": len(text),
+        "lines": len(lines),
+        "sections": sorted(sections),
+        # Share of lines that look like columns or tables, plus fragmenting by bullets and short lines
+        "layout": round(min(1.0, columns / total) + 0.25 * bullets / total + 0.25 * short / total, 3),
+    }
+
+
+class ModelRouter:
+    def __init__(self, fast_max_chars=ROUTER_FAST_MAX_CHARS, fast_max_sections=ROUTER_FAST_MAX_SECTIONS,
+                 fast_max_layout=ROUTER_FAST_MAX_LAYOUT, max_repairs=ROUTER_MAX_REPAIRS):
+        self.fast_max_chars = fast_max_chars
+        self.fast_max_sections = fast_max_sections
+        self.fast_max_layout = fast_max_layout
+        self.max_repairs = max_repairs
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.by_tier = {FAST: 0, LARGE: 0}
+        self.escalations = 0
+        self.escalation_reasons = {}
+        self.saved_s = 0.0
+        self.large_latency = None
+
+    def pick(self, features):
+        """Starting tier and the reason for it"""
+        if features["chars"] > self.fast_max_chars:
+            return LARGE, f"chars: {features['chars']}"
+        if len(features["sections"]) > self.fast_max_sections:
+            return LARGE, f"sections: {len(features['sections'])}"
+        if features["layout"] > self.fast_max_layout:
+            return LARGE, f"layout: {features['layout']}"
+        return FAST, "simple"
+
+    def check(self, features, candidate, repairs, unrecoverable):
+        """Why the fast model's result is not trusted (``"<check>: <detail>"``), or None when it is
+
+        ``unrecoverable`` sections are re-asked on their own, so they never fail the check and
+        their repairs are not counted; neither are sections left out, which the checks below cover.
+        """
+        coerced = [r for r in repairs if section_of(r) not in unrecoverable and not r.endswith(": missing")]
+        if len(coerced) > self.max_repairs:
+            return f"repairs: {len(coerced)}"
+        if not candidate.name.strip():
+            return "name: missing"
+        expected = {SECTION_HEADINGS[s] for s in features["sections"]} - {None}
+        empty = sorted(s for s in expected if not getattr(candidate, s) and s not in unrecoverable)
+        if empty:
+            return f"empty: {', '.join(empty)}"
+        return None
+
+    def record(self, tier, escalated, reason, latency_s, fast_latency_s=0.0):
+        """Account one finished parse; returns the per-request routing record"""
+        with self.lock:
+            self.requests += 1
+            self.by_tier[tier] += 1
+            if tier == LARGE:
+                large_s = latency_s - fast_latency_s
+                self.large_latency = large_s if self.large_latency is None else \
+                    (1 - LATENCY_EWMA) * self.large_latency + LATENCY_EWMA * large_s
+            if escalated:
+                self.escalations += 1
+                key = reason.split(":")[0]
+                self.escalation_reasons[key] = self.escalation_reasons.get(key, 0) + 1
+                saved = -fast_latency_s
+            elif tier == FAST and self.large_latency is not None:
+                saved = self.large_latency - latency_s
+            else:
+                saved = 0.0
+            self.saved_s += saved
+        return {
+            "tier": tier,
+            "model": TIERS[tier],
+            "escalated": escalated,
+            "reason": reason,
+            "latency_ms": round(latency_s * 1000, 1),
+            "saved_ms": round(saved * 1000, 1),
+        }
+
+    def stats(self):
+        with self.lock:
+            return {
+                "models": dict(TIERS),
+                "requests": self.requests,
+                "by_tier": dict(self.by_tier),
+                "escalations": self.escalations,
+                "escalation_rate": round(self.escalations / self.requests, 3) if self.requests else None,
+                "escalation_reasons": dict(self.escalation_reasons),
+                "latency_saved_s": round(self.saved_s, 2),
+                "large_latency_avg_ms": None if self.large_latency is None else round(self.large_latency * 1000, 1),
+            }
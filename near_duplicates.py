@@ -0,0 +1,302 @@
+"""Near-duplicate detection of uploaded resumes with MinHash and LSH.
+
+Exact-hash caching (``upload_cache``) misses a resume with a new phone number,
+one extra bullet or different whitespace after a re-export. ``NearDuplicateIndex``
+keeps a MinHash signature of the normalized text of recent parses, banded into
+an LSH table so a lookup only compares against resumes that share a band.
+
+A match above ``NEAR_DUP_THRESHOLD`` (estimated Jaccard similarity of word
+shingles) returns the prior ``Candidate`` together with the sections whose
+text changed, so the caller re-extracts only those. Sections are found with
+the heading detection of ``model_router``; the text above the first heading
+is the ``header`` section (name and contact details).
+
+A change in the header is applied without the LLM: emails, phone numbers
+and URLs are found with regular expressions and replace the prior ones in
+``Contact_Info``, and a new first line becomes the ``name`` when the prior
+name was that line. Any other header change (the header also collects text
+under headings that were not recognized) cannot be attributed to a field;
+neither can a change in a section with no Candidate field or in a field the
+prior parse left empty. For those ``find`` returns None and the resume is
+parsed in full.
+
+Memory is bounded: at most ``NEAR_DUP_MAX_ENTRIES`` resumes are kept, least
+recently matched first out, and an entry holds only its signature, one hash
+per section, the contact details found in the header and the parsed
+Candidate — never the resume text.
+"""
+import hashlib
+import os
+import random
+import re
+import threading
+from array import array
+from collections import OrderedDict
+
+from model_router import SECTION_HEADINGS, section_heading
+
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.8"))
+NEAR_DUP_MAX_ENTRIES = int(os.getenv("NEAR_DUP_MAX_ENTRIES", "10000"))
+# Above this share of changed sections a full parse is cheaper and safer
+NEAR_DUP_MAX_CHANGED = float(os.getenv("NEAR_DUP_MAX_CHANGED", "0.5"))
+NEAR_DUP_PERMUTATIONS = int(os.getenv("NEAR_DUP_PERMUTATIONS", "128"))
+NEAR_DUP_BANDS = int(os.getenv("NEAR_DUP_BANDS", "16"))
+
+HEADER = "header"
+SHINGLE_WORDS = 5
+
+_PRIME = (1 << 61) - 1
+_WORD = re.compile(r"[a-z0-9@+#.]+")
+# Contact details in the header, matched in this order so a URL's or email's digits are not a phone
+CONTACT_PATTERNS = (
+    ("email", re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")),
+    ("url", re.compile(r"(?:https?://|www\.)\S+|\b[\w-]+\.(?:com|io|dev|me|org|net)/\S+", re.I)),
+    ("phone", re.compile(r"\+?\d[\d ().-]{6,}\d")),
+)
+_NAME_SEPARATORS = " \t|,;:-•"
+
+
+def normalize(text):
+    """Lowercase words only, so whitespace, punctuation and line breaks do not matter"""
+    return _WORD.findall(text.lower())
+
+
+def shingle_hashes(words, size=SHINGLE_WORDS):
+    if len(words) <= size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return {int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles}
+
+
+def split_sections(text):
+    """{section: text} keyed by the Candidate field a heading fills, ``header`` for the top.
+
+    Headings with no Candidate field (summary, certifications) keep their own key so
+    their changes are seen but never re-extracted.
+    """
+    sections, current = {}, HEADER
+    for line in text.splitlines():
+        heading = section_heading(line)
+        if heading:
+            current = SECTION_HEADINGS[heading] or heading
+            continue
+        if line.strip():
+            sections.setdefault(current, []).append(line)
+    return {name: "\n".join(lines) for name, lines in sections.items()}
+
+
+def _section_hash(text):
+    return hashlib.blake2b(" ".join(normalize(text)).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def split_header(text):
+    """(first line, hash of the other lines, contacts) of the header with contact details taken out"""
+    contacts, lines = [], []
+    for line in text.splitlines():
+        for kind, pattern in CONTACT_PATTERNS:
+            contacts.extend((kind, value.rstrip(".,;")) for value in pattern.findall(line))
+            line = pattern.sub(" ", line)
+        line = line.strip(_NAME_SEPARATORS)
+        if line:
+            lines.append(line)
+    first = lines[0] if lines else ""
+    return first, _section_hash("\n".join(lines[1:])), contacts
+
+
+def _contact_key(kind, value):
+    if kind == "phone":
+        return re.sub(r"\D", "", value)
+    return value.lower().removeprefix("https://").removeprefix("http://").removeprefix("www.").rstrip("/")
+
+
+def _update_contacts(contact_info, old, new):
+    """``contact_info`` with the ``old`` contacts replaced by the ``new`` ones, or None when one cannot be found"""
+    info = dict(contact_info)
+    removed = [c for c in old if c not in new]
+    added = [c for c in new if c not in old]
+    for kind, value in removed:
+        wanted = _contact_key(kind, value)
+        key = next((k for k, v in info.items() if wanted and wanted in _contact_key(kind, str(v))), None)
+        if key is None:
+            # The prior parse did not keep this detail as written; it cannot be replaced safely
+            return None
+        replacement = next((c for c in added if c[0] == kind), None)
+        if replacement is None:
+            del info[key]
+        else:
+            added.remove(replacement)
+            info[key] = replacement[1]
+    for kind, value in added:
+        key, n = kind, 1
+        while key in info:
+            n += 1
+            key = f"{kind}_{n}"
+        info[key] = value
+    return info
+
+
+def _header_update(candidate, previous, text):
+    """Candidate fields for a changed header, or None when the change cannot be attributed to them"""
+    first, rest, contacts = split_header(text)
+    if rest != previous["rest"]:
+        return None
+    updates = {}
+    if _section_hash(first) != previous["first"]:
+        if not previous["first_is_name"]:
+            return None
+        updates["name"] = first
+    if contacts != previous["contacts"]:
+        contact_info = _update_contacts(candidate.Contact_Info, previous["contacts"], contacts)
+        if contact_info is None:
+            return None
+        updates["Contact_Info"] = contact_info
+    return updates
+
+
+def _header_entry(text, candidate):
+    first, rest, contacts = split_header(text)
+    first_hash = _section_hash(first)
+    return {"first": first_hash, "rest": rest, "contacts": contacts,
+            "first_is_name": bool(first) and _section_hash(candidate.name) == first_hash}
+
+
+def _unattributable(changed, candidate, sections):
+    """Changed sections that cannot be re-extracted on their own into the prior Candidate (the header is checked apart)"""
+    fields = type(candidate).model_fields
+    return [name for name in changed if name != HEADER and (
+            name not in fields
+            # A field the prior parse missed may hold text that belongs elsewhere; a removed section is fine
+            or (name in sections and not getattr(candidate, name)))]
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold=NEAR_DUP_THRESHOLD, max_entries=NEAR_DUP_MAX_ENTRIES,
+                 permutations=NEAR_DUP_PERMUTATIONS, bands=NEAR_DUP_BANDS, max_changed=NEAR_DUP_MAX_CHANGED):
+        if permutations % bands:
+            raise ValueError("NEAR_DUP_PERMUTATIONS must be a multiple of NEAR_DUP_BANDS")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = permutations // bands
+        self.max_changed = max_changed
+        rng = random.Random(0x5EED)
+        self.coefficients = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(permutations)]
+        self.entries = OrderedDict()
+        self.buckets = [{} for _ in range(bands)]
+        self.lock = threading.Lock()
+        self.lookups = 0
+        self.matches = 0
+        self.partial = 0
+        self.evictions = 0
+        self.full_parses = 0
+
+    def signature(self, text):
+        hashes = shingle_hashes(normalize(text))
+        return array("Q", (min((a * h + b) % _PRIME for h in hashes) for a, b in self.coefficients))
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [hash(tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def _similarity(self, left, right):
+        return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+    def find(self, text):
+        """Best prior parse at or above the threshold, or None.
+
+        Returns ``{"key", "similarity", "candidate", "changed", "header", "sections"}`` where
+        ``changed`` lists the sections whose text differs (added and removed ones included)
+        and must be re-extracted, and ``header`` the fields already updated from the header.
+        ``candidate`` is the prior parse with those header updates applied.
+        """
+        signature = self.signature(text)
+        texts = split_sections(text)
+        sections = {name: _section_hash(body) for name, body in texts.items()}
+        with self.lock:
+            self.lookups += 1
+            seen = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                seen.update(self.buckets[band].get(key, ()))
+            best, best_score = None, self.threshold
+            for key in seen:
+                score = self._similarity(signature, self.entries[key]["signature"])
+                if score >= best_score:
+                    best, best_score = key, score
+            if best is None:
+                return None
+            entry = self.entries[best]
+            self.entries.move_to_end(best)
+            previous = entry["sections"]
+            changed = sorted(name for name in sections.keys() | previous.keys()
+                             if sections.get(name) != previous.get(name))
+            if len(changed) > self.max_changed * max(1, len(sections | previous)):
+                return None
+            candidate, header = entry["candidate"], []
+            unsafe = _unattributable(changed, candidate, sections)
+            if HEADER in changed:
+                updates = _header_update(candidate, entry["header"], texts.get(HEADER, ""))
+                if updates is None:
+                    unsafe.append(HEADER)
+                else:
+                    candidate = candidate.model_copy(update=updates)
+                    header = sorted(updates)
+                    changed.remove(HEADER)
+            if unsafe:
+                self.full_parses += 1
+                print(f"Near-duplicate of {best} changed in {', '.join(unsafe)}; parsing in full")
+                return None
+            self.matches += 1
+            if changed or header:
+                self.partial += 1
+            return {
+                "key": best,
+                "similarity": round(best_score, 3),
+                "candidate": candidate,
+                "changed": changed,
+                "header": header,
+                "sections": texts,
+            }
+
+    def add(self, key, text, candidate):
+        """Index the parse of ``text`` under ``key``, evicting the least recently used entries"""
+        if self.max_entries <= 0:
+            return
+        signature = self.signature(text)
+        texts = split_sections(text)
+        sections = {name: _section_hash(body) for name, body in texts.items()}
+        header = _header_entry(texts.get(HEADER, ""), candidate)
+        with self.lock:
+            self._remove(key)
+            band_keys = self._band_keys(signature)
+            for band, band_key in enumerate(band_keys):
+                self.buckets[band].setdefault(band_key, set()).add(key)
+            self.entries[key] = {"signature": signature, "bands": band_keys, "sections": sections,
+                                 "header": header, "candidate": candidate}
+            while len(self.entries) > self.max_entries:
+                self._remove(next(iter(self.entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for band, band_key in enumerate(entry["bands"]):
+            bucket = self.buckets[band].get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band][band_key]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "lookups": self.lookups,
+                "matches": self.matches,
+                "partial_reparses": self.partial,
+                "evictions": self.evictions,
+                "full_parses": self.full_parses,
+            }
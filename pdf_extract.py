@@ -0,0 +1,111 @@
+"""Interchangeable PDF text-extraction backends.
+
+The backend is chosen per deployment with ``PDF_EXTRACTOR``:
+
+- ``pdfplumber``  character-level layout analysis (slowest, the original behaviour)
+- ``pdfminer``    pdfminer's layout engine with LAParams tuned for resumes and tables
+- ``pdfium``      PDFium's native text layer through pypdfium2 (fastest)
+
+``python -m benchmarks.compare_extractors`` scores speed and text fidelity of
+every available backend on the benchmark corpus.
+"""
+import os
+import re
+
+import pdfplumber
+from pdfminer.high_level import extract_text as pdfminer_extract_text
+from pdfminer.layout import LAParams
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+PDF_EXTRACTOR = os.getenv("PDF_EXTRACTOR", "pdfplumber")
+PDF_EXTRACT_PAGES = int(os.getenv("PDF_EXTRACT_PAGES", "1"))
+
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+def _normalize(text):
+    """Unify line endings and drop blank lines so backends are comparable"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return _BLANK_LINES.sub("\n", text).strip()
+
+
+class PdfplumberExtractor:
+    name = "pdfplumber"
+
+    def __init__(self, **options):
+        self.options = options
+
+    def extract(self, path, max_pages=PDF_EXTRACT_PAGES):
+        with pdfplumber.open(path) as pdf:
+            texts = [page.extract_text(**self.options) or "" for page in pdf.pages[:max_pages]]
+        return _normalize("\n".join(texts))
+
+
+class PdfminerExtractor:
+    name = "pdfminer"
+
+    def __init__(self, laparams=None):
+        # A wide char_margin keeps table cells on one line; boxes_flow=None keeps reading order top-down
+        self.laparams = laparams or LAParams(char_margin=50.0, line_margin=0.2, boxes_flow=None)
+
+    def extract(self, path, max_pages=PDF_EXTRACT_PAGES):
+        return _normalize(pdfminer_extract_text(path, maxpages=max_pages, laparams=self.laparams))
+
+
+class PdfiumExtractor:
+    name = "pdfium"
+
+    def extract(self, path, max_pages=PDF_EXTRACT_PAGES):
+        if pypdfium2 is None:
+            raise RuntimeError("The pdfium extractor needs pypdfium2 (pip install pypdfium2)")
+        document = pypdfium2.PdfDocument(path)
+        try:
+            texts = []
+            for index in range(min(max_pages, len(document))):
+                page = document[index]
+                textpage = page.get_textpage()
+                texts.append(textpage.get_text_range())
+                textpage.close()
+                page.close()
+        finally:
+            document.close()
+        return _normalize("\n".join(texts))
+
+
+EXTRACTORS = {
+    "pdfplumber": PdfplumberExtractor,
+    "pdfminer": PdfminerExtractor,
+    "pdfium": PdfiumExtractor,
+}
+
+
+# Backends whose package is optional, and that package
+OPTIONAL_DEPENDENCIES = {"pdfium": "pypdfium2"}
+
+
+def available_extractors():
+    """Names of the backends whose dependencies are installed"""
+    return [name for name in EXTRACTORS if name != "pdfium" or pypdfium2 is not None]
+
+
+def get_extractor(name=None):
+    """Build the extractor called ``name`` (defaults to ``PDF_EXTRACTOR``)"""
+    name = name or PDF_EXTRACTOR
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown PDF_EXTRACTOR '{name}', expected one of {', '.join(EXTRACTORS)}")
+    return EXTRACTORS[name]()
+
+
+_default_extractor = None
+
+
+def extract_text(path, max_pages=PDF_EXTRACT_PAGES):
+    """Extract text with the configured backend"""
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = get_extractor()
+    return _default_extractor.extract(path, max_pages=max_pages)
@@ -0,0 +1,148 @@
+"""Cheap admission checks for uploaded PDFs, run before any text extraction.
+
+Only the header, the trailer/xref and the page tree objects are read: no
+content stream is decoded and no layout analysis happens, so even a very
+large or scanned document is accepted or rejected in milliseconds.
+"""
+import os
+
+from pdfminer.pdfdocument import PDFDocument, PDFEncryptionError, PDFPasswordIncorrect
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+
+PDF_MAX_BYTES = int(os.getenv("PDF_MAX_BYTES", str(5 * 1024 * 1024)))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "10"))
+PDF_REQUIRE_TEXT = os.getenv("PDF_REQUIRE_TEXT", "1") == "1"
+# Encrypted PDFs that open with an empty password (owner-password restrictions only) are extracted
+# like any other unless this is set
+PDF_REJECT_ENCRYPTED = os.getenv("PDF_REJECT_ENCRYPTED", "0") == "1"
+# Room for the multipart envelope around the file when capping the request body
+MAX_UPLOAD_BYTES = PDF_MAX_BYTES + 64 * 1024
+
+HEADER_BYTES = 1024
+TRAILER_BYTES = 2048
+TEXT_CHECK_PAGES = 3
+# Page tree nodes visited while looking for the first pages; a real tree needs a handful
+PAGE_TREE_MAX_NODES = 256
+
+
+class PreflightError(Exception):
+    """Raised when an upload fails an admission check"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _read_edges(path):
+    with open(path, "rb") as f:
+        head = f.read(HEADER_BYTES)
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - TRAILER_BYTES))
+        tail = f.read()
+    return head, tail
+
+
+def _first_pages(pages_root, limit):
+    """Yield (page, inherited resources) for the first ``limit`` leaves of the page tree
+
+    Raises PreflightError on a tree that loops back on itself or is implausibly large.
+    """
+    stack = [(pages_root, None)]
+    seen = 0
+    walked = 0
+    visited = set()
+    while stack and seen < limit:
+        node, inherited = stack.pop()
+        objid = getattr(node, "objid", None)
+        if objid is not None:
+            if objid in visited:
+                raise PreflightError("Malformed PDF: the page tree contains a cycle")
+            visited.add(objid)
+        walked += 1
+        if walked > PAGE_TREE_MAX_NODES:
+            raise PreflightError(f"Malformed PDF: page tree has more than {PAGE_TREE_MAX_NODES} nodes")
+        node = resolve1(node)
+        if not isinstance(node, dict):
+            continue
+        resources = resolve1(node.get("Resources")) or inherited
+        kids = resolve1(node.get("Kids"))
+        if kids is None:
+            seen += 1
+            yield node, resources
+            continue
+        for kid in reversed(kids):
+            stack.append((kid, resources))
+
+
+def _has_fonts(resources):
+    resources = resolve1(resources)
+    if not isinstance(resources, dict):
+        return False
+    fonts = resolve1(resources.get("Font"))
+    return isinstance(fonts, dict) and len(fonts) > 0
+
+
+def inspect_pdf(path):
+    """Return size, version, encryption, page count and text-layer presence of a PDF"""
+    head, tail = _read_edges(path)
+    size = os.path.getsize(path)
+    if size == 0:
+        raise PreflightError("Uploaded file is empty")
+
+    marker = head.find(b"%PDF-")
+    if marker < 0:
+        raise PreflightError("Not a PDF: missing %PDF- header")
+    version = head[marker + 5:marker + 8].decode("latin-1", "replace")
+    if b"startxref" not in tail:
+        raise PreflightError("Malformed PDF: no startxref found in trailer")
+    if b"%%EOF" not in tail:
+        raise PreflightError("Malformed PDF: missing %%EOF marker (file may be truncated)")
+
+    with open(path, "rb") as f:
+        parser = PDFParser(f)
+        try:
+            document = PDFDocument(parser)
+        except (PDFPasswordIncorrect, PDFEncryptionError):
+            raise PreflightError("PDF is password protected")
+        except Exception as e:
+            raise PreflightError(f"Malformed PDF: {str(e) or type(e).__name__}")
+
+        encrypted = any("Encrypt" in xref.get_trailer() for xref in document.xrefs)
+        try:
+            pages_root = resolve1(document.catalog["Pages"])
+            page_count = int(resolve1(pages_root.get("Count", 0)))
+            has_text = any(_has_fonts(resources) for _, resources in _first_pages(pages_root, TEXT_CHECK_PAGES))
+        except PreflightError:
+            raise
+        except Exception as e:
+            raise PreflightError(f"Malformed PDF: unreadable page tree ({str(e) or type(e).__name__})")
+
+    return {
+        "size": size,
+        "version": version,
+        "encrypted": encrypted,
+        "pages": page_count,
+        "has_text": has_text,
+    }
+
+
+def check_pdf(path, max_bytes=PDF_MAX_BYTES, max_pages=PDF_MAX_PAGES, require_text=PDF_REQUIRE_TEXT,
+              reject_encrypted=PDF_REJECT_ENCRYPTED):
+    """Inspect a PDF and raise PreflightError if it breaks any configured limit"""
+    size = os.path.getsize(path)
+    if size > max_bytes:
+        raise PreflightError(f"PDF is {size} bytes, the limit is {max_bytes} bytes", status=413)
+
+    info = inspect_pdf(path)
+    if reject_encrypted and info["encrypted"]:
+        raise PreflightError("PDF is encrypted; please upload an unprotected copy")
+    if info["pages"] == 0:
+        raise PreflightError("PDF file has no pages")
+    if info["pages"] > max_pages:
+        raise PreflightError(f"PDF has {info['pages']} pages, the limit is {max_pages}", status=413)
+    if require_text and not info["has_text"]:
+        raise PreflightError("PDF has no text layer (scanned or image-only). "
+                             "Please upload a text-based PDF, not a scanned image.")
+    return info
@@ -0,0 +1,186 @@
+"""End-to-end request deadlines and cancellation on client disconnect.
+
+``POST /`` and ``/modify-component`` create a ``Deadline`` from the
+``X-Request-Deadline`` header (milliseconds the client is willing to wait,
+clamped to ``REQUEST_DEADLINE_MAX``) or the route's default, and pass it to
+every stage: extraction-pool queueing and the extraction itself, LLM
+scheduler queueing and the LLM call. Each stage stops as soon as the deadline
+passes or the client's socket is found closed:
+
+- a queued extraction or LLM call leaves its queue without running;
+- a running extraction is killed with its worker process;
+- a running LLM call is abandoned, its result is discarded and the request
+  returns immediately. The provider may still finish the call, so its LLM
+  scheduler slot stays taken until it does (see ``Deadline.defer_to_calls``).
+
+``RequestCancelled`` carries the reason (``deadline`` or ``disconnect``) and
+the stage. ``counters`` tallies cancellations per stage, the work skipped
+because of them (LLM calls and their estimated tokens, extractions) and the
+work that still finished after its request was cancelled.
+"""
+import os
+import select
+import socket
+import threading
+import time
+
+REQUEST_DEADLINE_HEADER = "X-Request-Deadline"
+REQUEST_DEADLINE_UPLOAD = float(os.getenv("REQUEST_DEADLINE_UPLOAD", "120"))
+REQUEST_DEADLINE_MODIFY = float(os.getenv("REQUEST_DEADLINE_MODIFY", "60"))
+REQUEST_DEADLINE_MAX = float(os.getenv("REQUEST_DEADLINE_MAX", "300"))
+
+DEADLINE = "deadline"
+DISCONNECT = "disconnect"
+
+# How often a blocked stage re-checks the deadline and the client socket
+POLL_INTERVAL = 0.25
+
+
+class RequestCancelled(Exception):
+    def __init__(self, reason, stage):
+        message = "Request deadline exceeded" if reason == DEADLINE else "Client disconnected"
+        super().__init__(f"{message} during {stage}")
+        self.reason = reason
+        self.stage = stage
+
+
+def client_disconnected(environ):
+    """True when the client end of the request's socket is closed; False when unknown"""
+    sock = environ.get("werkzeug.socket") or environ.get("gunicorn.socket")
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return False
+        # Readable with no data means EOF; data would be a pipelined request
+        # MSG_DONTWAIT is POSIX-only; the socket is readable, so the peek does not block anyway
+        return sock.recv(1, socket.MSG_PEEK | getattr(socket, "MSG_DONTWAIT", 0)) == b""
+    except BlockingIOError:
+        return False
+    except (OSError, ValueError):
+        return True
+
+
+class WorkCounters:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.cancelled = {}
+        self.skipped = {}
+        self.wasted = {}
+
+    def _add(self, table, key, amount=1):
+        with self.lock:
+            table[key] = table.get(key, 0) + amount
+
+    def cancel(self, reason, stage):
+        self._add(self.cancelled, f"{stage}:{reason}")
+
+    def skip(self, what, amount=1):
+        """Work avoided by a cancellation (calls, extractions, estimated tokens)"""
+        self._add(self.skipped, what, amount)
+
+    def waste(self, what, amount=1):
+        """Work completed for a request that was already cancelled"""
+        self._add(self.wasted, what, amount)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "cancelled": dict(self.cancelled),
+                "skipped": dict(self.skipped),
+                "wasted": dict(self.wasted),
+            }
+
+
+counters = WorkCounters()
+
+
+class Deadline:
+    def __init__(self, seconds, environ=None):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+        self.environ = environ
+        self.reason = None
+        self.lock = threading.Lock()
+        # Helper threads started by run() that have not returned, and what to do once none is left
+        self.calls_running = 0
+        self.calls_finished = []
+
+    @classmethod
+    def from_request(cls, request, default):
+        """Deadline from the ``X-Request-Deadline`` header (ms), else ``default`` seconds"""
+        seconds = default
+        header = request.headers.get(REQUEST_DEADLINE_HEADER)
+        if header:
+            try:
+                seconds = float(header) / 1000
+            except ValueError:
+                pass
+        return cls(min(max(seconds, 0.0), REQUEST_DEADLINE_MAX), request.environ)
+
+    def remaining(self):
+        return max(0.0, self.expires - time.monotonic())
+
+    def cancelled(self):
+        """Reason the request should stop (``deadline``/``disconnect``), or None"""
+        if self.reason is None:
+            if time.monotonic() >= self.expires:
+                self.reason = DEADLINE
+            elif self.environ is not None and client_disconnected(self.environ):
+                self.reason = DISCONNECT
+        return self.reason
+
+    def check(self, stage):
+        """Raise RequestCancelled if the request should stop before ``stage``"""
+        reason = self.cancelled()
+        if reason:
+            counters.cancel(reason, stage)
+            raise RequestCancelled(reason, stage)
+
+    def run(self, stage, call, *args, **kwargs):
+        """Run a blocking call on a helper thread, abandoning it if the request is cancelled meanwhile"""
+        if self.cancelled():
+            counters.skip(f"{stage}_calls")
+        self.check(stage)
+        result = {}
+
+        def target():
+            try:
+                result["value"] = call(*args, **kwargs)
+            except BaseException as e:
+                result["error"] = e
+            if self.reason:
+                counters.waste(f"{stage}_calls")
+            with self.lock:
+                self.calls_running -= 1
+                callbacks = [] if self.calls_running else self.calls_finished
+                if not self.calls_running:
+                    self.calls_finished = []
+            for callback in callbacks:
+                callback()
+
+        worker = threading.Thread(target=target, name=f"deadline-{stage}", daemon=True)
+        with self.lock:
+            self.calls_running += 1
+        worker.start()
+        while True:
+            worker.join(min(POLL_INTERVAL, self.remaining()) or POLL_INTERVAL)
+            if not worker.is_alive():
+                break
+            if self.cancelled():
+                self.check(stage)
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
+
+    def defer_to_calls(self, callback):
+        """If a call abandoned by ``run`` is still running, call ``callback`` when it returns and give True.
+
+        Returns False (and never calls ``callback``) when no such call is running.
+        """
+        with self.lock:
+            if not self.calls_running:
+                return False
+            self.calls_finished.append(callback)
+            return True
@@ -0,0 +1,100 @@
+"""Canonical resume model shared by parsing, storage and rendering.
+
+``Candidate`` is validated once, straight from the LLM JSON, and is then used
+as-is everywhere else: the upload response, the upload store and the website
+generator all read the same field names. Serialization goes through orjson
+when it is installed.
+"""
+from typing import List
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+
+class Project(BaseModel):
+    project_name: str
+    about_project: str
+    skills_used: list[str]
+
+class Achivements(BaseModel):
+    Achivement_name: str
+    institute_name: str
+    about: str
+
+class Experience(BaseModel):
+    Position_name: str
+    Company_name: str
+    skills_used: list[str]
+
+class Education(BaseModel):
+    Institute_name: str
+    Degree_name: str
+    marks: str
+
+class Position_of_Responsibility(BaseModel):
+    Position_name: str
+    Society_name: str
+    Description: str
+
+class Candidate(BaseModel):
+    name: str
+    Education: List[Education]
+    Projects: List[Project]
+    Experience: List[Experience]
+    Achivements: List[Achivements]
+    Skills: List[str]
+    Position_of_Responsibility: List[Position_of_Responsibility]
+    Contact_Info: dict
+
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Serialize to JSON bytes; pydantic models are dumped without an intermediate copy"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, ensure_ascii=False).encode("utf-8")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _from_legacy(data):
+    """Map the pre-canonical response shape ("projects"/"title"/"desc"/...) onto Candidate fields"""
+    return {
+        "name": data.get("name", ""),
+        "Education": [{"Institute_name": e.get("Institute_name", ""), "Degree_name": e.get("Degree_name", ""),
+                       "marks": e.get("Marks", "")} for e in data.get("education", [])],
+        "Projects": [{"project_name": p.get("title", ""), "about_project": p.get("desc", ""),
+                      "skills_used": p.get("tech", [])} for p in data.get("projects", [])],
+        "Experience": [{"Position_name": e.get("Position", ""), "Company_name": e.get("Company", ""),
+                        "skills_used": e.get("Skills", [])} for e in data.get("Experience", [])],
+        "Achivements": [{"Achivement_name": a.get("achievement_name", ""), "institute_name": a.get("institute_name", ""),
+                         "about": a.get("description", "")} for a in data.get("Achievements", [])],
+        "Skills": data.get("skills", []),
+        "Position_of_Responsibility": [{"Position_name": p.get("position_name", ""), "Society_name": p.get("soc_name", ""),
+                                        "Description": p.get("description", "")}
+                                       for p in data.get("Position_of_responsibility", [])],
+        "Contact_Info": data.get("Contact_Info", {}),
+    }
+
+
+def load_candidate(data):
+    """Return a Candidate from a Candidate, a canonical dict or a legacy-shaped dict"""
+    if isinstance(data, Candidate):
+        return data
+    if "Projects" not in data and ("projects" in data or "skills" in data or "education" in data):
+        data = _from_legacy(data)
+    return Candidate.model_validate(data)
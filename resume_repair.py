@@ -0,0 +1,253 @@
+"""Repair-and-validate for the resume JSON returned by the LLM.
+
+``Candidate.model_validate_json`` rejects the whole response for one bad
+field. ``repair_candidate`` instead fixes what it can, section by section:
+
+- keys are matched case- and punctuation-insensitively, plus common aliases
+  (``achievement_name`` -> ``Achivement_name``, ``company`` -> ``Company_name``)
+- strings become lists where a list is expected (split on commas), other
+  scalars become one-item lists, numbers and lists become strings, ``null``
+  becomes the field's default
+- a single object where a list is expected is wrapped in a list
+- list items that still do not validate are dropped, the rest are kept
+
+Every change is reported as ``"<path>: <what was done>"``; a field the output
+left out is reported once, as ``"<path>: missing"``. A section that
+cannot be turned into valid data at all (for example a string where a list
+of objects is expected, or every item invalid) is returned in
+``unrecoverable`` so the caller can re-ask the LLM for that section alone.
+"""
+import json
+import re
+from typing import get_args, get_origin
+
+from pydantic import BaseModel, ValidationError
+
+from resume_model import Candidate
+
+_KEY = re.compile(r"[^a-z0-9]")
+
+# Normalized spellings the LLM uses for our (sometimes misspelled) field names; the first
+# candidate that exists on the model being repaired wins
+ALIASES = {
+    "achievements": ("Achivements",),
+    "achievement": ("Achivement_name",),
+    "achievementname": ("Achivement_name",),
+    "name": ("project_name", "Achivement_name"),
+    "title": ("project_name", "Achivement_name", "Position_name"),
+    "description": ("about_project", "about", "Description"),
+    "about": ("about_project", "about"),
+    "details": ("about_project", "about", "Description"),
+    "technologies": ("skills_used",),
+    "tech": ("skills_used",),
+    "techstack": ("skills_used",),
+    "skills": ("skills_used",),
+    "position": ("Position_name",),
+    "role": ("Position_name",),
+    "company": ("Company_name",),
+    "organization": ("Company_name", "Society_name"),
+    "institute": ("Institute_name", "institute_name"),
+    "institution": ("Institute_name", "institute_name"),
+    "college": ("Institute_name", "institute_name"),
+    "university": ("Institute_name", "institute_name"),
+    "degree": ("Degree_name",),
+    "grade": ("marks",),
+    "cgpa": ("marks",),
+    "gpa": ("marks",),
+    "percentage": ("marks",),
+    "society": ("Society_name",),
+    "club": ("Society_name",),
+    "contact": ("Contact_Info",),
+    "contactinformation": ("Contact_Info",),
+    "positionsofresponsibility": ("Position_of_Responsibility",),
+}
+
+
+def _normalize_key(key):
+    return _KEY.sub("", str(key).lower())
+
+
+def _match_keys(data, model):
+    """Map the keys of ``data`` onto the field names of ``model``; returns (mapped dict, renamed pairs)"""
+    fields = model.model_fields
+    by_normal = {_normalize_key(name): name for name in fields}
+    mapped, renamed = {}, []
+    for key, value in data.items():
+        if key in fields:
+            target = key
+        else:
+            normal = _normalize_key(key)
+            target = by_normal.get(normal) or next((f for f in ALIASES.get(normal, ()) if f in fields), None)
+        if target is None or (target in mapped and key != target):
+            continue
+        if target != key:
+            renamed.append((key, target))
+        mapped[target] = value
+    return mapped, renamed
+
+
+def _to_text(value):
+    if isinstance(value, list):
+        return ", ".join(_to_text(v) for v in value if v is not None)
+    if isinstance(value, dict):
+        return ", ".join(f"{k}: {_to_text(v)}" for k, v in value.items())
+    return str(value)
+
+
+def _to_text_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in re.split(r"[,;|\n]", value) if part.strip()]
+    if isinstance(value, dict):
+        return [_to_text(v) for v in value.values() if v not in (None, "")]
+    if not isinstance(value, (list, tuple, set)):
+        return [_to_text(value)]
+    return [_to_text(v) for v in value if v not in (None, "")]
+
+
+def _default(annotation):
+    if get_origin(annotation) is list:
+        return []
+    return {} if annotation is dict else ""
+
+
+def _coerce(value, annotation, path, repairs):
+    """Coerce a scalar or list-of-strings field value; returns the new value"""
+    is_list = get_origin(annotation) is list
+    if value is None:
+        repairs.append(f"{path}: null, set to {_default(annotation)!r}")
+        return _default(annotation)
+    if is_list:
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return value
+        repairs.append(f"{path}: {type(value).__name__} converted to a list of strings")
+        return _to_text_list(value)
+    if annotation is dict:
+        if isinstance(value, dict):
+            return value
+        repairs.append(f"{path}: {type(value).__name__} converted to an object")
+        items = value if isinstance(value, list) else [value]
+        return {f"contact_{i + 1}": _to_text(v) for i, v in enumerate(items) if v not in (None, "")}
+    if isinstance(value, str):
+        return value
+    repairs.append(f"{path}: {type(value).__name__} converted to text")
+    return _to_text(value)
+
+
+def _repair_item(data, model, path, repairs):
+    """Repair one object against ``model``; returns a model instance or None"""
+    if not isinstance(data, dict):
+        return None
+    item_repairs = []
+    mapped, renamed = _match_keys(data, model)
+    if not mapped:
+        return None
+    item_repairs.extend(f"{path}.{old}: renamed to {new}" for old, new in renamed)
+    for name, field in model.model_fields.items():
+        if name not in mapped:
+            item_repairs.append(f"{path}.{name}: missing, set to {_default(field.annotation)!r}")
+            mapped[name] = _default(field.annotation)
+        else:
+            mapped[name] = _coerce(mapped[name], field.annotation, f"{path}.{name}", item_repairs)
+    try:
+        item = model.model_validate(mapped)
+    except ValidationError:
+        return None
+    repairs.extend(item_repairs)
+    return item
+
+
+def _repair_section(value, annotation, path, repairs):
+    """Repair a list section; returns (items, unrecoverable)"""
+    item_model = get_args(annotation)[0]
+    if value is None:
+        repairs.append(f"{path}: null, set to []")
+        return [], False
+    if not (isinstance(item_model, type) and issubclass(item_model, BaseModel)):
+        return _coerce(value, annotation, path, repairs), False
+    if isinstance(value, dict):
+        repairs.append(f"{path}: single object wrapped in a list")
+        value = [value]
+    if not isinstance(value, list):
+        return [], True
+    items = []
+    for index, raw in enumerate(value):
+        item = _repair_item(raw, item_model, f"{path}[{index}]", repairs)
+        if item is None:
+            repairs.append(f"{path}[{index}]: invalid item dropped")
+        else:
+            items.append(item)
+    return items, bool(value) and not items
+
+
+def repair_candidate(data):
+    """Repair LLM output (JSON text or dict) into a Candidate.
+
+    Returns ``(candidate, repairs, unrecoverable)`` where ``unrecoverable`` lists
+    the sections that had to be left empty. Raises ``ValueError`` when the
+    output is not a JSON object at all.
+    """
+    if isinstance(data, (str, bytes)):
+        data = parse_json_object(data)
+    repairs, unrecoverable, values = [], [], {}
+    mapped, renamed = _match_keys(data, Candidate)
+    repairs.extend(f"{old}: renamed to {new}" for old, new in renamed)
+    for name, field in Candidate.model_fields.items():
+        if name not in mapped:
+            repairs.append(f"{name}: missing")
+            values[name] = _default(field.annotation)
+            continue
+        value = mapped[name]
+        if get_origin(field.annotation) is list:
+            values[name], failed = _repair_section(value, field.annotation, name, repairs)
+            if failed:
+                repairs.append(f"{name}: unrecoverable, left empty")
+                unrecoverable.append(name)
+        else:
+            values[name] = _coerce(value, field.annotation, name, repairs)
+    return Candidate.model_validate(values), repairs, unrecoverable
+
+
+def section_of(repair):
+    """The top-level Candidate field a repair entry is about"""
+    return re.split(r"[.\[:]", repair, maxsplit=1)[0]
+
+
+def repair_section(name, data):
+    """Repair a single re-asked section (``{"<name>": [...]}`` or the bare list); returns (items, repairs, ok)"""
+    if isinstance(data, (str, bytes)):
+        data = parse_json_object(data)
+    if isinstance(data, dict):
+        mapped, _ = _match_keys(data, Candidate)
+        data = mapped.get(name)
+    repairs = []
+    items, failed = _repair_section(data, Candidate.model_fields[name].annotation, name, repairs)
+    return items, repairs, not failed
+
+
+def section_schema(name):
+    """JSON schema of one Candidate section, for a focused re-ask prompt"""
+    annotation = Candidate.model_fields[name].annotation
+    item_model = get_args(annotation)[0]
+    if isinstance(item_model, type) and issubclass(item_model, BaseModel):
+        items = item_model.model_json_schema()
+    else:
+        items = {"type": "string"}
+    return {"type": "object", "properties": {name: {"type": "array", "items": items}}, "required": [name]}
+
+
+def parse_json_object(text):
+    """The JSON object in an LLM reply, tolerating markdown fences and surrounding prose"""
+    if isinstance(text, bytes):
+        text = text.decode("utf-8", errors="replace")
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end <= start:
+            raise ValueError("LLM output does not contain a JSON object")
+        data = json.loads(text[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("LLM output is not a JSON object")
+    return data
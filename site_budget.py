@@ -0,0 +1,307 @@
+"""Offline performance-budget checker for generated portfolio sites.
+
+``analyze_site`` reads a site directory written by ``/generate-website`` and
+measures the files that are published (``site_storage.site_files``, so not
+the server's own ``preview.html`` or ``restyle.json``): raw, gzip and (when
+available) brotli bytes per asset and in total, render-blocking resources,
+DOM element count, CSS selector count and style rules that match nothing on
+the page, and requests to third-party hosts.
+``check_budgets`` compares that report with the limits in ``site_budgets.json``
+(a ``default`` block plus optional per-theme overrides) and returns the
+violations.
+
+    python site_budget.py generated_websites/<website_id>
+    python site_budget.py --themes --size large    # build every theme from the benchmark fixture
+
+The CLI exits with status 1 when any budget is exceeded, so it can gate a build.
+"""
+import argparse
+import fnmatch
+import gzip
+import json
+import os
+import re
+import sys
+import tempfile
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+from site_storage import site_files
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "site_budgets.json")
+
+# Metrics whose report value is a list; the budget applies to its length
+COUNTED_METRICS = ("render_blocking", "unused_css_rules", "third_party_requests")
+
+_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_PSEUDO = re.compile(r"::?[\w-]+(\([^)]*\))?")
+_ATTRIBUTE = re.compile(r"\[[^\]]*\]")
+_COMPOUND = re.compile(r"[\s>+~]+")
+_CLASS = re.compile(r"\.([\w-]+)")
+_ID = re.compile(r"#([\w-]+)")
+_TAG = re.compile(r"^([a-zA-Z][\w-]*)")
+_JS_STRING = re.compile(r"""['"`]([\w\s-]+)['"`]""")
+
+
+class _PageScanner(HTMLParser):
+    """Counts elements and collects the tags, classes, ids and resources of a page"""
+
+    def __init__(self):
+        super().__init__()
+        self.nodes = 0
+        self.tags, self.classes, self.ids = set(), set(), set()
+        self.resources = []
+        self.inline_styles = []
+        self.body_classes = []
+        self._in_head = False
+        self._in_style = False
+
+    def handle_starttag(self, tag, attrs):
+        self.nodes += 1
+        attrs = dict(attrs)
+        self.tags.add(tag)
+        self.classes.update((attrs.get("class") or "").split())
+        if attrs.get("id"):
+            self.ids.add(attrs["id"])
+        if tag == "head":
+            self._in_head = True
+        elif tag == "body":
+            self.body_classes = (attrs.get("class") or "").split()
+        elif tag == "style":
+            self._in_style = True
+        elif tag == "link" and attrs.get("href"):
+            rel = (attrs.get("rel") or "").lower().split()
+            if "stylesheet" in rel:
+                blocking = attrs.get("media", "all") in ("all", "screen", "") and "disabled" not in attrs
+                self.resources.append({"url": attrs["href"], "kind": "stylesheet", "blocking": blocking})
+            elif "preload" in rel or "icon" in rel:
+                self.resources.append({"url": attrs["href"], "kind": attrs.get("as") or "icon", "blocking": False})
+        elif tag == "script" and attrs.get("src"):
+            deferred = "defer" in attrs or "async" in attrs or attrs.get("type") == "module"
+            self.resources.append({"url": attrs["src"], "kind": "script", "blocking": self._in_head and not deferred})
+        elif tag in ("img", "iframe", "source", "video", "audio") and attrs.get("src"):
+            self.resources.append({"url": attrs["src"], "kind": tag, "blocking": False})
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self._in_head = False
+        elif tag == "style":
+            self._in_style = False
+
+    def handle_data(self, data):
+        if self._in_style:
+            self.inline_styles.append(data)
+
+
+def _compressed_sizes(payload):
+    sizes = {"bytes": len(payload), "gzip_bytes": len(gzip.compress(payload, 9))}
+    if brotli is not None:
+        sizes["brotli_bytes"] = len(brotli.compress(payload, quality=11))
+    return sizes
+
+
+def css_rules(css):
+    """Selector lists of the style rules in ``css``, including those nested in @media/@supports"""
+    css = _COMMENT.sub("", css)
+    rules, depth, skip_depth, start = [], 0, None, 0
+    for index, char in enumerate(css):
+        if char == "{":
+            prelude = css[start:index].strip()
+            depth += 1
+            if skip_depth is None:
+                if prelude.startswith("@"):
+                    # Only conditional group rules contain style rules worth checking
+                    if not prelude.startswith(("@media", "@supports", "@layer")):
+                        skip_depth = depth
+                else:
+                    rules.append([s.strip() for s in prelude.split(",") if s.strip()])
+            start = index + 1
+        elif char == "}":
+            if skip_depth == depth:
+                skip_depth = None
+            depth -= 1
+            start = index + 1
+        elif char == ";" and skip_depth is None:
+            start = index + 1
+    return rules
+
+
+def selector_matches(selector, tags, classes, ids):
+    """Whether every compound of ``selector`` could match something on the page"""
+    selector = _ATTRIBUTE.sub("", _PSEUDO.sub("", selector))
+    for compound in _COMPOUND.split(selector.strip()):
+        if not compound or compound == "*":
+            continue
+        tag = _TAG.match(compound)
+        if tag and tag.group(1).lower() not in tags:
+            return False
+        if any(name not in classes for name in _CLASS.findall(compound)):
+            return False
+        if any(name not in ids for name in _ID.findall(compound)):
+            return False
+    return True
+
+
+def _is_third_party(url):
+    parsed = urlparse(url)
+    return bool(parsed.netloc) or url.startswith("//")
+
+
+def analyze_site(site_dir):
+    """Measure a generated site directory; returns a JSON-serializable report"""
+    assets = {}
+    texts = {}
+    for relative in site_files(site_dir):
+        with open(os.path.join(site_dir, relative), "rb") as f:
+            payload = f.read()
+        assets[relative] = _compressed_sizes(payload)
+        if relative.endswith((".html", ".css", ".js")):
+            texts[relative] = payload.decode("utf-8", errors="replace")
+
+    page = _PageScanner()
+    page.feed(texts.get("index.html", ""))
+
+    # Classes the site's own scripts may add at runtime count as used
+    classes = set(page.classes)
+    for name, text in texts.items():
+        if name.endswith(".js"):
+            for literal in _JS_STRING.findall(text):
+                classes.update(literal.split())
+    tags = page.tags | {"html"}
+
+    stylesheets = [text for name, text in texts.items() if name.endswith(".css")] + page.inline_styles
+    rules = [rule for css in stylesheets for rule in css_rules(css)]
+    unused = [", ".join(rule) for rule in rules
+              if not any(selector_matches(s, tags, classes, page.ids) for s in rule)]
+
+    totals = {}
+    for sizes in assets.values():
+        for key, value in sizes.items():
+            totals[key] = totals.get(key, 0) + value
+
+    return {
+        "site": site_dir,
+        "theme": page.body_classes[0] if page.body_classes else None,
+        "assets": assets,
+        "total_bytes": totals.get("bytes", 0),
+        "total_gzip_bytes": totals.get("gzip_bytes", 0),
+        "total_brotli_bytes": totals.get("brotli_bytes"),
+        "render_blocking": [r["url"] for r in page.resources if r["blocking"]],
+        "dom_nodes": page.nodes,
+        "css_rules": len(rules),
+        "css_selectors": sum(len(rule) for rule in rules),
+        "unused_css_rules": unused,
+        "third_party_requests": [r["url"] for r in page.resources if _is_third_party(r["url"])],
+    }
+
+
+def load_budgets(path=BUDGETS_PATH, theme=None):
+    """Default budgets merged with the overrides for ``theme``"""
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    budgets = dict(config.get("default", {}))
+    override = config.get("themes", {}).get(theme or "", {})
+    budgets["assets"] = dict(budgets.get("assets", {}), **override.get("assets", {}))
+    budgets.update({k: v for k, v in override.items() if k != "assets"})
+    return budgets
+
+
+def check_budgets(report, budgets):
+    """Return a list of {"metric", "value", "limit"} for every budget the report exceeds"""
+    violations = []
+    for metric, limit in budgets.items():
+        if metric == "assets" or limit is None:
+            continue
+        value = report.get(metric)
+        if metric in COUNTED_METRICS:
+            value = len(value or [])
+        if value is not None and value > limit:
+            violations.append({"metric": metric, "value": value, "limit": limit})
+    # Asset budgets are "<glob>": max bytes, or "<glob>:gzip"/"<glob>:brotli" for compressed bytes
+    for pattern, limit in budgets.get("assets", {}).items():
+        glob, _, encoding = pattern.partition(":")
+        key = f"{encoding}_bytes" if encoding else "bytes"
+        for name, sizes in report["assets"].items():
+            if fnmatch.fnmatch(name, glob) and sizes.get(key, 0) > limit:
+                violations.append({"metric": f"assets/{name}:{key}", "value": sizes[key], "limit": limit})
+    return violations
+
+
+def print_report(report, violations):
+    print(f"Site: {report['site']} (theme: {report['theme']})")
+    print(f"{'asset':32s} {'bytes':>10s} {'gzip':>10s} {'brotli':>10s}")
+    for name, sizes in report["assets"].items():
+        print(f"{name:32s} {sizes['bytes']:>10d} {sizes['gzip_bytes']:>10d} {sizes.get('brotli_bytes', '-'):>10}")
+    print(f"{'TOTAL':32s} {report['total_bytes']:>10d} {report['total_gzip_bytes']:>10d} "
+          f"{report['total_brotli_bytes'] if report['total_brotli_bytes'] is not None else '-':>10}")
+    print(f"DOM nodes: {report['dom_nodes']}  CSS rules: {report['css_rules']}  "
+          f"selectors: {report['css_selectors']}  unused rules: {len(report['unused_css_rules'])}")
+    print(f"Render-blocking: {', '.join(report['render_blocking']) or 'none'}")
+    print(f"Third-party requests: {', '.join(report['third_party_requests']) or 'none'}")
+    for rule in report["unused_css_rules"]:
+        print(f"  unused: {rule}")
+    if violations:
+        print("OVER BUDGET:")
+        for v in violations:
+            print(f"  {v['metric']}: {v['value']} > {v['limit']}")
+    else:
+        print("Within budget")
+
+
+def build_theme_sites(workdir, size="medium"):
+    """Render every theme from the benchmark fixture into ``workdir``; returns {style: site dir}"""
+    import app
+    from benchmarks.fixtures import SIZES, make_candidate_dict
+
+    candidate = app.Candidate.model_validate(make_candidate_dict(SIZES[size]))
+    sites = {}
+    for style in app.THEMES:
+        folder = os.path.join(workdir, style)
+        os.makedirs(folder, exist_ok=True)
+        app.write_site(folder, app.generate_website_code(candidate, style))
+        sites[style] = folder
+    return sites
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check generated portfolio sites against performance budgets")
+    parser.add_argument("sites", nargs="*", help="site directories written by /generate-website")
+    parser.add_argument("--themes", action="store_true", help="build and check every theme from the benchmark fixture")
+    parser.add_argument("--size", default="medium", help="fixture size for --themes")
+    parser.add_argument("--budgets", default=BUDGETS_PATH)
+    parser.add_argument("--output", help="write the reports and violations as JSON")
+    args = parser.parse_args(argv)
+    if not args.sites and not args.themes:
+        parser.error("Give one or more site directories, or --themes")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        sites = {path: path for path in args.sites}
+        if args.themes:
+            sites.update(build_theme_sites(workdir, args.size))
+
+        results, failed = [], False
+        for label, site_dir in sites.items():
+            report = analyze_site(site_dir)
+            violations = check_budgets(report, load_budgets(args.budgets, report["theme"]))
+            report["site"] = label
+            print_report(report, violations)
+            print()
+            results.append({"report": report, "violations": violations})
+            failed = failed or bool(violations)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Background pre-building of the artifacts a new site is likely to need next.
+
+Right after ``/generate-website`` a user nearly always opens the preview and
+then downloads the zip, and sometimes switches style. ``Prebuilder`` runs that
+work on a small thread pool as soon as the site is written: gzip/brotli
+variants of the text assets, the zip archive and the renders of the other
+themes. Results go into ``ArtifactCache``, an LRU bounded by
+``PREBUILD_CACHE_BYTES``.
+
+Every job belongs to a website id. ``invalidate(website_id)`` cancels the jobs
+that have not started, makes running ones discard their result and drops the
+cached artifacts, so a modified site is never served stale output. Only sites
+with scheduled or running jobs are tracked.
+"""
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PREBUILD_WORKERS = int(os.getenv("PREBUILD_WORKERS", "2"))
+PREBUILD_CACHE_BYTES = int(os.getenv("PREBUILD_CACHE_BYTES", str(64 * 1024 * 1024)))
+
+# Preferred first when the client accepts several
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(payload, encoding):
+    if encoding == "br":
+        return brotli.compress(payload, quality=11)
+    if encoding == "gzip":
+        return gzip.compress(payload, 9)
+    raise ValueError(f"Unsupported encoding {encoding!r}")
+
+
+def artifact_size(value):
+    if isinstance(value, (bytes, str)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(artifact_size(v) for v in value.values())
+    return 0
+
+
+class ArtifactCache:
+    """LRU of prebuilt artifacts keyed by (owner, artifact), bounded by total size"""
+
+    def __init__(self, max_bytes=PREBUILD_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __contains__(self, key):
+        with self.lock:
+            return key in self.entries
+
+    def put(self, key, value):
+        size = artifact_size(value)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            if previous:
+                self.bytes -= previous[1]
+            self.entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def discard_owner(self, owner):
+        with self.lock:
+            for key in [k for k in self.entries if k[0] == owner]:
+                self.bytes -= self.entries.pop(key)[1]
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class Prebuilder:
+    def __init__(self, cache=None, workers=PREBUILD_WORKERS):
+        self.cache = cache if cache is not None else ArtifactCache()
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prebuild")
+        self.lock = threading.Lock()
+        # website id -> {token: future} of its scheduled or running job lists; empty sites are dropped
+        self.active = {}
+        self.built = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def _count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def schedule(self, website_id, jobs):
+        """Run ``jobs`` — a list of (cache key, zero-argument callable) — in the background, in order"""
+        token = object()
+        with self.lock:
+            site = self.active.setdefault(website_id, {})
+            site[token] = self.executor.submit(self._run, website_id, token, jobs)
+
+    def _current(self, website_id, token):
+        with self.lock:
+            return token in self.active.get(website_id, ())
+
+    def _run(self, website_id, token, jobs):
+        try:
+            for key, build in jobs:
+                if not self._current(website_id, token):
+                    self._count("cancelled")
+                    return
+                if key in self.cache:
+                    continue
+                try:
+                    value = build()
+                except Exception as e:
+                    print(f"Prebuild of {key} failed: {str(e)}")
+                    self._count("failed")
+                    continue
+                # The site may have been modified while this was building
+                if not self._current(website_id, token):
+                    self._count("cancelled")
+                    return
+                self.cache.put(key, value)
+                self._count("built")
+        finally:
+            with self.lock:
+                site = self.active.get(website_id)
+                if site is not None:
+                    site.pop(token, None)
+                    if not site:
+                        del self.active[website_id]
+
+    def invalidate(self, website_id):
+        """Cancel pending work for a site and drop its cached artifacts"""
+        with self.lock:
+            site = self.active.pop(website_id, {})
+        # Jobs already running find their token gone and discard their result
+        for future in site.values():
+            if future.cancel():
+                self._count("cancelled")
+        self.cache.discard_owner(website_id)
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def stats(self):
+        with self.lock:
+            stats = {
+                "pending_sites": len(self.active),
+                "built": self.built,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+            }
+        stats["cache"] = self.cache.stats()
+        return stats
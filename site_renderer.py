@@ -0,0 +1,63 @@
+"""Compiled Jinja2 templates for the generated portfolio pages.
+
+Each theme gets its own environment whose loader first looks in
+``site_templates/themes/<style>/`` and then in ``site_templates/``, so a theme
+can override the page or any fragment by dropping a file with the same name.
+Templates are compiled once per process, and the compiled bytecode is cached
+on disk in ``TEMPLATE_CACHE_DIR`` so restarts skip the compile step.
+
+All resume values are autoescaped, and sections are rendered by Jinja's
+generator/join pipeline, so render time grows linearly with list sizes.
+"""
+import os
+
+from jinja2 import ChoiceLoader, Environment, FileSystemBytecodeCache, FileSystemLoader
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "site_templates")
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", os.path.join(TEMPLATE_DIR, ".cache"))
+
+PAGE_TEMPLATE = "page.html"
+FRAGMENTS = ["experience", "projects", "skills", "education", "contact"]
+
+_environments = {}
+
+
+def _bytecode_cache():
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    return FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+
+
+def get_environment(style):
+    """Environment for a theme; templates are compiled on first use and kept"""
+    environment = _environments.get(style)
+    if environment is None:
+        loader = ChoiceLoader([
+            FileSystemLoader(os.path.join(TEMPLATE_DIR, "themes", style)),
+            FileSystemLoader(TEMPLATE_DIR),
+        ])
+        environment = Environment(
+            loader=loader,
+            autoescape=True,
+            auto_reload=False,
+            bytecode_cache=_bytecode_cache(),
+            cache_size=-1,
+        )
+        _environments[style] = environment
+    return environment
+
+
+def precompile(styles):
+    """Compile the page and every fragment template of each theme up front"""
+    for style in styles:
+        environment = get_environment(style)
+        environment.get_template(PAGE_TEMPLATE)
+        for fragment in FRAGMENTS:
+            environment.get_template(f"fragments/{fragment}.html")
+
+
+def render_page(candidate, theme, style):
+    return get_environment(style).get_template(PAGE_TEMPLATE).render(candidate=candidate, theme=theme)
+
+
+def render_fragment(fragment, items, style="professional"):
+    return get_environment(style).get_template(f"fragments/{fragment}.html").render(items=items)
@@ -0,0 +1,119 @@
+"""Sharded on-disk layout for generated sites.
+
+A flat ``generated_websites/<id>/`` directory with one entry per site slows
+down every lookup and listing as it grows. Sites are stored under two levels
+of hash-prefix subdirectories instead::
+
+    generated_websites/3f/a2/<website id>/index.html
+
+Sites written before the change are still found in the flat layout until
+they are moved with::
+
+    python site_storage.py migrate [--root generated_websites] [--dry-run]
+
+``site_folder`` resolves an id to its folder (sharded first, then flat) and
+rejects ids that are not plain uuid-like names, so a URL can never point
+outside the root.
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+
+GENERATED_FOLDER = os.getenv("GENERATED_FOLDER", "generated_websites")
+SITE_SHARD_LEVELS = int(os.getenv("SITE_SHARD_LEVELS", "2"))
+
+_SITE_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+_SHARD = re.compile(r"^[0-9a-f]{2}$")
+
+
+def valid_site_id(website_id):
+    return bool(website_id) and _SITE_ID.match(website_id) is not None
+
+
+def shard_path(website_id, levels=SITE_SHARD_LEVELS):
+    """Relative sharded path of a site: ``ab/cd/<id>``"""
+    digest = hashlib.sha1(website_id.encode("utf-8")).hexdigest()
+    return os.path.join(*[digest[2 * i:2 * i + 2] for i in range(levels)], website_id)
+
+
+def new_site_folder(website_id, root=GENERATED_FOLDER):
+    """Create and return the sharded folder of a new site"""
+    if not valid_site_id(website_id):
+        raise ValueError(f"Invalid website id {website_id!r}")
+    folder = os.path.join(root, shard_path(website_id))
+    os.makedirs(folder)
+    return folder
+
+
+def site_folder(website_id, root=GENERATED_FOLDER):
+    """Folder of an existing site, sharded or still flat, or None"""
+    if not valid_site_id(website_id):
+        return None
+    folder = os.path.join(root, shard_path(website_id))
+    if os.path.isdir(folder):
+        return folder
+    legacy = os.path.join(root, website_id)
+    if os.path.isdir(legacy) and not _SHARD.match(website_id):
+        return legacy
+    return None
+
+
+def site_files(website_folder):
+    """Relative paths of the files that make up a published website.
+
+    Files the server keeps next to them (``preview.html``, ``restyle.json``) are not part of it.
+    """
+    files = [name for name in ["index.html", "styles.css", "script.js"]
+             if os.path.exists(os.path.join(website_folder, name))]
+    fonts_folder = os.path.join(website_folder, "fonts")
+    if os.path.isdir(fonts_folder):
+        # Skip fonts of a restyled version still being written
+        files.extend(f"fonts/{name}" for name in sorted(os.listdir(fonts_folder)) if not name.endswith(".tmp"))
+    return files
+
+
+def flat_sites(root=GENERATED_FOLDER):
+    """Ids of the sites still stored in the flat layout"""
+    with os.scandir(root) as entries:
+        return [entry.name for entry in entries
+                if entry.is_dir() and valid_site_id(entry.name) and not _SHARD.match(entry.name)]
+
+
+def migrate(root=GENERATED_FOLDER, dry_run=False):
+    """Move every flat site into its shard; returns (moved, skipped)"""
+    moved, skipped = 0, 0
+    for website_id in flat_sites(root):
+        target = os.path.join(root, shard_path(website_id))
+        if os.path.exists(target):
+            print(f"Skipping {website_id}: {target} already exists")
+            skipped += 1
+            continue
+        if not dry_run:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Same filesystem, so this is an atomic rename
+            os.rename(os.path.join(root, website_id), target)
+        moved += 1
+    return moved, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the sharded layout of generated sites")
+    parser.add_argument("command", choices=["migrate", "status"])
+    parser.add_argument("--root", default=GENERATED_FOLDER)
+    parser.add_argument("--dry-run", action="store_true", help="only count what would move")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        parser.error(f"No site folder at {args.root}")
+    if args.command == "status":
+        print(f"{len(flat_sites(args.root))} sites still in the flat layout")
+        return 0
+    moved, skipped = migrate(args.root, args.dry_run)
+    print(f"{'Would move' if args.dry_run else 'Moved'} {moved} sites, skipped {skipped}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Dedup store for uploads, keyed by the SHA-256 of the raw PDF bytes.
+
+A repeated upload of the exact same file returns the stored extraction and
+parse result without touching the disk, the PDF parser or the LLM. The store
+is an in-process LRU bounded by ``UPLOAD_CACHE_SIZE`` entries.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+UPLOAD_CACHE_SIZE = int(os.getenv("UPLOAD_CACHE_SIZE", "512"))
+
+
+def fingerprint(payload):
+    """SHA-256 hex digest of an upload"""
+    return hashlib.sha256(payload).hexdigest()
+
+
+class UploadStore:
+    def __init__(self, max_entries=UPLOAD_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return a copy of the entry for ``key`` and mark it recently used, or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry, website_ids=list(entry["website_ids"]))
+
+    def put(self, key, text, candidate):
+        """Store the extracted text and parsed Candidate of an upload, evicting the oldest entries"""
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            previous = self.entries.pop(key, None)
+            self.entries[key] = {
+                "text": text,
+                "candidate": candidate,
+                "website_ids": previous["website_ids"] if previous else [],
+                "created": time.time(),
+            }
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def add_website(self, key, website_id):
+        """Remember a website generated from the upload ``key``; False if it is not stored"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False
+            if website_id not in entry["website_ids"]:
+                entry["website_ids"].append(website_id)
+            return True
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }